@@ -14,10 +14,46 @@ For example, we look for phrases like "queued to", "merged to",
 "committed to", and "applied_to_official_tree" in email subjects or bodies.
 """
 
+import heapq
+import io
+import sys
 import networkx as nx
+from contextlib import contextmanager, redirect_stdout
+from datetime import datetime
 from typing import Dict, List
 from collections import defaultdict
-from ..core.email_parser import extract_patch_signature_improved
+from ..core.email_parser import get_email_patch_signature
+
+def _merge_probability(item) -> float:
+    """Sort key for (signature, analysis) pairs of a patch_analysis dict."""
+    return item[1]['merge_probability']
+
+@contextmanager
+def _buffered_stdout():
+    """
+    Collect everything printed inside the block and write it to stdout in one
+    call; the reports below print many short lines.
+    """
+    buf = io.StringIO()
+    try:
+        with redirect_stdout(buf):
+            yield
+    finally:
+        sys.stdout.write(buf.getvalue())
+
+def build_signature_index(G: nx.DiGraph, email_data: Dict) -> Dict[str, List[int]]:
+    """
+    Map each patch signature to its patch node IDs, in graph node order.
+    Built once so per-signature lookups do not rescan every node.
+    """
+    sig_index = defaultdict(list)
+    for node_id in G.nodes():
+        email = email_data.get(node_id, {})
+        if email.get('patch_info'):
+            signature = get_email_patch_signature(email)
+            if signature:
+                sig_index[signature].append(node_id)
+    return sig_index
 
 def analyze_patch_merge_status(G: nx.DiGraph, email_data: Dict) -> Dict:
     """
@@ -26,14 +62,7 @@ def analyze_patch_merge_status(G: nx.DiGraph, email_data: Dict) -> Dict:
     patch_analysis = {}
     
     # group patches by signature
-    patch_groups = defaultdict(list)
-    for node_id in G.nodes():
-        email = email_data.get(node_id, {})
-        if email.get('patch_info'):
-            subject = email.get('subject', '')
-            signature = extract_patch_signature_improved(subject)
-            if signature:
-                patch_groups[signature].append(node_id)
+    patch_groups = build_signature_index(G, email_data)
     
     print(f"Analyzing {len(patch_groups)} patch families for merge status...")
     
@@ -166,6 +195,7 @@ def determine_status(probability: float) -> str:
     else:
         return "Likely Rejected"
 
+@_buffered_stdout()
 def generate_case_study_report(patch_analysis: Dict) -> None:
     """
     Generate a detailed case study report.
@@ -174,19 +204,15 @@ def generate_case_study_report(patch_analysis: Dict) -> None:
     print("PATCH MERGE STATUS CASE STUDY REPORT")
     print("="*60)
     
-    # Sort by merge probability
-    sorted_patches = sorted(
-        patch_analysis.items(), 
-        key=lambda x: x[1]['merge_probability'], 
-        reverse=True
-    )
+    # Top 15 by merge probability; only these are shown, so no full sort
+    top_patches = heapq.nlargest(15, patch_analysis.items(), key=_merge_probability)
     
-    print(f"\nAnalyzed {len(sorted_patches)} patch families:")
+    print(f"\nAnalyzed {len(patch_analysis)} patch families:")
     print("-" * 60)
     
     status_counts = defaultdict(int)
     
-    for signature, analysis in sorted_patches[:15]:  # Top 15
+    for signature, analysis in top_patches:
         status = analysis['status']
         status_counts[status] += 1
         
@@ -202,41 +228,35 @@ def generate_case_study_report(patch_analysis: Dict) -> None:
     print("SUMMARY STATISTICS")
     print("="*60)
     for status, count in status_counts.items():
-        percentage = (count / len(sorted_patches)) * 100
+        percentage = (count / len(patch_analysis)) * 100
         print(f"{status}: {count} patches ({percentage:.1f}%)")
 
 
-def verify_merge_indicators(patch_analysis: Dict, email_data: Dict, G: nx.DiGraph) -> None:
+@_buffered_stdout()
+def verify_merge_indicators(patch_analysis: Dict, email_data: Dict, G: nx.DiGraph, sig_index: Dict = None) -> None:
     """
     Verify merge indicators by showing actual email content that triggered the detection.
+    sig_index is the output of build_signature_index; it is built here if not given.
     """
+    if sig_index is None:
+        sig_index = build_signature_index(G, email_data)
     print("\n" + "="*70)
     print("MERGE INDICATOR VERIFICATION")
     print("="*70)
     
-    # Sort by merge probability and show top candidates
-    sorted_patches = sorted(
-        patch_analysis.items(), 
-        key=lambda x: x[1]['merge_probability'], 
-        reverse=True
-    )
+    # Show the top candidates by merge probability
+    top_patches = heapq.nlargest(5, patch_analysis.items(), key=_merge_probability)
     
     print("\nTop 5 patches with highest merge probability:")
     print("-" * 70)
     
-    for i, (signature, analysis) in enumerate(sorted_patches[:5]):
+    for i, (signature, analysis) in enumerate(top_patches):
         print(f"\n{i+1}. {signature[:60]}...")
         print(f"   Status: {analysis['status']} ({analysis['merge_probability']:.2%})")
         print(f"   Signals detected: {analysis['merge_signals']}")
         
         # Find the patch IDs for this signature
-        patch_ids = []
-        for node_id in G.nodes():
-            email = email_data.get(node_id, {})
-            if email.get('patch_info'):
-                node_signature = extract_patch_signature_improved(email.get('subject', ''))
-                if node_signature == signature:
-                    patch_ids.append(node_id)
+        patch_ids = sig_index.get(signature, [])
         
         # Show evidence from actual emails
         show_merge_evidence(patch_ids, email_data, G, limit=2)
@@ -316,14 +336,25 @@ def generate_merge_indicators_text_report(patch_analysis: Dict, email_data: Dict
     """
     Generate a text file report showing patches with merge indicators and their evidence.
     """
-    from datetime import datetime
-    
     # Sort by merge probability
-    sorted_patches = sorted(
-        patch_analysis.items(), 
-        key=lambda x: x[1]['merge_probability'], 
-        reverse=True
-    )
+    sorted_patches = sorted(patch_analysis.items(), key=_merge_probability, reverse=True)
+    
+    # one signature -> patch IDs index shared by all three sections
+    sig_index = build_signature_index(G, email_data)
+    
+    # split into probability tiers and count statuses in a single pass
+    high_prob_patches, med_prob_patches, low_prob_patches = [], [], []
+    status_counts = {}
+    for patch in sorted_patches:
+        probability = patch[1]['merge_probability']
+        if probability >= 0.7:
+            high_prob_patches.append(patch)
+        elif probability >= 0.3:
+            med_prob_patches.append(patch)
+        elif len(low_prob_patches) < 10:
+            low_prob_patches.append(patch)
+        status = patch[1]['status']
+        status_counts[status] = status_counts.get(status, 0) + 1
     
     with open(output_file, 'w', encoding='utf-8') as f:
         f.write("="*80 + "\n")
@@ -335,10 +366,9 @@ def generate_merge_indicators_text_report(patch_analysis: Dict, email_data: Dict
         # High probability patches
         f.write("HIGH PROBABILITY PATCHES (>= 70%)\n")
         f.write("-" * 50 + "\n")
-        high_prob_patches = [p for p in sorted_patches if p[1]['merge_probability'] >= 0.7]
         
         if high_prob_patches:
-            write_patch_section(f, high_prob_patches, email_data, G, limit=20)
+            write_patch_section(f, high_prob_patches, email_data, G, limit=20, sig_index=sig_index)
         else:
             f.write("No high probability patches found.\n")
         
@@ -347,10 +377,9 @@ def generate_merge_indicators_text_report(patch_analysis: Dict, email_data: Dict
         # Medium probability patches
         f.write("MEDIUM PROBABILITY PATCHES (30% - 70%)\n")
         f.write("-" * 50 + "\n")
-        med_prob_patches = [p for p in sorted_patches if 0.3 <= p[1]['merge_probability'] < 0.7]
         
         if med_prob_patches:
-            write_patch_section(f, med_prob_patches, email_data, G, limit=15)
+            write_patch_section(f, med_prob_patches, email_data, G, limit=15, sig_index=sig_index)
         else:
             f.write("No medium probability patches found.\n")
         
@@ -359,10 +388,9 @@ def generate_merge_indicators_text_report(patch_analysis: Dict, email_data: Dict
         # Low probability patches (just first few for reference)
         f.write("LOW PROBABILITY PATCHES (< 30%) - Sample\n")
         f.write("-" * 50 + "\n")
-        low_prob_patches = [p for p in sorted_patches if p[1]['merge_probability'] < 0.3][:10]
         
         if low_prob_patches:
-            write_patch_section(f, low_prob_patches, email_data, G, limit=10)
+            write_patch_section(f, low_prob_patches, email_data, G, limit=10, sig_index=sig_index)
         else:
             f.write("No low probability patches found.\n")
         
@@ -371,19 +399,16 @@ def generate_merge_indicators_text_report(patch_analysis: Dict, email_data: Dict
         f.write("SUMMARY STATISTICS\n")
         f.write("="*80 + "\n")
         
-        status_counts = {}
-        for _, analysis in sorted_patches:
-            status = analysis['status']
-            status_counts[status] = status_counts.get(status, 0) + 1
-        
         for status, count in status_counts.items():
             percentage = (count / len(sorted_patches)) * 100
             f.write(f"{status}: {count} patches ({percentage:.1f}%)\n")
     
     print(f"\n✅ Text report generated: {output_file}")
 
-def write_patch_section(f, patches, email_data, G, limit=20):
+def write_patch_section(f, patches, email_data, G, limit=20, sig_index=None):
     """Helper function to write a section of patches to the text file"""
+    if sig_index is None:
+        sig_index = build_signature_index(G, email_data)
     
     for i, (signature, analysis) in enumerate(patches[:limit]):
         f.write(f"\n{i+1}. PATCH: {signature}\n")
@@ -393,13 +418,7 @@ def write_patch_section(f, patches, email_data, G, limit=20):
         f.write(f"   Signals: {', '.join(analysis['merge_signals'][:10])}\n")
         
         # Find the patch IDs for this signature
-        patch_ids = []
-        for node_id in G.nodes():
-            email = email_data.get(node_id, {})
-            if email.get('patch_info'):
-                node_signature = extract_patch_signature_improved(email.get('subject', ''))
-                if node_signature == signature:
-                    patch_ids.append(node_id)
+        patch_ids = sig_index.get(signature, [])
         
         # Show evidence
         f.write(f"   EVIDENCE:\n")
@@ -1,12 +1,70 @@
+import asyncio
+import importlib.util
+import json
 import re
+import sqlite3
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict
-from ..core.data_access import get_connection, get_git_pull_emails
+from ..core.data_access import get_connection, get_git_pull_emails, ensure_mails_fts, fts5_phrase
 from ..core.email_parser import parse_email_content
 import requests
-from ..core.utils import get_best_email_body
+from requests.adapters import HTTPAdapter
+from ..core.utils import get_plaintext_body
+
+try:
+    import httpx  # async client for concurrent GitHub commit lookups
+    HTTPX_AVAILABLE = True
+except ImportError:
+    HTTPX_AVAILABLE = False
+
+# h2 lets httpx multiplex requests over HTTP/2; httpx imports it itself when enabled
+H2_AVAILABLE = importlib.util.find_spec("h2") is not None
 
 GIT_PULL_EMAILS = 6021
 
+# GitHub commit lookups are cached here; a commit never changes once published
+GITHUB_COMMIT_CACHE_DB = "github_commit_cache.db"
+_commit_cache_conn = None
+_commit_cache_lock = threading.Lock()
+
+# commit lookups are network-bound, so several run in flight at once
+GITHUB_FETCH_WORKERS = 8
+# requests in flight, and connections, for the async httpx client
+GITHUB_ASYNC_CONNECTIONS = 16
+
+# one HTTP session so GitHub requests reuse the keep-alive connections;
+# the pool is sized above GITHUB_FETCH_WORKERS so threads never wait on a socket
+_github_session = requests.Session()
+_github_session.mount("https://", HTTPAdapter(pool_connections=16, pool_maxsize=16))
+_github_session.headers["Accept"] = "application/vnd.github+json"
+
+# compiled once at import; these run for every line / subject processed
+_AUTHOR_RE = re.compile(r'^(.+?)\s*\((\d+)\):\s*$')
+_INDENT_RE = re.compile(r'^\s{4,}')
+_PATCH_PREFIX = re.compile(r'\[patch[^\]]*\]\s*')
+_SHA_RE = re.compile(r'\b[0-9a-f]{40}\b', re.IGNORECASE)
+
+
+def _normalize_subject(subject: str) -> str:
+    """
+    Normalize a patch subject for matching: lowercased, without a leading
+    "Re:" or any "[PATCH ...]" tag.
+    """
+    subject = subject.strip().lower()
+    if subject.startswith('re:'):
+        subject = subject[3:].lstrip()
+    if '[patch' in subject:
+        # common case is one leading tag; cut it with str methods, else use the regex
+        if subject.startswith('[patch') and subject.find('[patch', 1) == -1:
+            end = subject.find(']')
+            if end != -1:
+                subject = subject[end + 1:]
+        else:
+            subject = _PATCH_PREFIX.sub('', subject)
+    return subject.strip()
+
 
 def extract_commit_authors_and_subjects(body: str) -> List[Dict]:
     """
@@ -19,7 +77,7 @@ def extract_commit_authors_and_subjects(body: str) -> List[Dict]:
     while i < len(lines):
         line = lines[i].rstrip()
         # Match author line: Name (N):
-        author_match = re.match(r'^(.+?)\s*\((\d+)\):\s*$', line)
+        author_match = _AUTHOR_RE.match(line)
         if author_match:
             author = author_match.group(1).strip()
             expected_count = int(author_match.group(2))
@@ -29,7 +87,7 @@ def extract_commit_authors_and_subjects(body: str) -> List[Dict]:
             while j < len(lines):
                 commit_line = lines[j]
                 # commit lines are indented (at least 4 spaces, often 6)
-                if re.match(r'^\s{4,}', commit_line):
+                if _INDENT_RE.match(commit_line):
                     commit_subject = commit_line.strip()
                     if commit_subject:
                         commits.append({
@@ -55,14 +113,16 @@ def organize_git_pull_patches(limit: int = 100):
     pulls = get_git_pull_emails(limit)
     organized = {}
     for email_id, title, url, html_content, pull_type in pulls:
-        parsed = parse_email_content(html_content)
-        body = parsed.get('message_body', '')
+        parsed = parse_email_content(html_content or "")
+        body = parsed.get('message_body') or ''
 
 
         # If the body is a single long line, try extracting plain text from HTML
         if body.count('\n') < 5 or len(body.splitlines()) <= 1:
             print("Body looks flat, extracting plain text from HTML...")
-            body = get_best_email_body(html_content)
+            # a fresh lxml parse is several times cheaper than walking the BeautifulSoup
+            # tree parse_email_content built, so the page is not shared between the two
+            body = get_plaintext_body(html_content or "")
 
 
         # print(f"Email {email_id} body length: {len(body)}")
@@ -76,6 +136,7 @@ def organize_git_pull_patches(limit: int = 100):
         organized[email_id] = {
             'title': title,
             'patches': patch_subjects,
+            'norm_patches': [_normalize_subject(subject) for subject in patch_subjects],
             'body': body
         }
     return organized
@@ -88,16 +149,10 @@ def build_patch_look_up(patch_emails):
     Build a lookup dictionary for patches by email ID.
     """
 
-    lookup = {}
+    lookup = defaultdict(list)
     for email_id, title, url, html_content in patch_emails:
-        subject = title.strip().lower()
-        subject = re.sub(r'^re:\s*', '', subject)
-        subject = re.sub(r'\[patch[^\]]*\]\s*', '', subject)
-        subject = subject.strip()
-        if subject not in lookup:
-            lookup[subject] = []
-        lookup[subject].append(email_id)
-    return lookup
+        lookup[_normalize_subject(title)].append(email_id)
+    return dict(lookup)
 
 
 def link_git_pull_patches_to_threads(organized_git_pulls, patch_subject_lookup):
@@ -108,11 +163,8 @@ def link_git_pull_patches_to_threads(organized_git_pulls, patch_subject_lookup):
     linked = {}
     for email_id, info in organized_git_pulls.items():
         patch_links = []
-        for patch_subject in info['patches']:
-            norm_patch = patch_subject.strip().lower()
-            norm_patch = re.sub(r'^re:\s*', '', norm_patch)
-            norm_patch = re.sub(r'\[patch[^\]]*\]\s*', '', norm_patch)
-            norm_patch = norm_patch.strip()
+        norm_patches = info.get('norm_patches') or [_normalize_subject(p) for p in info['patches']]
+        for patch_subject, norm_patch in zip(info['patches'], norm_patches):
             email_ids = patch_subject_lookup.get(norm_patch, [])
             patch_links.append((patch_subject, email_ids))
         linked[email_id] = {
@@ -126,13 +178,48 @@ def link_git_pull_patches_to_threads_sql(organized_git_pulls):
     For each GIT PULL email, link its patch subjects to patch email IDs using SQL.
     Returns a dict: {git_pull_id: {'title': ..., 'patch_links': [(patch_subject, [email_ids])]}}
     """
-    linked = {}
     conn = get_connection()
+    ensure_mails_fts(conn)
+    cursor = conn.cursor()
+
+    # every patch subject becomes a row of a temp table so one FTS join
+    # matches them all; needle_id remembers where each result belongs
+    needles = []
+    short_needles = []
+    for email_id, info in organized_git_pulls.items():
+        norm_patches = info.get('norm_patches') or [_normalize_subject(p) for p in info['patches']]
+        for norm_patch in norm_patches:
+            # the trigram index cannot match fewer than 3 characters, those use LIKE
+            if len(norm_patch) < 3:
+                short_needles.append((len(needles), norm_patch))
+            needles.append((len(needles), norm_patch, fts5_phrase(norm_patch)))
+
+    cursor.execute("DROP TABLE IF EXISTS temp.patch_needles")
+    cursor.execute("CREATE TEMP TABLE patch_needles (needle_id INTEGER PRIMARY KEY, norm TEXT, phrase TEXT)")
+    cursor.executemany("INSERT INTO patch_needles (needle_id, norm, phrase) VALUES (?, ?, ?)", needles)
+
+    matches = defaultdict(list)
+    cursor.execute("""
+        SELECT n.needle_id, m.id
+        FROM patch_needles n
+        JOIN mails_fts f ON f.mails_fts MATCH n.phrase
+        JOIN mails m ON m.id = f.rowid
+        WHERE length(n.norm) >= 3
+        ORDER BY n.needle_id, m.id
+    """)
+    for needle_id, mail_id in cursor:
+        matches[needle_id].append(mail_id)
+    for needle_id, norm_patch in short_needles:
+        matches[needle_id] = find_patch_email_ids_by_subject(conn, norm_patch, norm_patch)
+    cursor.execute("DROP TABLE temp.patch_needles")
+
+    linked = {}
+    needle_id = 0
     for email_id, info in organized_git_pulls.items():
         patch_links = []
         for patch_subject in info['patches']:
-            email_ids = find_patch_email_ids_by_subject(conn, patch_subject)
-            patch_links.append((patch_subject, email_ids))
+            patch_links.append((patch_subject, matches.get(needle_id, [])))
+            needle_id += 1
         linked[email_id] = {
             'title': info['title'],
             'patch_links': patch_links
@@ -141,21 +228,21 @@ def link_git_pull_patches_to_threads_sql(organized_git_pulls):
     return linked
 
 
-def find_patch_email_ids_by_subject(conn, patch_subject):
+def find_patch_email_ids_by_subject(conn, patch_subject, norm_subject=None):
     """
     Find patch email IDs where the title matches the given patch subject (case-insensitive).
+    Pass norm_subject when the normalized form is already known.
     Returns a list of email IDs.
     """
     # Normalize subject for matching
-    norm_subject = patch_subject.strip().lower()
-    norm_subject = re.sub(r'^re:\s*', '', norm_subject)
-    norm_subject = re.sub(r'\[patch[^\]]*\]\s*', '', norm_subject)
-    norm_subject = norm_subject.strip()
+    if norm_subject is None:
+        norm_subject = _normalize_subject(patch_subject)
 
     cursor = conn.cursor()
+    # LIKE already ignores ASCII case, so no LOWER(title) per row
     cursor.execute("""
         SELECT id FROM mails
-        WHERE LOWER(title) LIKE ?
+        WHERE title LIKE ?
     """, (f"%{norm_subject}%",))
     results = [row[0] for row in cursor.fetchall()]
     return results
@@ -169,22 +256,80 @@ def extract_commit_hashes(body: str) -> List[str]:
     if not body:
         print("Empty body, no commit hashes to extract.")
         return []
-    return re.findall(r'\b[0-9a-f]{40}\b', body, re.IGNORECASE)
+    return _SHA_RE.findall(body)
 
 
 
 def find_patch_emails_by_commit_hash(conn, commit_hash: str) -> List[int]:
     """
     Find patch email IDs where the commit hash appears in the title or body.
+    The title lookup goes through mails_fts, so call ensure_mails_fts(conn)
+    once on the connection before the first lookup.
     """
     cursor = conn.cursor()
     cursor.execute("""
-        SELECT id FROM mails
-        WHERE html_content LIKE ? OR title LIKE ?
-    """, (f"%{commit_hash}%", f"%{commit_hash}%"))
+        SELECT id FROM mails WHERE html_content LIKE ?
+        UNION
+        SELECT rowid FROM mails_fts WHERE mails_fts MATCH ?
+    """, (f"%{commit_hash}%", fts5_phrase(commit_hash)))
     return [row[0] for row in cursor.fetchall()]
 
 
+def _get_commit_cache() -> sqlite3.Connection:
+    """
+    Return the connection to the GitHub commit cache, creating the table on first use.
+    Callers hold _commit_cache_lock while using it.
+    """
+    global _commit_cache_conn
+    if _commit_cache_conn is None:
+        conn = sqlite3.connect(GITHUB_COMMIT_CACHE_DB, check_same_thread=False)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS commit_cache (
+                repo TEXT NOT NULL,
+                sha TEXT NOT NULL,
+                json TEXT NOT NULL,
+                fetched_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (repo, sha)
+            )
+        """)
+        conn.commit()
+        _commit_cache_conn = conn
+    return _commit_cache_conn
+
+
+def _cached_commit_info(repo: str, commit_hash: str):
+    """Return the cached commit info for a hash, or None if it was never fetched."""
+    with _commit_cache_lock:
+        row = _get_commit_cache().execute(
+            "SELECT json FROM commit_cache WHERE repo = ? AND sha = ?", (repo, commit_hash.lower())
+        ).fetchone()
+    return json.loads(row[0]) if row else None
+
+
+def _store_commit_info(repo: str, commit_hash: str, commit_info: dict) -> None:
+    with _commit_cache_lock:
+        cache = _get_commit_cache()
+        cache.execute(
+            "INSERT OR REPLACE INTO commit_cache (repo, sha, json, fetched_at) VALUES (?, ?, ?, CURRENT_TIMESTAMP)",
+            (repo, commit_hash.lower(), json.dumps(commit_info))
+        )
+        cache.commit()
+
+
+def _commit_info_from_json(data: dict) -> dict:
+    """Keep the fields of a GitHub commit API response that the reports use."""
+    return {
+        "sha": data["sha"],
+        "subject": data["commit"]["message"].splitlines()[0],
+        "full_message": data["commit"]["message"],
+        "author": data["commit"]["author"]["name"],
+        "date": data["commit"]["author"]["date"],
+        "files": [f["filename"] for f in data.get("files", [])],
+        "diff": "\n\n".join(f.get("patch", "") for f in data.get("files", []) if "patch" in f),
+        "url": data["html_url"]
+    }
+
+
 def get_github_commit_info(repo: str, commit_hash: str, github_token: str = None) -> dict:
     """
     Fetch commit info from GitHub for a given repo and commit hash.
@@ -194,33 +339,93 @@ def get_github_commit_info(repo: str, commit_hash: str, github_token: str = None
 
     Returns a dict with commit info, or None if not found.
     """
+    commit_info = _cached_commit_info(repo, commit_hash)
+    if commit_info:
+        return commit_info
+
     url = f"https://api.github.com/repos/{repo}/commits/{commit_hash}"
     headers = {}
     if github_token:
         headers["Authorization"] = f"token {github_token}"
-    resp = requests.get(url, headers=headers)
+    resp = _github_session.get(url, headers=headers)
     if resp.status_code == 200:
-        data = resp.json()
-        return {
-            "sha": data["sha"],
-            "subject": data["commit"]["message"].splitlines()[0],
-            "full_message": data["commit"]["message"],
-            "author": data["commit"]["author"]["name"],
-            "date": data["commit"]["author"]["date"],
-            "files": [f["filename"] for f in data.get("files", [])],
-            "diff": "\n\n".join(f.get("patch", "") for f in data.get("files", []) if "patch" in f),
-            "url": data["html_url"]
-        }
+        commit_info = _commit_info_from_json(resp.json())
+        _store_commit_info(repo, commit_hash, commit_info)
+        return commit_info
     else:
         print(f"Commit {commit_hash} not found in {repo} (status {resp.status_code})")
         return None
 
 
+async def _fetch_github_commits_async(repo: str, commit_hashes: List[str], github_token: str = None) -> Dict[str, dict]:
+    """
+    Fetch uncached commits over one httpx client. With h2 installed the
+    requests are multiplexed over a single HTTP/2 connection.
+    """
+    headers = {"Accept": "application/vnd.github+json"}
+    if github_token:
+        headers["Authorization"] = f"token {github_token}"
+
+    # without HTTP/2, requests beyond the connection limit would queue in the pool
+    # and hit its timeout, so only as many as there are connections are in flight
+    semaphore = asyncio.Semaphore(GITHUB_ASYNC_CONNECTIONS)
+
+    async def fetch_commit(client, commit_hash):
+        try:
+            async with semaphore:
+                resp = await client.get(f"/repos/{repo}/commits/{commit_hash}")
+        except httpx.HTTPError as e:
+            # one failed lookup must not abort the others
+            print(f"Error fetching commit {commit_hash} from {repo}: {e}")
+            return None
+        if resp.status_code != 200:
+            print(f"Commit {commit_hash} not found in {repo} (status {resp.status_code})")
+            return None
+        return _commit_info_from_json(resp.json())
+
+    async with httpx.AsyncClient(
+        base_url="https://api.github.com",
+        http2=H2_AVAILABLE,
+        headers=headers,
+        limits=httpx.Limits(max_connections=GITHUB_ASYNC_CONNECTIONS),
+    ) as client:
+        infos = await asyncio.gather(*(fetch_commit(client, h) for h in commit_hashes))
+    return dict(zip(commit_hashes, infos))
+
+
+def fetch_github_commits(repo: str, commit_hashes: List[str], github_token: str = None,
+                         max_workers: int = GITHUB_FETCH_WORKERS) -> List[tuple]:
+    """
+    Fetch commit info for several hashes concurrently.
+    Uses httpx with asyncio when it is installed, otherwise a thread pool over
+    the shared requests session. Cached commits are never re-fetched.
+    Returns (commit_hash, commit_info) pairs in the same order as commit_hashes;
+    commit_info is None for hashes GitHub could not resolve.
+    """
+    if not commit_hashes:
+        return []
+    if not HTTPX_AVAILABLE:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(
+                lambda h: (h, get_github_commit_info(repo, h, github_token)), commit_hashes
+            ))
+
+    commit_map = {h: _cached_commit_info(repo, h) for h in commit_hashes}
+    missing = list(dict.fromkeys(h for h, info in commit_map.items() if info is None))
+    if missing:
+        fetched = asyncio.run(_fetch_github_commits_async(repo, missing, github_token))
+        for commit_hash, commit_info in fetched.items():
+            if commit_info:
+                _store_commit_info(repo, commit_hash, commit_info)
+                commit_map[commit_hash] = commit_info
+    return [(h, commit_map[h]) for h in commit_hashes]
+
 
 if __name__ == "__main__":
     organized = organize_git_pull_patches(limit=30) # adjust limit as needed, 30 is just for testing
     conn = get_connection()
 
+    # ensure_mails_fts(conn)
     # for pull_id, info in organized.items():
     #     # html_content = info.get('html_content', '')
     #     # body = get_best_email_body(html_content)
@@ -295,41 +500,50 @@ if __name__ == "__main__":
                 report_by_email[pull_id]["unmatched"].append(patch_subject)
 
     # Write report
-    with open("patch_report.txt", "w", encoding="utf-8") as f:
+    # each pull's block is joined and written in one call
+    with open("patch_report.txt", "w", encoding="utf-8", buffering=1 << 20) as f:
         for pull_id, entry in report_by_email.items():
-            f.write(f"GIT PULL Email {pull_id}: {entry['title']}\n")
+            parts = [f"GIT PULL Email {pull_id}: {entry['title']}\n"]
             if entry["matched"]:
-                f.write("  Matched patches:\n")
-                for patch, ids in entry["matched"]:
-                    f.write(f"    {patch} --> Patch Email IDs: {ids}\n")
+                parts.append("  Matched patches:\n")
+                parts.extend(f"    {patch} --> Patch Email IDs: {ids}\n" for patch, ids in entry["matched"])
             if entry["unmatched"]:
-                f.write("  Unmatched patches:\n")
-                for patch in entry["unmatched"]:
-                    f.write(f"    {patch}\n")
-            f.write("\n")
+                parts.append("  Unmatched patches:\n")
+                parts.extend(f"    {patch}\n" for patch in entry["unmatched"])
+            parts.append("\n")
+            f.write("".join(parts))
 
 
     # For each GIT PULL email, try to fetch commit info for unmatched patches
     repo = "torvalds/linux"
     github_token = None
     
-    with open("unmatched_patch_commits.txt", "w", encoding="utf-8") as commit_log:
-        for pull_id, entry in report_by_email.items():
-            if entry["unmatched"]:
-                commit_log.write(f"GIT PULL Email {pull_id}: {entry['title']}\n")
-                body = organized[pull_id]['body']
-                commit_hashes = extract_commit_hashes(body)
-                for commit_hash in commit_hashes:
-                    commit_info = get_github_commit_info(repo, commit_hash, github_token)
-                    if commit_info:
-                        commit_log.write(f"  Commit info for hash {commit_hash}:\n")
-                        commit_log.write(f"    Subject: {commit_info['subject']}\n")
-                        commit_log.write(f"    Author: {commit_info['author']}\n")
-                        commit_log.write(f"    Date: {commit_info['date']}\n")
-                        commit_log.write(f"    URL: {commit_info['url']}\n")
-                        commit_log.write(f"    Files: {commit_info['files']}\n")
-                        commit_log.write(f"    Message:\n{commit_info['full_message']}\n\n")
-                commit_log.write("\n")
+    # collect every hash first so the GitHub requests can run concurrently
+    pull_hashes = [
+        (pull_id, extract_commit_hashes(organized[pull_id]['body']))
+        for pull_id, entry in report_by_email.items() if entry["unmatched"]
+    ]
+    # the same commit is often listed by several pulls; fetch each hash once
+    unique_hashes = list(dict.fromkeys(h for _, hashes in pull_hashes for h in hashes))
+    commit_map = dict(fetch_github_commits(repo, unique_hashes, github_token))
+
+    with open("unmatched_patch_commits.txt", "w", encoding="utf-8", buffering=1 << 20) as commit_log:
+        for pull_id, commit_hashes in pull_hashes:
+            parts = [f"GIT PULL Email {pull_id}: {report_by_email[pull_id]['title']}\n"]
+            for commit_hash in commit_hashes:
+                commit_info = commit_map.get(commit_hash)
+                if commit_info:
+                    parts.append(
+                        f"  Commit info for hash {commit_hash}:\n"
+                        f"    Subject: {commit_info['subject']}\n"
+                        f"    Author: {commit_info['author']}\n"
+                        f"    Date: {commit_info['date']}\n"
+                        f"    URL: {commit_info['url']}\n"
+                        f"    Files: {commit_info['files']}\n"
+                        f"    Message:\n{commit_info['full_message']}\n\n"
+                    )
+            parts.append("\n")
+            commit_log.write("".join(parts))
 
 
 
@@ -8,7 +8,7 @@ preserving conversation relationships across batches.
 from typing import Dict, List, Tuple
 import networkx as nx
 
-from core.data_access import get_complete_thread_batches
+from core.data_access import get_thread_batch_ids, load_email_batch
 from core.graph_builder import create_evolution_graph2
 
 try:
@@ -51,8 +51,8 @@ class BatchProcessor:
         print(f"=== THREAD-AWARE BATCH PROCESSING ===")
         print(f"Target batch size: {batch_size} emails")
         
-        # Get all emails grouped by complete threads
-        batches = get_complete_thread_batches(batch_size=batch_size)
+        # Plan batches of complete threads; bodies are loaded one batch at a time
+        batches = get_thread_batch_ids(batch_size=batch_size)
         
         stats = {
             "total_batches": len(batches),
@@ -65,8 +65,9 @@ class BatchProcessor:
         
         print(f"Processing {len(batches)} thread-aware batches...")
         
-        for batch_num, batch_emails in enumerate(batches):
+        for batch_num, batch_ids in enumerate(batches):
             print(f"\n--- Processing Batch {batch_num + 1}/{len(batches)} ---")
+            batch_emails = load_email_batch(batch_ids)
             print(f"Emails in batch: {len(batch_emails)}")
             
             try:
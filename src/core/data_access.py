@@ -5,30 +5,72 @@ This module provides functions to connect to and query the SQLite database
 containing LKML emails.
 """
 
+import os
 import sqlite3
 import re
-from typing import List, Tuple
+import threading
+from functools import lru_cache
+from typing import Iterator, List, Tuple
 from collections import defaultdict
 
 # database file path
 DATABASE_FILE = "lkml-data-2024.db"
 SUSPECTED_CVE_DATABASE_FILE = "suspected_cve_patches.db"
 
+# precomputed title classification stored in mails.msg_class
+MSG_CLASS_OTHER = 0
+MSG_CLASS_PATCH = 1
+MSG_CLASS_PATCH_REPLY = 2
+MSG_CLASS_GIT_PULL = 3
+
+_MSG_CLASS_CASE = f"""
+    CASE
+        WHEN title LIKE '%[PATCH%' AND title LIKE 'Re:%' THEN {MSG_CLASS_PATCH_REPLY}
+        WHEN title LIKE '%[PATCH%' THEN {MSG_CLASS_PATCH}
+        WHEN title LIKE '%[GIT PULL]%' THEN {MSG_CLASS_GIT_PULL}
+        ELSE {MSG_CLASS_OTHER}
+    END
+"""
+
+_msg_class_ready = False
+
+_thread_local = threading.local()
+
+# cached reporting queries, keyed by (name, database modification time)
+_stats_cache = {}
+_CONNECTION_PRAGMAS = (
+    "journal_mode=WAL",
+    "synchronous=NORMAL",
+    "busy_timeout=5000",
+    "cache_size=-262144",
+    "mmap_size=1073741824",
+    "temp_store=MEMORY",
+)
+
+# thread signature patterns, matched case-insensitively instead of lowering the title first
+_THREAD_REPLY_RE = re.compile(r'^re:\s*', re.IGNORECASE)
+_THREAD_FWD_RE = re.compile(r'^fwd:\s*', re.IGNORECASE)
+_THREAD_PATCH_RE = re.compile(r'\[patch[^\]]*\]\s*(.+?)(?:\s*$)', re.IGNORECASE)
+_THREAD_VERSION_RE = re.compile(r'\s+v\d+\s*', re.IGNORECASE)
+
 
 
 
-def get_patch_emails_by_ids(email_ids: list, limit: int = 10000) -> list:
+def get_patch_emails_by_ids(email_ids: list, limit: int = 10000, conn: sqlite3.Connection = None) -> list:
     """
     Get patch-related emails for a specific list of email IDs from the database.
     Args:
         email_ids: List of email IDs to retrieve
-        db_path: Path to the SQLite database
+        limit: Maximum number of emails to return
+        conn: Open connection to the LKML database to reuse; a new one is opened (and closed) if omitted
     Returns:
         List of tuples containing (id, title, url, html_content)
     """
     if not email_ids:
         return []
-    conn = sqlite3.connect(DATABASE_FILE)
+    own_conn = conn is None
+    if own_conn:
+        conn = sqlite3.connect(DATABASE_FILE)
     cursor = conn.cursor()
     placeholders = ",".join("?" for _ in email_ids)
     query = f"""
@@ -39,7 +81,8 @@ def get_patch_emails_by_ids(email_ids: list, limit: int = 10000) -> list:
     """
     cursor.execute(query, email_ids + [limit])
     emails = cursor.fetchall()
-    conn.close()
+    if own_conn:
+        conn.close()
     return emails
 
 
@@ -84,6 +127,30 @@ def get_cve_ids_by_category(category: str, db_path: str = SUSPECTED_CVE_DATABASE
             conn.close()
 
 
+def get_uncategorized_cve_ids(after: str = None, db_path: str = SUSPECTED_CVE_DATABASE_FILE) -> list:
+    """
+    Get the CVE IDs that have no category yet, optionally only those sorting after `after`.
+    Lets an interrupted categorization run resume without rescanning finished CVEs.
+    """
+    try:
+        conn = sqlite3.connect(db_path)
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT DISTINCT match_cve_id
+            FROM suspected_cve_patches
+            WHERE category IS NULL AND (? IS NULL OR match_cve_id > ?)
+            ORDER BY match_cve_id
+        """, (after, after))
+        ids = [row[0] for row in cursor.fetchall()]
+        return ids
+    except sqlite3.Error as e:
+        print(f"Error retrieving uncategorized CVE IDs: {e}")
+        return []
+    finally:
+        if conn:
+            conn.close()
+
+
 def get_patches_for_cve(cve_id: str, db_path: str = SUSPECTED_CVE_DATABASE_FILE) -> list:
     """
     Get all patch records for a specific CVE ID from the suspected_cve_patches table.
@@ -113,14 +180,136 @@ def get_patches_for_cve(cve_id: str, db_path: str = SUSPECTED_CVE_DATABASE_FILE)
             conn.close()
 
 
+class _SharedConnection(sqlite3.Connection):
+    """
+    Per-thread connection reused across helpers. close() only discards any
+    uncommitted work, like a real close would, and keeps the connection open.
+    """
+    def close(self):
+        self.rollback()
+
+
 def get_connection():
     """
     Get a connection to the SQLite database.
     
+    The connection is opened once per thread with WAL journaling and a large
+    page cache, so helpers don't pay connection setup and a cold cache on
+    every call.
+    
     Returns:
         SQLite connection object
 """
-    return sqlite3.connect(DATABASE_FILE)
+    conn = getattr(_thread_local, 'conn', None)
+    if conn is None:
+        conn = sqlite3.connect(DATABASE_FILE, check_same_thread=False, factory=_SharedConnection)
+        for pragma in _CONNECTION_PRAGMAS:
+            conn.execute(f"PRAGMA {pragma}")
+        _thread_local.conn = conn
+    return conn
+
+
+def _db_mtime(db_path: str) -> float:
+    """
+    Last modification time of a database, including its WAL file, used to
+    invalidate cached statistics after writes.
+    """
+    mtimes = [os.path.getmtime(path) for path in (db_path, db_path + '-wal') if os.path.exists(path)]
+    return max(mtimes, default=0.0)
+
+
+def ensure_msg_class_column(conn) -> None:
+    """
+    Make sure mails has an indexed msg_class column so patch queries can use
+    an index lookup instead of a leading-wildcard LIKE scan over every title.
+
+    The column is added and classified once; later calls only classify rows
+    inserted since (msg_class IS NULL), which the index makes cheap.
+    
+    Args:
+        conn: Open connection to the LKML database
+    """
+    global _msg_class_ready
+    if _msg_class_ready:
+        return
+    cursor = conn.cursor()
+    cursor.execute("PRAGMA table_info(mails)")
+    columns = [row[1] for row in cursor.fetchall()]
+    if 'msg_class' not in columns:
+        print("Adding msg_class column to mails (one-time migration)...")
+        cursor.execute("ALTER TABLE mails ADD COLUMN msg_class INTEGER")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_mails_msgclass ON mails(msg_class)")
+    cursor.execute(f"UPDATE mails SET msg_class = {_MSG_CLASS_CASE} WHERE msg_class IS NULL")
+    conn.commit()
+    _msg_class_ready = True
+
+def ensure_mails_fts(conn) -> None:
+    """
+    Make sure the mails_fts full-text index over mails.title exists and is
+    kept in sync, so substring title searches become index lookups instead of
+    a LIKE '%...%' scan of every row.
+
+    The trigram tokenizer matches any substring of three or more characters,
+    case-insensitively, which keeps the old LOWER(title) LIKE semantics. The
+    index is an external-content table over mails, filled once when created
+    and maintained by triggers afterwards.
+    
+    Args:
+        conn: Open connection to the LKML database
+    """
+    cursor = conn.cursor()
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'mails_fts'")
+    if cursor.fetchone() is None:
+        print("Building mails_fts title index (one-time migration)...")
+        cursor.execute("""
+            CREATE VIRTUAL TABLE mails_fts USING fts5(
+                title, content='mails', content_rowid='id', tokenize='trigram'
+            )
+        """)
+        cursor.execute("INSERT INTO mails_fts(mails_fts) VALUES ('rebuild')")
+    cursor.executescript("""
+        CREATE TRIGGER IF NOT EXISTS mails_fts_ai AFTER INSERT ON mails BEGIN
+            INSERT INTO mails_fts(rowid, title) VALUES (new.id, new.title);
+        END;
+        CREATE TRIGGER IF NOT EXISTS mails_fts_ad AFTER DELETE ON mails BEGIN
+            INSERT INTO mails_fts(mails_fts, rowid, title) VALUES ('delete', old.id, old.title);
+        END;
+        CREATE TRIGGER IF NOT EXISTS mails_fts_au AFTER UPDATE OF title ON mails BEGIN
+            INSERT INTO mails_fts(mails_fts, rowid, title) VALUES ('delete', old.id, old.title);
+            INSERT INTO mails_fts(rowid, title) VALUES (new.id, new.title);
+        END;
+    """)
+    conn.commit()
+
+
+def fts5_phrase(text: str) -> str:
+    """
+    Quote text as a single FTS5 phrase so it is matched literally.
+    """
+    return '"' + text.replace('"', '""') + '"'
+
+
+def title_contains_clause(conn, keyword: str) -> Tuple[str, tuple]:
+    """
+    Build a WHERE condition on mails matching titles that contain keyword,
+    case-insensitively, as an id lookup in the mails_fts trigram index
+    instead of a LOWER(title) LIKE scan of every row.
+
+    Keywords shorter than three characters cannot be matched by the trigram
+    index and fall back to a plain LIKE, which already ignores ASCII case.
+
+    Args:
+        conn: Open connection to the LKML database
+        keyword: Substring to look for in mails.title
+
+    Returns:
+        (sql condition, parameters) to splice into a query on mails
+    """
+    if len(keyword) < 3:
+        return "title LIKE ?", (f"%{keyword}%",)
+    ensure_mails_fts(conn)
+    return "id IN (SELECT rowid FROM mails_fts WHERE mails_fts MATCH ?)", (fts5_phrase(keyword),)
+
 
 def get_suspected_cve_patches(limit: int = 1000, db_path: str = SUSPECTED_CVE_DATABASE_FILE) -> list:
     """
@@ -189,12 +378,41 @@ def explore_database():
         List of tuples containing (id, title, url, html_content)
 """
 def get_sample_emails(limit: int = 10) -> List[Tuple]:
+    return [tuple(row) for row in iter_sample_emails(limit)]
+
+
+def iter_sample_emails(limit: int = 10) -> Iterator[sqlite3.Row]:
+    """
+    Stream a sample of emails row by row instead of materializing the result.
+    Returns:
+        Iterator of sqlite3.Row with id, title, url and html_content
+    """
+    cursor = get_connection().cursor()
+    cursor.row_factory = sqlite3.Row
+    cursor.execute("SELECT id, title, url, html_content FROM mails LIMIT ?", (limit,))
+    yield from cursor
+
+
+def iter_patch_emails(limit: int = -1, offset: int = 0) -> Iterator[sqlite3.Row]:
+    """
+    Stream patch-related emails row by row, in id order.
+    Args:
+        limit: Maximum number of emails to retrieve, -1 for all
+        offset: Number of emails to skip (for pagination)
+    Returns:
+        Iterator of sqlite3.Row with id, title, url and html_content
+    """
     conn = get_connection()
+    ensure_msg_class_column(conn)
     cursor = conn.cursor()
-    cursor.execute("SELECT id, title, url, html_content FROM mails LIMIT ?", (limit,))
-    emails = cursor.fetchall()
-    conn.close()
-    return emails
+    cursor.row_factory = sqlite3.Row
+    cursor.execute("""
+        SELECT id, title, url, html_content FROM mails 
+        WHERE msg_class IN (?, ?)
+        ORDER BY id
+        LIMIT ? OFFSET ?
+    """, (MSG_CLASS_PATCH, MSG_CLASS_PATCH_REPLY, limit, offset))
+    yield from cursor
 
 """
     Get patch-related emails from the database.
@@ -207,20 +425,7 @@ def get_sample_emails(limit: int = 10) -> List[Tuple]:
         List of tuples containing (id, title, url, html_content)
 """
 def get_patch_emails(limit: int = 1000) -> List[Tuple]:
-    conn = get_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute("""
-        SELECT id, title, url, html_content FROM mails 
-        WHERE title LIKE '%[PATCH%' OR title LIKE '%Re:%[PATCH%'
-        ORDER BY id
-        LIMIT ?
-    """, (limit,))
-    
-    emails = cursor.fetchall()
-    
-    conn.close()
-    return emails
+    return [tuple(row) for row in iter_patch_emails(limit)]
 
 
 def get_all_patch_emails() -> list:
@@ -229,16 +434,7 @@ def get_all_patch_emails() -> list:
     Returns:
         List of tuples containing (id, title, url, html_content)
     """
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT id, title, url, html_content FROM mails 
-        WHERE title LIKE '%[PATCH%' OR title LIKE '%Re:%[PATCH%'
-        ORDER BY id
-    """)
-    emails = cursor.fetchall()
-    conn.close()
-    return emails
+    return [tuple(row) for row in iter_patch_emails()]
 
 
 
@@ -254,70 +450,96 @@ def get_all_patch_emails() -> list:
         List of tuples containing (id, title, url, html_content)
 """
 def get_patch_emails2(limit: int = 1000, offset: int = 0) -> List[Tuple]:
+    return [tuple(row) for row in iter_patch_emails(limit, offset)]
+
+def get_patch_email_headers(limit: int = 1000) -> List[Tuple]:
+    """
+    Get patch-related email headers without the html_content column.
+    Use for grouping and statistics work that only needs titles, then load
+    bodies with get_email_bodies for the ids that need them.
+    Args:
+        limit: Maximum number of emails to retrieve
+    Returns:
+        List of tuples containing (id, title, url)
+    """
     conn = get_connection()
+    ensure_msg_class_column(conn)
     cursor = conn.cursor()
-    
     cursor.execute("""
-        SELECT id, title, url, html_content FROM mails 
-        WHERE title LIKE '%[PATCH%' OR title LIKE '%Re:%[PATCH%'
+        SELECT id, title, url FROM mails 
+        WHERE msg_class IN (?, ?)
         ORDER BY id
-        LIMIT ? OFFSET ?
-    """, (limit, offset))
-    
-    emails = cursor.fetchall()
+        LIMIT ?
+    """, (MSG_CLASS_PATCH, MSG_CLASS_PATCH_REPLY, limit))
+    headers = cursor.fetchall()
     conn.close()
-    return emails
+    return headers
+
+
+def get_email_bodies(email_ids: List[int]) -> dict:
+    """
+    Load html_content on demand for a set of email ids.
+    Args:
+        email_ids: Ids of the emails to load
+    Returns:
+        Dictionary mapping email id -> html_content
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    bodies = {}
+    email_ids = list(email_ids)
+    # stay under SQLite's default bound-parameter limit
+    for start in range(0, len(email_ids), 900):
+        chunk = email_ids[start:start + 900]
+        placeholders = ",".join("?" for _ in chunk)
+        cursor.execute(f"SELECT id, html_content FROM mails WHERE id IN ({placeholders})", chunk)
+        bodies.update(cursor.fetchall())
+    conn.close()
+    return bodies
+
 
 """
-    Get emails in batches that preserve complete discussion threads.
-    Each batch contains complete conversation chains.
+    Plan batches that preserve complete discussion threads.
+    Only ids and titles are read here, so the html_content of the whole patch
+    corpus is never held in memory at once.
 """
-def get_complete_thread_batches(batch_size: int = 1000) -> List[List[Tuple]]:
+def get_thread_batch_ids(batch_size: int = 1000) -> List[List[int]]:
     conn = get_connection()
+    ensure_msg_class_column(conn)
     cursor = conn.cursor()
     
-    # first, get ALL patch-related emails with their thread signatures
+    # first, stream ALL patch-related email ids with their thread signatures
     cursor.execute("""
-        SELECT id, title, url, html_content 
+        SELECT id, title 
         FROM mails 
-        WHERE title LIKE '%[PATCH%' OR title LIKE '%Re:%[PATCH%'
+        WHERE msg_class IN (?, ?)
         ORDER BY id
-    """)
-    
-    all_emails = cursor.fetchall()
-    conn.close()
+    """, (MSG_CLASS_PATCH, MSG_CLASS_PATCH_REPLY))
     
-    print(f"Found {len(all_emails)} total patch-related emails")
-    
-    # Group emails by thread signature to keep conversations together
+    # Group email ids by thread signature to keep conversations together
     thread_groups = defaultdict(list)
+    total_emails = 0
     
-    for email in all_emails:
-        email_id, title, url, html_content = email
-        
-        # Extract thread signature (similar to your existing logic)
-        thread_signature = extract_thread_signature(title)
-        thread_groups[thread_signature].append(email)
+    for email_id, title in cursor:
+        thread_groups[extract_thread_signature(title)].append(email_id)
+        total_emails += 1
+    conn.close()
     
+    print(f"Found {total_emails} total patch-related emails")
     print(f"Found {len(thread_groups)} distinct conversation threads")
     
     # Create batches that keep complete threads together
     batches = []
     current_batch = []
-    current_batch_size = 0
     
-    for thread_signature, thread_emails in thread_groups.items():
-        thread_size = len(thread_emails)
-        
+    for thread_ids in thread_groups.values():
         # If adding this thread would exceed batch size, start new batch
-        if current_batch_size + thread_size > batch_size and current_batch:
+        if len(current_batch) + len(thread_ids) > batch_size and current_batch:
             batches.append(current_batch)
             current_batch = []
-            current_batch_size = 0
         
         # Add entire thread to current batch
-        current_batch.extend(thread_emails)
-        current_batch_size += thread_size
+        current_batch.extend(thread_ids)
     
     # Add final batch if not empty
     if current_batch:
@@ -329,10 +551,50 @@ def get_complete_thread_batches(batch_size: int = 1000) -> List[List[Tuple]]:
     
     return batches
 
+
+def load_email_batch(email_ids: List[int]) -> List[Tuple]:
+    """
+    Load full email rows for one planned batch, keeping the order of email_ids.
+    Args:
+        email_ids: Ids from get_thread_batch_ids
+    Returns:
+        List of tuples containing (id, title, url, html_content)
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    rows_by_id = {}
+    # stay under SQLite's default bound-parameter limit
+    for start in range(0, len(email_ids), 900):
+        chunk = email_ids[start:start + 900]
+        placeholders = ",".join("?" for _ in chunk)
+        cursor.execute(f"SELECT id, title, url, html_content FROM mails WHERE id IN ({placeholders})", chunk)
+        for row in cursor:
+            rows_by_id[row[0]] = row
+    conn.close()
+    return [rows_by_id[email_id] for email_id in email_ids if email_id in rows_by_id]
+
+
+def iter_thread_batches(batch_size: int = 1000) -> Iterator[List[Tuple]]:
+    """
+    Yield thread-aware batches one at a time, loading each batch's bodies on demand.
+    """
+    for email_ids in get_thread_batch_ids(batch_size):
+        yield load_email_batch(email_ids)
+
+
+"""
+    Get emails in batches that preserve complete discussion threads.
+    Each batch contains complete conversation chains.
+"""
+def get_complete_thread_batches(batch_size: int = 1000) -> List[List[Tuple]]:
+    return list(iter_thread_batches(batch_size))
+
 """
     Extract a signature that groups related emails in the same thread.
     This should be more aggressive than patch signature to capture discussions.
+    Cached per title since replies repeat the same subject across a thread.
 """
+@lru_cache(maxsize=131072)
 def extract_thread_signature(title: str) -> str:
 
 
@@ -340,21 +602,20 @@ def extract_thread_signature(title: str) -> str:
         return "unknown"
     
     # Remove common reply prefixes
-    clean_title = title.lower()
-    clean_title = re.sub(r'^re:\s*', '', clean_title)
-    clean_title = re.sub(r'^fwd:\s*', '', clean_title)
+    clean_title = _THREAD_REPLY_RE.sub('', title, count=1)
+    clean_title = _THREAD_FWD_RE.sub('', clean_title, count=1)
     
     # Extract the core patch subject (remove version and series info for grouping)
     # [PATCH v2 3/5] driver: fix bug -> driver: fix bug
-    patch_match = re.search(r'\[patch[^\]]*\]\s*(.+?)(?:\s*$)', clean_title)
+    patch_match = _THREAD_PATCH_RE.search(clean_title)
     if patch_match:
         core_subject = patch_match.group(1).strip()
         # remove version indicators for grouping
-        core_subject = re.sub(r'\s+v\d+\s*', ' ', core_subject)
-        return core_subject.strip()
+        core_subject = _THREAD_VERSION_RE.sub(' ', core_subject)
+        return core_subject.strip().lower()
     
     # for non-patch emails, use the full subject
-    return clean_title.strip()
+    return clean_title.strip().lower()
 
 """
     General information about the database, such as total emails, ID range, 
@@ -362,37 +623,47 @@ def extract_thread_signature(title: str) -> str:
 """
 def analyze_database_coverage():
 
-    try:
-        conn = get_connection()
-    except sqlite3.OperationalError as e:
-        print(f"Error connecting to database: {e}")
-        return
-    
-    cursor = conn.cursor()
-    
-    # get total  email count
-    cursor.execute("SELECT COUNT(*) FROM mails")
-    total_emails = cursor.fetchone()[0]
-    
-    # get email ID range
-    cursor.execute("SELECT MIN(id), MAX(id) FROM mails")
-    min_id, max_id = cursor.fetchone()
+    coverage = _stats_cache.get(('coverage', _db_mtime(DATABASE_FILE)))
     
+    if coverage is None:
+        try:
+            conn = get_connection()
+        except sqlite3.OperationalError as e:
+            print(f"Error connecting to database: {e}")
+            return
+        
+        cursor = conn.cursor()
+        ensure_msg_class_column(conn)
+        
+        # totals, patch/reply counts and the id range from a single scan
+        cursor.execute("""
+            SELECT COUNT(*),
+                   SUM(CASE WHEN msg_class IN (?, ?) THEN 1 ELSE 0 END),
+                   SUM(CASE WHEN title LIKE 'Re:%' THEN 1 ELSE 0 END),
+                   MIN(id), MAX(id)
+            FROM mails
+        """, (MSG_CLASS_PATCH, MSG_CLASS_PATCH_REPLY))
+        total_emails, patch_count, reply_count, min_id, max_id = cursor.fetchone()
+        conn.close()
+        
+        coverage = {
+            'total_emails': total_emails,
+            'min_id': min_id,
+            'max_id': max_id,
+            'patch_count': patch_count or 0,
+            'reply_count': reply_count or 0
+        }
+        # key on the post-query mtime, the msg_class migration may have just written
+        _stats_cache[('coverage', _db_mtime(DATABASE_FILE))] = coverage
+    
+    total_emails = coverage['total_emails']
     print("=== DATABASE GENERAL ANALYSIS ===")
     print(f"Total emails in database: {total_emails:,}")
-    print(f"Email ID range: {min_id} to {max_id}")
-    
-    # number of emails with patch-related titles
-    cursor.execute("SELECT COUNT(*) FROM mails WHERE title LIKE '%[PATCH%'")
-    patch_count = cursor.fetchone()[0]
-    print(f"Patch emails: {patch_count:,} ({patch_count/total_emails*100:.2f}% of total)")
+    print(f"Email ID range: {coverage['min_id']} to {coverage['max_id']}")
+    print(f"Patch emails: {coverage['patch_count']:,} ({coverage['patch_count']/total_emails*100:.2f}% of total)")
+    print(f"Reply emails: {coverage['reply_count']:,} ({coverage['reply_count']/total_emails*100:.2f}% of total)")
     
-    # number of emails that are replies
-    cursor.execute("SELECT COUNT(*) FROM mails WHERE title LIKE 'Re:%'")
-    reply_count = cursor.fetchone()[0]
-    print(f"Reply emails: {reply_count:,} ({reply_count/total_emails*100:.2f}% of total)")
-    
-    conn.close()
+    return coverage
 
 
 def create_git_pull_table():
@@ -405,7 +676,7 @@ def create_git_pull_table():
     
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS git_pull_emails (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            id INTEGER PRIMARY KEY,
             title TEXT NOT NULL,
             url TEXT NOT NULL,
             html_content TEXT,
@@ -416,6 +687,7 @@ def create_git_pull_table():
     
     conn.commit()
     conn.close()
+    _stats_cache.clear()
     print("Created git_pulls table if it did not exist.")
 
 
@@ -426,36 +698,28 @@ def populate_git_pull_table():
     print("Populating git_pulls table with patch-related emails...")
 
     patterns = [
-        ("LIKE '%[GIT PULL]%'", "GIT_PULL"),
-        ("LIKE '%Re: [GIT PULL]%'", "GIT_PULL_REPLY")
+        ('%[GIT PULL]%', "GIT_PULL"),
+        ('%Re: [GIT PULL]%', "GIT_PULL_REPLY")
     ]
 
     total_inserted = 0
+    # one explicit transaction for both patterns, so the load syncs once
+    cursor.execute("BEGIN")
     for pattern, pull_type in patterns:
-        # first, check how many emails match this pattern, should be around 6500
-        cursor.execute(f"""
-            SELECT COUNT(*) 
+        # id is the primary key, so emails already in the table are skipped by
+        # the unique index instead of a NOT IN subquery per candidate row
+        cursor.execute("""
+            INSERT OR IGNORE INTO git_pull_emails (id, title, url, html_content, pull_type)
+            SELECT id, title, url, html_content, ?
             FROM mails 
-            WHERE title {pattern}
-            AND id NOT IN (SELECT id FROM git_pull_emails)
-        """)
-        count = cursor.fetchone()[0]
-        print(f"  Found {count} emails matching '{pull_type}' pattern")
-
-        if count > 0:
-            # now we insert the emails into the git_pulls table
-            cursor.execute(f"""
-                INSERT INTO git_pull_emails (id, title, url, html_content, pull_type)
-                SELECT id, title, url, html_content, '{pull_type}'
-                FROM mails 
-                WHERE title {pattern}
-                AND id NOT IN (SELECT id FROM git_pull_emails WHERE id IS NOT NULL)
-            """)
-            inserted = cursor.rowcount
-            total_inserted += inserted
-            print(f"  Inserted {inserted} emails as '{pull_type}'")
+            WHERE title LIKE ?
+        """, (pull_type, pattern))
+        inserted = cursor.rowcount
+        total_inserted += inserted
+        print(f"  Inserted {inserted} emails as '{pull_type}'")
     conn.commit()
     conn.close()
+    _stats_cache.clear()
 
 
 def get_git_pull_emails(limit: int = None, db_path = SUSPECTED_CVE_DATABASE_FILE) -> List[Tuple]:
@@ -486,6 +750,10 @@ def get_git_pull_statistics():
     Returns:
         Dictionary with counts of each pull type
     """
+    cache_key = ('git_pull_statistics', _db_mtime(SUSPECTED_CVE_DATABASE_FILE))
+    if cache_key in _stats_cache:
+        return dict(_stats_cache[cache_key])
+    
     conn = sqlite3.connect(SUSPECTED_CVE_DATABASE_FILE)
     cursor = conn.cursor()
     
@@ -498,4 +766,5 @@ def get_git_pull_statistics():
     stats = {row[0]: row[1] for row in cursor.fetchall()}
     
     conn.close()
-    return stats
\ No newline at end of file
+    _stats_cache[cache_key] = stats
+    return dict(stats)
\ No newline at end of file
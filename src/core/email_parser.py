@@ -5,57 +5,286 @@ This module contains functions to parse HTML email content and extract
 structured information such as metadata, patch information, and thread relationships.
 """
 
+import logging
+import os
 import re
-from typing import Dict, Optional, Set, List
+import sys
+from bisect import bisect_right
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import islice
+from typing import Dict, FrozenSet, Optional, Set, List, Tuple
 from bs4 import BeautifulSoup
 from dateutil import parser as date_parser
+from email.utils import parsedate_to_datetime
 import sqlite3
+import threading
+from .data_access import get_connection
 from .utils import get_best_email_body
 
+try:
+    import lxml  # C-backed parser for BeautifulSoup, much faster than html.parser
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+# BeautifulSoup tree builder for email pages
+_HTML_PARSER = 'lxml' if LXML_AVAILABLE else 'html.parser'
+
+try:
+    import ahocorasick  # pyahocorasick, finds all signal phrases in one pass
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
 _maintainer_emails_cache = None
 
+# persistent connection to the maintainers database, opened on first use
+MAINTAINERS_DB_PATH = 'maintainers.db'
+_maintainers_conn = None
+_maintainers_conn_lock = threading.Lock()
+
+# compiled once at import; these run for every parsed email
+_ANGLE_EMAIL_RE = re.compile(r'<([^>]+)>')
+
+_MAINTAINER_SIGNATURE_RES = [
+    (re.compile(r'reviewed-by:\s*([^<]*<[^>]+>)', re.IGNORECASE), 'maintainer_reviewed_by'),
+    (re.compile(r'acked-by:\s*([^<]*<[^>]+>)', re.IGNORECASE), 'maintainer_acked_by'),
+    (re.compile(r'tested-by:\s*([^<]*<[^>]+>)', re.IGNORECASE), 'maintainer_tested_by'),
+    (re.compile(r'signed-off-by:\s*([^<]*<[^>]+>)', re.IGNORECASE), 'maintainer_signed_off_by'),
+]
+
+# every maintainer context pattern ('maintainer', 'subsystem.*maintainer',
+# 'tree.*maintainer', ...) contains the word itself, so a substring test decides it
+_MAINTAINER_CONTEXT_WORD = 'maintainer'
+
+_OFFICIAL_ACTION_RES = [re.compile(p) for p in (
+    'pulling.*into',
+    'merging.*into',
+    'taking.*patch',
+    'will.*apply',
+    'going.*upstream',
+)]
+
+# literal tree mentions are plain substring tests; only the '.*tree' forms need a regex
+_OFFICIAL_TREE_LITERALS = ('linux-next', 'mainline', 'upstream', 'git.kernel.org')
+_OFFICIAL_TREE_RES = [re.compile(p) for p in (
+    'linus.*tree',
+    'stable.*tree',
+    'maintainer.*tree',
+)]
+
+# \[PATCH\s* - Literal "[PATCH" followed by optional whitespace
+# ([v\d+]*) - Capture group for version (v1, v2, etc.) - optional
+# \s*(\d+/\d+)? - Optional series info like "3/5"
+# \s*\] - Closing bracket with optional whitespace
+# \s*(.*) - Capture the rest as patch title
+_PATCH_INFO_RES = [re.compile(p, re.IGNORECASE) for p in (
+    r'\[PATCH\s*([v\d+]*)\s*(\d+/\d+)?\s*\]\s*(.*)',
+    r'\[RFC\s*PATCH\s*([v\d+]*)\s*(\d+/\d+)?\s*\]\s*(.*)',
+    r'Re:\s*\[PATCH\s*([v\d+]*)\s*(\d+/\d+)?\s*\]\s*(.*)',
+)]
+
+# "[PATCH ...]" / "[RFC PATCH ...]" tag at the start of a subject, else any
+# "[... PATCH ...]" tag; the lookahead pins the first PATCH so a tag that never
+# closes fails in linear time instead of retrying every later PATCH
+_PATCH_SIGNATURE_RE = re.compile(
+    r'\[(?:RFC\s*)?PATCH\s*(?:v\d+)?\s*(?:\d+/\d+)?\s*\]\s*(.*)'
+    r'|\[(?=(.*?PATCH))\2[^\]\n]*\]\s*(.*)',
+    re.IGNORECASE
+)
+# any number of leading "Re:" prefixes
+_REPLY_PREFIX_RE = re.compile(r'(?:re:\s*)+', re.IGNORECASE)
+
+_TRAILING_PUNCT_RE = re.compile(r'[.!?]+$')
+_WHITESPACE_RE = re.compile(r'\s+')
+_COLON_RE = re.compile(r'\s*:\s*')
+
+_SERIES_RE = re.compile(r'(\d+)/(\d+)')
+_VERSION_NUM_RE = re.compile(r'\d+')
+
+# git pull subject phrases, matched as a single alternation per subject
+_GIT_PULL_SUBJECT_RE = re.compile(r'git pull|please pull|pull request', re.IGNORECASE)
+
+# [GIT PULL] in any case (also covers "Re: [GIT PULL]" replies), plus looser variants
+_GIT_PULL_TAG_RE = re.compile(
+    r'\[git\s+pull\]'
+    r'|please\s+pull'
+    r'|git\s+tree'
+    r'|pull\s+from'
+    r'|tree\s+pull',
+    re.IGNORECASE
+)
+
+# merge/acceptance phrases looked for in email bodies
+# very strong signals - definitive merge indicators
+_VERY_STRONG_MERGE_SIGNALS = (
+    'applied, thanks',     # Common maintainer response
+    'thanks, applied',     # Common maintainer response
+    #'queued for',          # "queued for next release"
+    'will be merged',      # Explicit merge statement
+)
+# medium signals - but get boosted if from maintainer
+_MAINTAINER_BOOSTED_SIGNALS = ('looks good', 'lgtm', 'nice work', 'thanks for')
+_REGULAR_SIGNALS = ('acked-by:', 'reviewed-by:', 'tested-by:')
+
+# Strong signals (very likely merged indicators)
+_STRONG_SIGNALS = (
+    'applied to', 'queued to', 'merged to', 'committed to', 'added to',
+    'picked up', 'in linux-next', 'pulled into', 'landed in', 'committed as',
+    'pushed to', 'will appear in', 'applied, thanks'
+)
+# Medium signals (acceptance indicators, but not definitive)
+_MEDIUM_SIGNALS = ('looks good', 'lgtm', 'acked-by:', 'tested-by:')
+# Weak signals (only count if from maintainer or in specific context)
+_WEAK_SIGNALS = ('reviewed-by:', 'signed-off-by:')
+_REPLY_CONTEXT_WORDS = ('thanks', 'applied')
+# well-known maintainers whose weak signals always count
+_KNOWN_MAINT_RE = re.compile(r'torvalds|gregkh|davem|akpm|sashal|jikos', re.IGNORECASE)
+
+
+# signal phrases checked by each merge indicator function
+_MERGE_INDICATOR_SIGNALS = _VERY_STRONG_MERGE_SIGNALS + _MAINTAINER_BOOSTED_SIGNALS + _REGULAR_SIGNALS
+_MERGE_INDICATOR2_SIGNALS = _STRONG_SIGNALS + _MEDIUM_SIGNALS + _WEAK_SIGNALS + _REPLY_CONTEXT_WORDS
+
+
+def _build_signal_automaton(signals):
+    """Build an Aho-Corasick automaton that reports each signal phrase it finds."""
+    automaton = ahocorasick.Automaton()
+    for signal in signals:
+        automaton.add_word(signal, signal)
+    automaton.make_automaton()
+    return automaton
+
+
+_SIGNAL_AUTOMATA = {}
+if AHOCORASICK_AVAILABLE:
+    _SIGNAL_AUTOMATA = {
+        signals: _build_signal_automaton(signals)
+        for signals in (_VERY_STRONG_MERGE_SIGNALS, _MERGE_INDICATOR_SIGNALS, _MERGE_INDICATOR2_SIGNALS)
+    }
+
+
+# bodies are lowered this many characters at a time while looking for signals
+_SIGNAL_CHUNK_CHARS = 8192
+_MAX_SIGNAL_LEN = max(len(signal) for signal in _MERGE_INDICATOR_SIGNALS + _MERGE_INDICATOR2_SIGNALS)
+
+
+def _iter_lowered_chunks(text: str):
+    """
+    Yield text lowered in fixed-size pieces that overlap by one signal length,
+    so a phrase spanning a piece boundary is still seen whole and the body is
+    never copied in full.
+    """
+    overlap = _MAX_SIGNAL_LEN - 1
+    for start in range(0, len(text), _SIGNAL_CHUNK_CHARS):
+        yield text[start:start + _SIGNAL_CHUNK_CHARS + overlap].lower()
+
+
+def _find_signals(text: str, signals) -> Set[str]:
+    """
+    Return the signal phrases that occur in text (case-insensitive).
+
+    With pyahocorasick installed all phrases are found in a single pass over
+    the lowered text. Otherwise each distinct phrase is a substring search;
+    CPython's substring search is considerably faster than one combined regex
+    alternation over the same text.
+    """
+    found = set()
+    if not text:
+        return found
+    automaton = _SIGNAL_AUTOMATA.get(signals)
+    remaining = list(signals)
+    for chunk in _iter_lowered_chunks(text):
+        if automaton is not None:
+            found.update(signal for _, signal in automaton.iter(chunk))
+        else:
+            found.update(signal for signal in remaining if signal in chunk)
+            remaining = [signal for signal in remaining if signal not in found]
+            if not remaining:
+                break
+    return found
+
+
+_FENCE_RE = re.compile(r'^-+$')
+# every line whose stripped text starts with '-' (fences and shortlog entries);
+# group 1 is the stripped line
+_DASH_LINE_RE = re.compile(r'^[^\S\n]*(-[^\n]*?)[^\S\n]*$', re.MULTILINE)
+# line breaks str.splitlines() honours besides '\n' and '\r\n'
+_OTHER_LINE_BREAK_RE = re.compile(r'\r(?!\n)|[\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029]')
+_AUTHOR_LINE_RE = re.compile(r'^[\w .\-()]+<.*>:')
+_SHORTLOG_ENTRY_RE = re.compile(r'^\s*-\s+.+')
+
 
 '''
 Load maintainer emails from the database.
 This function connects to the SQLite database and retrieves all maintainer emails,
 caching the results for future calls to improve performance.
 '''
-def load_maintainer_emails() -> Set[str]:
+def _get_maintainers_connection() -> sqlite3.Connection:
+    """
+    Return the shared maintainers database connection, opening it on first use.
+    Callers hold _maintainers_conn_lock while using it.
+    """
+    global _maintainers_conn
+    if _maintainers_conn is None:
+        conn = sqlite3.connect(MAINTAINERS_DB_PATH, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=5000")
+        conn.execute("PRAGMA cache_size=-20000")
+        conn.execute("PRAGMA query_only=1")
+        _maintainers_conn = conn
+    return _maintainers_conn
+
+
+def load_maintainer_emails() -> FrozenSet[str]:
     global _maintainer_emails_cache
     if _maintainer_emails_cache is not None:
         return _maintainer_emails_cache
     
-    maintainer_emails = set()
+    maintainer_emails = frozenset()
     try:
-        conn = sqlite3.connect('maintainers.db')
-        cursor = conn.cursor()
-        cursor.execute("SELECT email FROM maintainers")
-        rows = cursor.fetchall()
-
-        for row in rows:
-            maintainer_emails.add(row[0].strip().lower())
+        with _maintainers_conn_lock:
+            conn = _get_maintainers_connection()
+            # normalize in SQL so rows come back ready to use
+            cursor = conn.execute(
+                "SELECT LOWER(TRIM(email, char(32, 9, 10, 13))) FROM maintainers "
+                "WHERE email IS NOT NULL"
+            )
+            # interned so a hit compares by identity after the hash lookup
+            maintainer_emails = frozenset(sys.intern(row[0]) for row in cursor)
 
-        conn.close()
         print(f"Loaded {len(maintainer_emails)} maintainer emails from database.")
 
     except sqlite3.Error as e:
         print(f"Error loading maintainers from database: {e}")
-        maintainer_emails = set()
+        maintainer_emails = frozenset()
 
     _maintainer_emails_cache = maintainer_emails
     return maintainer_emails
 
 
+@lru_cache(maxsize=65536)
+def _normalize_author_email(email: str) -> str:
+    email_match = _ANGLE_EMAIL_RE.search(email)
+    if email_match:
+        email = email_match.group(1) #extract the email address from angle brackets
+    return email.strip().lower()
+
+
 def is_maintainer_email(email: str) -> bool:
     if not email:
         return False
     
-    maintainer_emails = load_maintainer_emails()
-    email_match = re.search(r'<([^>]+)>', email)
-    if email_match:
-        email = email_match.group(1) #extract the email address from angle brackets
-
-    return email.strip().lower() in maintainer_emails
+    # only the address normalization is cached, so a reloaded maintainer set is always honoured
+    maintainer_emails = _maintainer_emails_cache
+    if maintainer_emails is None:
+        maintainer_emails = load_maintainer_emails()
+    return _normalize_author_email(email) in maintainer_emails
 
 
 
@@ -70,21 +299,12 @@ def extract_maintainer_signals_from_content(content: str) -> List[str]:
     signals = []
     maintainer_emails = load_maintainer_emails()
 
-    maintainer_signature_patterns = [
-        r'reviewed-by:\s*([^<]*<[^>]+>)',
-        r'acked-by:\s*([^<]*<[^>]+>)', 
-        r'tested-by:\s*([^<]*<[^>]+>)',
-        r'signed-off-by:\s*([^<]*<[^>]+>)'
-    ]
-
-    for pattern in maintainer_signature_patterns:
-        matches = re.finditer(pattern, content, re.IGNORECASE)
-        for match in matches:
+    for pattern, signal in _MAINTAINER_SIGNATURE_RES:
+        for match in pattern.finditer(content):
             signature_line = match.group(1)
-            email_match = re.search(r'<([^>]+)>', signature_line)
-            if email_match and email_match.group(1).lower().strip() in maintainer_emails:
-                signal_type = pattern.split(':')[0].replace('\\s*', '').replace('r', 'R')
-                signals.append(f'maintainer_{signal_type.lower().replace("-", "_")}')
+            email_match = _ANGLE_EMAIL_RE.search(signature_line)
+            if email_match and _normalize_author_email(email_match.group(1)) in maintainer_emails:
+                signals.append(signal)
     
     return signals
 
@@ -115,28 +335,16 @@ def extract_merge_indicators(subject: str, content: str, from_author: str = "")
         'confidence_score': 0.0
     }
     
-    subject_lower = subject.lower() if subject else ''
-    content_lower = content.lower() if content else ''
+    # find every signal phrase in the subject and body up front
+    subject_signals = _find_signals(subject, _VERY_STRONG_MERGE_SIGNALS)
+    content_signals = _find_signals(content, _MERGE_INDICATOR_SIGNALS)
     
     # check if sender is a maintainer
     is_from_maintainer = is_maintainer_email(from_author)
     
-    # very strong signals - definitive merge indicators
-    very_strong_signals = [
-        'applied, thanks',     # Common maintainer response
-        'thanks, applied',     # Common maintainer response
-        #'queued for',          # "queued for next release"
-        'will be merged',      # Explicit merge statement
-    ]
-    
-    # medium signals - but get boosted if from maintainer
-    maintainer_boosted_signals = [
-        'looks good', 'lgtm', 'nice work', 'thanks for'
-    ]
-    
     # check very strong signals (anyone can indicate these)
-    for signal in very_strong_signals:
-        if signal in content_lower or signal in subject_lower:
+    for signal in _VERY_STRONG_MERGE_SIGNALS:
+        if signal in content_signals or signal in subject_signals:
             merge_indicators['merge_signals'].append(signal)
             merge_indicators['confidence_score'] += 5.0
     
@@ -147,9 +355,8 @@ def extract_merge_indicators(subject: str, content: str, from_author: str = "")
         merge_indicators['confidence_score'] += 4.0  # High confidence for maintainer signals
     
     # check regular signals, but boost if from maintainer
-    regular_signals = ['acked-by:', 'reviewed-by:', 'tested-by:']
-    for signal in regular_signals:
-        if signal in content_lower:
+    for signal in _REGULAR_SIGNALS:
+        if signal in content_signals:
             if is_from_maintainer:
                 merge_indicators['merge_signals'].append(f'maintainer_{signal.replace(":", "").replace("-", "_")}')
                 merge_indicators['confidence_score'] += 4.0
@@ -158,8 +365,8 @@ def extract_merge_indicators(subject: str, content: str, from_author: str = "")
                 merge_indicators['confidence_score'] += 1.5  # Lower confidence for non-maintainers
     
     # Medium signals get boosted if from maintainer
-    for signal in maintainer_boosted_signals:
-        if signal in content_lower:
+    for signal in _MAINTAINER_BOOSTED_SIGNALS:
+        if signal in content_signals:
             boost = 3.0 if is_from_maintainer else 1.0
             merge_indicators['merge_signals'].append(signal)
             merge_indicators['confidence_score'] += boost
@@ -184,47 +391,27 @@ def extract_merge_indicators2(subject: str, content: str, from_author: str = "")
         'confidence_score': 0.0
     }
 
-    subject_lower = subject.lower() if subject else ''
-    content_lower = content.lower() if content else ''
-    from_author_lower = from_author.lower() if from_author else ''
-
-    # Strong signals (very likely merged indicators)
-    strong_signals = [
-        'applied to', 'queued to', 'merged to', 'committed to', 'added to',
-        'picked up', 'in linux-next', 'pulled into', 'landed in', 'committed as',
-        'pushed to', 'will appear in', 'applied, thanks'
-    ]
-    
-    # Medium signals (acceptance indicators, but not definitive)
-    medium_signals = [
-        'looks good', 'lgtm', 'acked-by:', 'tested-by:'
-    ]
-    
-    # Weak signals (only count if from maintainer or in specific context)
-    weak_signals = [
-        'reviewed-by:', 'signed-off-by:'
-    ]
+    content_signals = _find_signals(content, _MERGE_INDICATOR2_SIGNALS)
 
     # Check strong signals
-    for signal in strong_signals:
-        if signal in content_lower:
+    for signal in _STRONG_SIGNALS:
+        if signal in content_signals:
             merge_indicators['merge_signals'].append(signal)
             merge_indicators['confidence_score'] += 4.0
 
     # Check medium signals
-    for signal in medium_signals:
-        if signal in content_lower:
+    for signal in _MEDIUM_SIGNALS:
+        if signal in content_signals:
             merge_indicators['merge_signals'].append(signal)
             merge_indicators['confidence_score'] += 2.0
 
     # Check weak signals - only count if from known maintainer or specific context
-    known_maintainers = ['torvalds', 'gregkh', 'davem', 'akpm', 'sashal', 'jikos']
-    is_from_maintainer = any(maintainer in from_author_lower for maintainer in known_maintainers)
+    is_from_maintainer = bool(from_author) and _KNOWN_MAINT_RE.search(from_author) is not None
+    in_reply_context = 'thanks' in content_signals or 'applied' in content_signals
     
-    for signal in weak_signals:
-        if signal in content_lower:
-            # Only count if from maintainer or in reply context
-            if is_from_maintainer or 'thanks' in content_lower or 'applied' in content_lower:
+    if is_from_maintainer or in_reply_context:
+        for signal in _WEAK_SIGNALS:
+            if signal in content_signals:
                 merge_indicators['merge_signals'].append(signal)
                 merge_indicators['confidence_score'] += 1.0
 
@@ -243,33 +430,12 @@ def check_maintainer_context(subject: str, content: str) -> float:
     score = 0.0
     
     # Common maintainer email patterns
-    maintainer_patterns = [
-        'maintainer',
-        'subsystem.*maintainer',
-        'tree.*maintainer', 
-        'from.*maintainer',
-        'by.*maintainer'
-    ]
-    
-    
-    for pattern in maintainer_patterns:
-        if re.search(pattern, content):
-            score += 1.0
-            break
+    if _MAINTAINER_CONTEXT_WORD in content:
+        score += 1.0
     
     # Check for official actions
-    official_actions = [
-        'pulling.*into',
-        'merging.*into', 
-        'taking.*patch',
-        'will.*apply',
-        'going.*upstream'
-    ]
-    
-    for pattern in official_actions:
-        if re.search(pattern, content):
-            score += 1.5
-            break
+    if any(pattern.search(content) for pattern in _OFFICIAL_ACTION_RES):
+        score += 1.5
     
     return score
 
@@ -279,27 +445,26 @@ def check_official_tree_mentions(content: str) -> float:
     """
     score = 0.0
     
-    official_trees = [
-        'linux-next',
-        'mainline',
-        'linus.*tree',
-        'stable.*tree',
-        'maintainer.*tree',
-        'upstream',
-        'git\.kernel\.org'
-    ]
-    
-    for tree in official_trees:
-        if re.search(tree, content):
-            score += 0.5
-            break
+    if (any(tree in content for tree in _OFFICIAL_TREE_LITERALS)
+            or ('tree' in content and any(tree.search(content) for tree in _OFFICIAL_TREE_RES))):
+        score += 0.5
     
     return score
 
 
+# metadata table labels (lowercased) and the email_data keys they fill
+_METADATA_LABELS = {
+    'message-id': 'message_id',
+    'in-reply-to': 'in_reply_to',
+    'from': 'from_author',
+    'date': 'date',
+    'subject': 'subject',
+}
+
+
 def parse_email_content(html_content: str) -> Dict:
 
-    soup = BeautifulSoup(html_content, 'html.parser') # html parser for the email content
+    soup = BeautifulSoup(html_content, _HTML_PARSER) # lxml when installed, else html.parser
 
     # initialize the email data structure
     # with default values
@@ -314,30 +479,21 @@ def parse_email_content(html_content: str) -> Dict:
         'patch_info': None,
         'merge_info': None
     }
+    found_labels = set()
 
 
     # Extract metadata from tables
-    # LKML emails store the metadata in HTML tables
-    tables = soup.find_all('table')
-    for table in tables:
-        rows = table.find_all('tr') # find all rows in the table
-        for row in rows:
-            cells = row.find_all('td') # find all cells in the row
-            if len(cells) >= 2:
-                label = cells[0].get_text(strip=True)
-                value = cells[1].get_text(strip=True)
-                
-                # store html metadata based on label
-                if label.lower() == 'message-id':
-                    email_data['message_id'] = value
-                elif label.lower() == 'in-reply-to':
-                    email_data['in_reply_to'] = value
-                elif label == 'From': 
-                    email_data['from_author'] = value
-                elif label == 'Date':
-                    email_data['date'] = value
-                elif label == 'Subject':
-                    email_data['subject'] = value
+    # LKML emails store the metadata in HTML tables; one walk over the rows,
+    # stopping as soon as every label has been seen
+    for row in soup.find_all('tr'):
+        cells = row.find_all('td', limit=2) # only the label and value cells are needed
+        if len(cells) >= 2:
+            key = _METADATA_LABELS.get(cells[0].get_text(strip=True).lower())
+            if key and key not in found_labels:
+                email_data[key] = cells[1].get_text(strip=True)
+                found_labels.add(key)
+                if len(found_labels) == len(_METADATA_LABELS):
+                    break
     
     # Extract message body
     # LKML emails have the main content in a <pre> tag with itemprop="articleBody"
@@ -381,6 +537,44 @@ def parse_email_content(html_content: str) -> Dict:
     return email_data
 
 
+# below this many emails a process pool costs more than it saves
+PARALLEL_PARSE_MIN_EMAILS = 256
+
+
+def _parse_email_content_safe(html_content: str) -> Tuple[Optional[Dict], Optional[str]]:
+    """Parse one email in a worker, returning (parsed, None) or (None, error message)."""
+    try:
+        return parse_email_content(html_content), None
+    except Exception as e:
+        return None, str(e)
+
+
+def parse_email_batch(html_contents: List[str], max_workers: Optional[int] = None,
+                      chunksize: int = 64) -> List[Tuple[Optional[Dict], Optional[str]]]:
+    """
+    Parse many email pages, spreading the work over a process pool.
+    
+    Parsing is CPU-bound (HTML tree building and regexes), so processes rather
+    than threads are used. Each worker loads the maintainer list lazily on its
+    first email. Small batches are parsed in this process.
+    
+    Args:
+        html_contents: Raw HTML of each email
+        max_workers: Number of worker processes (defaults to the CPU count)
+        chunksize: Emails sent to a worker at a time
+        
+    Returns:
+        List of (parsed_data, error) tuples in input order; parsed_data is None
+        and error holds the message when an email could not be parsed
+    """
+    workers = max_workers or os.cpu_count() or 1
+    if workers <= 1 or len(html_contents) < PARALLEL_PARSE_MIN_EMAILS:
+        return [_parse_email_content_safe(html_content) for html_content in html_contents]
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(_parse_email_content_safe, html_contents, chunksize=chunksize))
+
+
 def extract_patch_info(subject: str) -> Optional[Dict]:
     """
     Extract patch information from email subject.
@@ -391,22 +585,16 @@ def extract_patch_info(subject: str) -> Optional[Dict]:
     Returns:
         Dictionary with patch metadata or None if not a patch
     """
+    patch_info = _extract_patch_info_cached(subject)
+    # hand out a copy so callers can't modify the cached result
+    return dict(patch_info) if patch_info is not None else None
 
-    # Regex patterns to match different patch subject formats
-    # \[PATCH\s* - Literal "[PATCH" followed by optional whitespace
-    # ([v\d+]*) - Capture group for version (v1, v2, etc.) - optional
-    # \s*(\d+/\d+)? - Optional series info like "3/5" 
-    # \s*\] - Closing bracket with optional whitespace
-    # \s*(.*) - Capture the rest as patch title
 
-    patch_patterns = [
-        r'\[PATCH\s*([v\d+]*)\s*(\d+/\d+)?\s*\]\s*(.*)',
-        r'\[RFC\s*PATCH\s*([v\d+]*)\s*(\d+/\d+)?\s*\]\s*(.*)',
-        r'Re:\s*\[PATCH\s*([v\d+]*)\s*(\d+/\d+)?\s*\]\s*(.*)'
-    ]
-    
-    for pattern in patch_patterns:
-        match = re.match(pattern, subject, re.IGNORECASE)
+@lru_cache(maxsize=65536)
+def _extract_patch_info_cached(subject: str) -> Optional[Dict]:
+    # Regex patterns to match different patch subject formats (_PATCH_INFO_RES)
+    for pattern in _PATCH_INFO_RES:
+        match = pattern.match(subject)
         if match:
             version = match.group(1) if match.group(1) else 'v1' 
             series = match.group(2) if match.group(2) else None # e.g. "3/5" series info
@@ -423,6 +611,7 @@ def extract_patch_info(subject: str) -> Optional[Dict]:
     return None
 
 
+@lru_cache(maxsize=65536)
 def extract_patch_signature_improved(subject: str) -> Optional[str]:
     """
     Extract a normalized patch signature for grouping related patches.
@@ -438,25 +627,37 @@ def extract_patch_signature_improved(subject: str) -> Optional[str]:
         return None
     subject = subject.strip()
 
-    while subject.lower().startswith('re:'):
-        subject = subject[3:].strip()
-    patch_patterns = [
-        r'\[PATCH\s*(?:v\d+)?\s*(?:\d+/\d+)?\s*\]\s*(.*)',
-        r'\[RFC\s*PATCH\s*(?:v\d+)?\s*(?:\d+/\d+)?\s*\]\s*(.*)',
-        r'\[.*?PATCH.*?\]\s*(.*)',
-    ]
-    
-    for pattern in patch_patterns:
-        match = re.match(pattern, subject, re.IGNORECASE)
-        if match:
-            core_title = match.group(1).strip()
-            normalized = normalize_title(core_title)
-            return normalized if normalized else None
+    reply_prefix = _REPLY_PREFIX_RE.match(subject)
+    if reply_prefix:
+        subject = subject[reply_prefix.end():]
+    match = _PATCH_SIGNATURE_RE.match(subject)
+    if match:
+        core_title = match.group(1) if match.group(1) is not None else match.group(3)
+        core_title = core_title.strip()
+        normalized = normalize_title(core_title)
+        return normalized if normalized else None
     
     normalized = normalize_title(subject)
     return normalized if normalized else None
 
 
+def get_email_patch_signature(email: Dict) -> Optional[str]:
+    """
+    Patch signature of a parsed email, reusing the 'patch_signature' stored on
+    it when the graph was built instead of extracting it from the subject again.
+    
+    Args:
+        email: Parsed email data from parse_email_content
+        
+    Returns:
+        Normalized signature or None
+    """
+    if 'patch_signature' in email:
+        return email['patch_signature']
+    return extract_patch_signature_improved(email.get('subject'))
+
+
+@lru_cache(maxsize=65536)
 def normalize_title(title: str) -> str:
     """
     Normalize a title for better matching.
@@ -471,9 +672,9 @@ def normalize_title(title: str) -> str:
     if not title:
         return ""
     title = title.lower().strip()
-    title = re.sub(r'[.!?]+$', '', title)
-    title = re.sub(r'\s+', ' ', title) # \s+ means one or more whitespace characters
-    title = re.sub(r'\s*:\s*', ': ', title)
+    title = _TRAILING_PUNCT_RE.sub('', title)
+    title = _WHITESPACE_RE.sub(' ', title) # \s+ means one or more whitespace characters
+    title = _COLON_RE.sub(': ', title)
     return title.strip()
 
 
@@ -489,9 +690,22 @@ def parse_email_date(date_str):
     """
     if not date_str:
         return None
-    
+    return _parse_email_date_cached(date_str)
+
+
+@lru_cache(maxsize=65536)
+def _parse_email_date_cached(date_str):
+    # LKML dates are usually in format like "Tue, 28 Feb 2024 10:30:45 +0000",
+    # which the stdlib RFC 2822 parser handles far faster than dateutil
+    try:
+        parsed_date = parsedate_to_datetime(date_str)
+        # "-0000" or a missing zone comes back naive; let dateutil decide those
+        if parsed_date.tzinfo is not None:
+            return parsed_date
+    except (TypeError, ValueError, IndexError):
+        pass
+
     try:
-        # LKML dates are usually in format like "Tue, 28 Feb 2024 10:30:45 +0000"
         parsed_date = date_parser.parse(date_str)
         return parsed_date
     except Exception as e:
@@ -521,7 +735,7 @@ def extract_series_position(series_info):
     # Match pattern like "4/7" or "2/5"
     # using regex to extract current and total
     # parentheses are used to capture groups
-    match = re.match(r'(\d+)/(\d+)', series_info)
+    match = _SERIES_RE.match(series_info)
     if match:
         current = int(match.group(1)) # first number is the current patch
         total = int(match.group(2)) # total patches in the series
@@ -559,7 +773,8 @@ def extract_temporal_info(email_data, email_id):
     if patch_info:
         version = patch_info.get('version', 'v1')
         # Convert version to numeric for sorting (v1=1, v2=2, etc.)
-        version_num = int(re.search(r'\d+', version).group()) if re.search(r'\d+', version) else 1
+        version_match = _VERSION_NUM_RE.search(version)
+        version_num = int(version_match.group()) if version_match else 1
         
         series_info = patch_info.get('series_info', '')
         series_position, series_total = extract_series_position(series_info)
@@ -571,12 +786,13 @@ def extract_temporal_info(email_data, email_id):
 
 def find_git_pull_emails(email_data: dict) -> dict:
     """
-    Find emails that contain [GIT PULL] requests with enhanced debugging.
+    Find emails that contain [GIT PULL] requests.
     """
     git_pull_emails = {}
     total_emails = len(email_data)
     subjects_checked = 0
-    pattern_matches = {pattern: 0 for pattern in ['[git pull]', 'git pull', 'please pull', 'pull request']}
+    pattern_matches = Counter()
+    log_matches = logger.isEnabledFor(logging.DEBUG)
     
     print(f"Searching for git pull emails in {total_emails} emails...")
 
@@ -586,41 +802,21 @@ def find_git_pull_emails(email_data: dict) -> dict:
             continue
             
         subjects_checked += 1
-        subject_lower = subject.lower()
-        
-        # Print first few subjects for debugging
-        if subjects_checked <= 10:  # Increased to see more samples
-            print(f"Sample subject {subjects_checked}: {subject}")
-        
-        # Check for git pull patterns
-        git_pull_patterns = [
-            '[git pull]',
-            'git pull', 
-            'please pull',
-            'pull request'
-        ]
-
-        found_match = False
-        for pattern in git_pull_patterns:
-            if pattern in subject_lower:
-                print(f"✓ Found git pull email {email_id}: {subject}")
-                print(f"  Matched pattern: '{pattern}'")
-                pattern_matches[pattern] += 1
-                
-                body = email.get('message_body', '') or email.get('body_text', '')
-                git_pull_emails[email_id] = {
-                    'subject': subject,
-                    'body': body
-                }
-                found_match = True
-                break
         
-        # Debug: Check for potential near-misses
-        if not found_match and 'git' in subject_lower:
-            print(f"  Near miss - contains 'git': {subject}")
+        # '[git pull]', 'git pull', 'please pull' or 'pull request'
+        match = _GIT_PULL_SUBJECT_RE.search(subject)
+        if match:
+            pattern_matches[match.group(0).lower()] += 1
+            if log_matches:
+                logger.debug("Found git pull email %s: %s", email_id, subject)
+            body = email.get('message_body', '') or email.get('body_text', '')
+            git_pull_emails[email_id] = {
+                'subject': subject,
+                'body': body
+            }
     
     print(f"Checked {subjects_checked} email subjects")
-    print(f"Pattern matches: {pattern_matches}")
+    print(f"Pattern matches: {dict(pattern_matches)}")
     print(f"Found {len(git_pull_emails)} git pull emails")
     return git_pull_emails
 
@@ -635,15 +831,6 @@ def find_git_pull_emails_regex(email_data: dict) -> dict:
     
     print(f"Searching for [GIT PULL] emails in {total_emails} emails using regex...")
     
-    # Regex patterns for git pull emails (similar to patch patterns)
-    git_pull_patterns = [
-        r'\[GIT\s+PULL\]',           # [GIT PULL] - most common
-        r'\[git\s+pull\]',           # [git pull] - lowercase variant
-        r'\[Git\s+Pull\]',           # [Git Pull] - title case
-        r'Re:\s*\[GIT\s+PULL\]',     # Re: [GIT PULL] - replies
-        r'Re:\s*\[git\s+pull\]',     # Re: [git pull] - lowercase replies
-    ]
-    
     for email_id, email in email_data.items():
         subject = email.get('subject', '')
         if not subject:
@@ -651,46 +838,12 @@ def find_git_pull_emails_regex(email_data: dict) -> dict:
             
         subjects_checked += 1
         
-        # Print first few subjects for debugging
-        if subjects_checked <= 5:
-            print(f"Sample subject {subjects_checked}: {subject}")
-        
-        # Check each regex pattern
-        found_match = False
-        for pattern in git_pull_patterns:
-            if re.search(pattern, subject, re.IGNORECASE):
-                print(f"✓ Found [GIT PULL] email {email_id}: {subject}")
-                print(f"  Matched pattern: '{pattern}'")
-                
-                body = email.get('message_body', '') or email.get('body_text', '')
-                git_pull_emails[email_id] = {
-                    'subject': subject,
-                    'body': body
-                }
-                found_match = True
-                break
-        
-        # Also check for other git pull variants
-        if not found_match:
-            other_patterns = [
-                r'please\s+pull',
-                r'git\s+tree',
-                r'pull\s+from',
-                r'tree\s+pull'
-            ]
-            
-            for pattern in other_patterns:
-                if re.search(pattern, subject, re.IGNORECASE):
-                    print(f"✓ Found git pull variant {email_id}: {subject}")
-                    print(f"  Matched variant pattern: '{pattern}'")
-                    
-                    body = email.get('message_body', '') or email.get('body_text', '')
-                    git_pull_emails[email_id] = {
-                        'subject': subject,
-                        'body': body
-                    }
-                    found_match = True
-                    break
+        if _GIT_PULL_TAG_RE.search(subject):
+            body = email.get('message_body', '') or email.get('body_text', '')
+            git_pull_emails[email_id] = {
+                'subject': subject,
+                'body': body
+            }
     
     print(f"Checked {subjects_checked} email subjects")
     print(f"Found {len(git_pull_emails)} [GIT PULL] emails")
@@ -698,7 +851,7 @@ def find_git_pull_emails_regex(email_data: dict) -> dict:
     # Show some examples
     if git_pull_emails:
         print(f"\nFirst few [GIT PULL] emails found:")
-        for i, (email_id, info) in enumerate(list(git_pull_emails.items())[:5]):
+        for i, (email_id, info) in enumerate(islice(git_pull_emails.items(), 5)):
             print(f"  {i+1}. {email_id}: {info['subject']}")
     
     return git_pull_emails
@@ -708,46 +861,52 @@ def check_git_pull_in_database():
     """
     Check what git pull emails are actually in the database.
     """
-    from data_access import get_connection
-    
     conn = get_connection()
     cursor = conn.cursor()
     
     # Check for different git pull patterns in database
     patterns = [
-        "LIKE '%[GIT PULL]%'",
-        "LIKE '%[git pull]%'", 
-        "LIKE '%GIT PULL%'",
-        "LIKE '%git pull%'",
-        "LIKE '%please pull%'",
-        "LIKE '%PULL REQUEST%'",
-        "LIKE '%pull request%'"
+        '%[GIT PULL]%',
+        '%[git pull]%',
+        '%GIT PULL%',
+        '%git pull%',
+        '%please pull%',
+        '%PULL REQUEST%',
+        '%pull request%'
     ]
     
+    # count every pattern in a single scan of the table. LIKE ignores ASCII case,
+    # so patterns differing only in case are counted once, and since every
+    # pattern contains "pull" other rows are dropped before any pattern is tested
+    distinct_patterns = list(dict.fromkeys(pattern.lower() for pattern in patterns))
+    count_columns = ", ".join(
+        "SUM(CASE WHEN title LIKE ? THEN 1 ELSE 0 END)" for _ in distinct_patterns
+    )
+    cursor.execute(f"SELECT {count_columns} FROM mails WHERE title LIKE '%pull%'", distinct_patterns)
+    distinct_counts = dict(zip(distinct_patterns, cursor.fetchone()))
+    counts = [distinct_counts[pattern.lower()] or 0 for pattern in patterns]
+    
+    # Show examples for non-zero counts, fetched together in one more scan
+    examples = {pattern: [] for pattern, count in zip(patterns, counts) if 0 < count <= 10}
+    if examples:
+        where = " OR ".join("title LIKE ?" for _ in examples)
+        cursor.execute(f"SELECT id, title FROM mails WHERE {where}", list(examples))
+        for email_id, title in cursor:
+            title_lower = title.lower()
+            for pattern, found in examples.items():
+                if len(found) < 5 and pattern.strip('%').lower() in title_lower:
+                    found.append((email_id, title))
+            if all(len(found) >= 5 for found in examples.values()):
+                break
+    
     print("Checking database for git pull patterns:")
     total_found = 0
     
-    for pattern in patterns:
-        cursor.execute(f"""
-            SELECT COUNT(*) 
-            FROM mails 
-            WHERE title {pattern}
-        """)
-        count = cursor.fetchone()[0]
-        print(f"  {pattern}: {count} emails")
+    for pattern, count in zip(patterns, counts):
+        print(f"  LIKE '{pattern}': {count} emails")
         total_found += count
-        
-        # Show examples for non-zero counts
-        if count > 0 and count <= 10:
-            cursor.execute(f"""
-                SELECT id, title 
-                FROM mails 
-                WHERE title {pattern}
-                LIMIT 5
-            """)
-            examples = cursor.fetchall()
-            for email_id, title in examples:
-                print(f"    Example: {email_id}: {title}")
+        for email_id, title in examples.get(pattern, []):
+            print(f"    Example: {email_id}: {title}")
     
     print(f"Total git pull related emails: {total_found}")
     conn.close()
@@ -765,22 +924,24 @@ def parse_patch_names_from_git_pull(body: str) -> List[str]:
     """
     patch_names = []
     
+    body = _OTHER_LINE_BREAK_RE.sub('\n', body)
+    
+    # only lines starting with '-' can be a fence or a shortlog entry, so a
+    # single scan of the body visits just those
     in_commit_section = False
-    for line in body.splitlines():
-        line = line.strip()
+    for match in _DASH_LINE_RE.finditer(body):
+        line = match.group(1)
         
-        if re.match(r'^-+$', line.strip()):
+        if _FENCE_RE.match(line):
             in_commit_section = not in_commit_section
             continue
 
         if in_commit_section:
-            if re.match(r'^\s{4,}[\w/:\- ]+', line):
-                patch_names.append(line.strip())
-            # Or lines like: "Author Name (N):" or "Author Name <email>:" (skip)
-            elif re.match(r'^[\w .\-()]+<.*>:', line):
+            # Lines like: "Author Name (N):" or "Author Name <email>:" (skip)
+            if _AUTHOR_LINE_RE.match(line):
                 continue
             # Or lines like: "    - fix ..." (for shortlog)
-            elif re.match(r'^\s*-\s+.+', line):
+            elif _SHORTLOG_ENTRY_RE.match(line):
                 patch_names.append(line.strip('- ').strip())
 
     return patch_names
@@ -796,13 +957,33 @@ def link_patch_names_to_emails(patch_names: List[str], email_data: dict) -> dict
     Returns:
         Dictionary mapping patch names to email IDs
     """
+    # lowercase every subject once and join them so each patch name is a
+    # single substring scan; subject_starts maps a hit back to its email
+    email_ids = list(email_data)
+    subjects = [(email.get('subject', '') or '').lower().replace('\0', ' ') for email in email_data.values()]
+    haystack = '\0'.join(subjects)
+    subject_starts = []
+    offset = 0
+    for subject in subjects:
+        subject_starts.append(offset)
+        offset += len(subject) + 1
+
+    matches_by_key = {}
     patch_links = {}
     for patch_name in patch_names:
-        patch_links[patch_name] = []
-        for email_id, email in email_data.items():
-            subject = email.get('subject', '').lower()
-            if patch_name.lower().split(':')[0] in subject:
-                patch_links[patch_name].append(email_id)
+        key = patch_name.lower().split(':')[0]
+        if key not in matches_by_key:
+            matched = []
+            pos = haystack.find(key) if email_ids else -1
+            while pos != -1:
+                index = bisect_right(subject_starts, pos) - 1
+                matched.append(email_ids[index])
+                # continue from the next subject so each email is listed once
+                if index + 1 >= len(subject_starts):
+                    break
+                pos = haystack.find(key, subject_starts[index + 1])
+            matches_by_key[key] = matched
+        patch_links[patch_name] = list(matches_by_key[key])
     return patch_links
 
 def find_and_map_git_pull_patches(email_data: dict) -> dict:
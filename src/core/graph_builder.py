@@ -6,10 +6,20 @@ of email relationships based on patch topics and thread relationships.
 """
 
 import networkx as nx
+import numpy as np
 import re
-from collections import defaultdict
+from collections import Counter, defaultdict
+from functools import lru_cache
 from typing import Dict, List, Tuple
-from .email_parser import parse_email_content, extract_patch_signature_improved, extract_temporal_info
+from .email_parser import (
+    parse_email_content, parse_email_batch, extract_patch_signature_improved,
+    extract_temporal_info, get_email_patch_signature
+)
+
+# Subject patterns shared by the patch graph builders, compiled once at import
+_VERSION_RE = re.compile(r'v(\d+)')
+_LINUX_VERSION_RE = re.compile(r'\[PATCH\s+([0-9.]+)\]')
+_SERIES_RE = re.compile(r'(\d+)/(\d+)')
 
 
 def _process_emails_and_create_nodes(emails: List[Tuple], G: nx.DiGraph) -> Tuple[Dict, Dict, Dict]:
@@ -29,10 +39,14 @@ def _process_emails_and_create_nodes(emails: List[Tuple], G: nx.DiGraph) -> Tupl
     
     print(f"Processing {len(emails)} emails and creating nodes...")
     
-    for email_id, title, url, html_content in emails:
+    # Parse email content into structured data, in parallel for large batches
+    parsed_results = parse_email_batch([email[3] for email in emails])
+    
+    for (email_id, title, url, html_content), (parsed_data, parse_error) in zip(emails, parsed_results):
+        if parse_error is not None:
+            print(f"Error processing email {email_id}: {parse_error}")
+            continue
         try:
-            # Parse email content into structured data
-            parsed_data = parse_email_content(html_content)
             email_data[email_id] = parsed_data
             
             # Extract temporal and versioning information
@@ -62,11 +76,11 @@ def _process_emails_and_create_nodes(emails: List[Tuple], G: nx.DiGraph) -> Tupl
                       merge_info=parsed_data['merge_info'])
             
             
-            # Group emails by normalized patch signature
-            if parsed_data['subject']:
-                patch_sig = extract_patch_signature_improved(parsed_data['subject'])
-                if patch_sig:
-                    patch_groups[patch_sig].append(email_id)
+            # Group emails by normalized patch signature, kept on the email for later passes
+            patch_sig = extract_patch_signature_improved(parsed_data['subject'])
+            parsed_data['patch_signature'] = patch_sig
+            if patch_sig:
+                patch_groups[patch_sig].append(email_id)
             
             # Group emails by thread/conversation
             for thread_msg in parsed_data['thread_messages']:
@@ -80,6 +94,20 @@ def _process_emails_and_create_nodes(emails: List[Tuple], G: nx.DiGraph) -> Tupl
     return email_data, patch_groups, thread_groups
 
 
+def _annotate_reply_flags(G: nx.DiGraph) -> None:
+    """
+    Mark every node with an 'is_reply' attribute in a single bulk pass.
+
+    Args:
+        G: NetworkX DiGraph whose nodes carry a 'subject' attribute
+    """
+    is_reply_map = {
+        nid: (nd.get('subject') or '')[:3].lower() == 're:'
+        for nid, nd in G.nodes(data=True)
+    }
+    nx.set_node_attributes(G, is_reply_map, 'is_reply')
+
+
 
 def _create_in_reply_to_edges(G: nx.DiGraph, email_data: Dict) -> int:
 
@@ -108,6 +136,11 @@ def _create_in_reply_to_edges(G: nx.DiGraph, email_data: Dict) -> int:
 def _create_patch_evolution_edges(G: nx.DiGraph, patch_groups: Dict) -> int:
     """
     Create edges representing patch evolution and series progression.
+
+    Node attributes are gathered once into parallel arrays and every group is
+    ordered with a single stable np.lexsort by (group, version, series position,
+    time), so consecutive pairs are classified with vectorized comparisons.
+    The sorted order is written back into patch_groups, as callers rely on it.
     
     Args:
         G: NetworkX DiGraph to add edges to
@@ -116,54 +149,64 @@ def _create_patch_evolution_edges(G: nx.DiGraph, patch_groups: Dict) -> int:
     Returns:
         Number of edges added
     """
-    edges_added = 0
-    
     print("Creating patch evolution edges...")
-    
-    for patch_sig, email_ids in patch_groups.items():
-        if len(email_ids) > 1:
-            # Sort emails by: version number, then series position, then time
-            email_ids.sort(key=lambda eid: (
-                G.nodes[eid]['version_num'],
-                G.nodes[eid]['series_position'],
-                G.nodes[eid]['chronological_order']
-            ))
-            
-            # Create directed edges showing evolution progression
-            for i in range(len(email_ids) - 1):
-                current_email = email_ids[i]
-                next_email = email_ids[i + 1]
-                
-                # Get version and series information for both emails
-                current_version = G.nodes[current_email]['version_num']
-                next_version = G.nodes[next_email]['version_num']
-                current_series = G.nodes[current_email]['series_position']
-                next_series = G.nodes[next_email]['series_position']
-                
-                # Determine the type of relationship based on version and series changes
-                if current_version < next_version:
-                    # Version evolution: v1 -> v2, v2 -> v3
-                    G.add_edge(current_email, next_email,
-                              relationship='patch_evolution',
-                              weight=2.0,
-                              evolution_type='version_upgrade')
-                    edges_added += 1
-                elif current_version == next_version and current_series < next_series:
-                    # Series progression: 1/7 -> 2/7 -> 3/7
-                    G.add_edge(current_email, next_email,
-                              relationship='patch_series',
-                              weight=1.5,
-                              evolution_type='series_progression')
-                    edges_added += 1
-                else:
-                    # Same topic discussion
-                    G.add_edge(current_email, next_email,
-                              relationship='same_patch_topic', 
-                              weight=1.0,
-                              evolution_type='discussion')
-                    edges_added += 1
-    
-    return edges_added
+
+    multi_groups = [email_ids for email_ids in patch_groups.values() if len(email_ids) > 1]
+    if not multi_groups:
+        return 0
+
+    group, version, series, chron, node_ids = [], [], [], [], []
+    for group_id, email_ids in enumerate(multi_groups):
+        for eid in email_ids:
+            node = G.nodes[eid]
+            group.append(group_id)
+            version.append(node['version_num'])
+            series.append(node['series_position'])
+            chron.append(node['chronological_order'])
+            node_ids.append(eid)
+
+    group = np.asarray(group, dtype=np.int64)
+    version = np.asarray(version, dtype=np.int64)
+    series = np.asarray(series, dtype=np.int64)
+    chron = np.asarray(chron, dtype=np.float64)
+
+    # lexsort is stable, so ties keep their original order just like list.sort
+    order = np.lexsort((chron, series, version, group))
+    group, version, series = group[order], version[order], series[order]
+    ids = [node_ids[i] for i in order.tolist()]
+
+    # write the sorted order back into each group list in place
+    bounds = np.flatnonzero(np.diff(group)) + 1
+    for email_ids, start, stop in zip(multi_groups,
+                                       [0, *bounds.tolist()],
+                                       [*bounds.tolist(), len(ids)]):
+        email_ids[:] = ids[start:stop]
+
+    same_group = (group[1:] == group[:-1]).tolist()
+    version_step = (version[1:] > version[:-1]).tolist()
+    series_step = ((version[1:] == version[:-1]) & (series[1:] > series[:-1])).tolist()
+
+    version_attrs = {'relationship': 'patch_evolution', 'weight': 2.0, 'evolution_type': 'version_upgrade'}
+    series_attrs = {'relationship': 'patch_series', 'weight': 1.5, 'evolution_type': 'series_progression'}
+    topic_attrs = {'relationship': 'same_patch_topic', 'weight': 1.0, 'evolution_type': 'discussion'}
+
+    edges = []
+    for i, in_group in enumerate(same_group):
+        if not in_group:
+            continue
+        if version_step[i]:
+            # Version evolution: v1 -> v2, v2 -> v3
+            attrs = version_attrs
+        elif series_step[i]:
+            # Series progression: 1/7 -> 2/7 -> 3/7
+            attrs = series_attrs
+        else:
+            # Same topic discussion
+            attrs = topic_attrs
+        edges.append((ids[i], ids[i + 1], attrs))
+
+    G.add_edges_from(edges)
+    return len(edges)
 
 
 def _create_thread_reply_edges(G: nx.DiGraph, thread_groups: Dict) -> int:
@@ -258,11 +301,8 @@ def _get_conversation_order_key(email_id: int, G: nx.DiGraph, email_data: Dict)
     """
     Create a sorting key that prioritizes logical conversation flow over strict timing.
     """
-    email = email_data.get(email_id, {})
-    subject = email.get('subject', '') or ''  # Handle None subjects
-    
     # Determine email type for ordering
-    is_reply = subject.lower().startswith('re:') if subject else False
+    is_reply = G.nodes[email_id].get('is_reply', False)
     is_patch = G.nodes[email_id].get('is_patch', False)
     version_num = G.nodes[email_id].get('version_num', 0) or 0
     series_position = G.nodes[email_id].get('series_position', 0) or 0
@@ -279,17 +319,11 @@ def _determine_discussion_relationship(current_id: int, next_id: int, G: nx.DiGr
     """
     Determine the specific type of discussion relationship for LLM context.
     """
-    current_email = email_data.get(current_id, {})
-    next_email = email_data.get(next_id, {})
-    
-    current_subject = current_email.get('subject', '') or ''  # Handle None subjects
-    next_subject = next_email.get('subject', '') or ''        # Handle None subjects
-    
     current_is_patch = G.nodes[current_id].get('is_patch', False)
     next_is_patch = G.nodes[next_id].get('is_patch', False)
     
-    current_is_reply = current_subject.lower().startswith('re:') if current_subject else False
-    next_is_reply = next_subject.lower().startswith('re:') if next_subject else False
+    current_is_reply = G.nodes[current_id].get('is_reply', False)
+    next_is_reply = G.nodes[next_id].get('is_reply', False)
     
     # Categorize the relationship type
     if current_is_patch and next_is_reply:
@@ -314,28 +348,30 @@ def _create_enhanced_discussion_edges(G: nx.DiGraph, email_data: Dict) -> int:
     
     print("Creating enhanced discussion flow edges...")
     
+    # Signatures are looked up once per node rather than once per (patch, node) pair
+    signatures = {nid: get_email_patch_signature(email_data.get(nid, {})) for nid in G.nodes()}
+    reply_signatures = [
+        (nid, signatures[nid]) for nid, nd in G.nodes(data=True)
+        if nd.get('is_reply', False) and signatures[nid]
+    ]
+    # first patch node (in node order) for each (version, signature)
+    patch_by_version = {}
+    for nid, nd in G.nodes(data=True):
+        if nd.get('is_patch', False) and signatures[nid]:
+            patch_by_version.setdefault((nd.get('version_num', 0), signatures[nid]), nid)
+    
     # Find patch-review-update cycles
     patch_nodes = [nid for nid in G.nodes() if G.nodes[nid].get('is_patch', False)]
     
     for patch_id in patch_nodes:
-        patch_email = email_data.get(patch_id, {})
-        patch_subject = patch_email.get('subject', '') or ''  # Handle None subjects
-        patch_signature = extract_patch_signature_improved(patch_subject)
+        patch_signature = signatures[patch_id]
         
         if not patch_signature:
             continue
         
         # Find replies to this patch
-        replies = []
-        for other_id in G.nodes():
-            other_email = email_data.get(other_id, {})
-            other_subject = other_email.get('subject', '') or ''  # Handle None subjects
-            
-            # Check if this is a reply to our patch
-            if other_subject and other_subject.lower().startswith('re:'):
-                other_signature = extract_patch_signature_improved(other_subject)
-                if other_signature and patch_signature in other_signature:
-                    replies.append(other_id)
+        replies = [other_id for other_id, other_signature in reply_signatures
+                   if patch_signature in other_signature]
         
         # Connect patch to its replies
         for reply_id in replies:
@@ -348,25 +384,17 @@ def _create_enhanced_discussion_edges(G: nx.DiGraph, email_data: Dict) -> int:
         
         # Find next version of this patch and connect via reviews
         next_version_num = G.nodes[patch_id].get('version_num', 0) + 1
+        other_id = patch_by_version.get((next_version_num, patch_signature))
         
-        for other_id in G.nodes():
-            if (G.nodes[other_id].get('version_num', 0) == next_version_num and
-                G.nodes[other_id].get('is_patch', False)):
-                
-                other_email = email_data.get(other_id, {})
-                other_subject = other_email.get('subject', '') or ''  # Handle None subjects
-                other_signature = extract_patch_signature_improved(other_subject)
-                
-                if other_signature and patch_signature == other_signature:
-                    # Connect through review chain: patch → reviews → next_patch
-                    for reply_id in replies:
-                        if not G.has_edge(reply_id, other_id):
-                            G.add_edge(reply_id, other_id,
-                                      relationship='review_to_update',
-                                      weight=1.5,
-                                      evolution_type='feedback_incorporation')
-                            edges_added += 1
-                    break
+        if other_id is not None:
+            # Connect through review chain: patch → reviews → next_patch
+            for reply_id in replies:
+                if not G.has_edge(reply_id, other_id):
+                    G.add_edge(reply_id, other_id,
+                              relationship='review_to_update',
+                              weight=1.5,
+                              evolution_type='feedback_incorporation')
+                    edges_added += 1
     
     return edges_added
 
@@ -383,14 +411,11 @@ def _print_evolution_statistics(G: nx.DiGraph) -> None:
     print(f"Edges (relationships): {G.number_of_edges()}")
     print(f"Connected components: {nx.number_weakly_connected_components(G)}")
     
-    # Analyze specific evolution patterns
-    evolution_edges = [(u, v) for u, v, d in G.edges(data=True) 
-                      if d.get('evolution_type') == 'version_upgrade']
-    series_edges = [(u, v) for u, v, d in G.edges(data=True) 
-                  if d.get('evolution_type') == 'series_progression']
+    # Analyze specific evolution patterns in one pass over the edges
+    evolution_counts = Counter(evolution_type for _, _, evolution_type in G.edges(data='evolution_type'))
     
-    print(f"Version evolution edges (v1→v2): {len(evolution_edges)}")
-    print(f"Series progression edges (4/7→5/7): {len(series_edges)}")
+    print(f"Version evolution edges (v1→v2): {evolution_counts['version_upgrade']}")
+    print(f"Series progression edges (4/7→5/7): {evolution_counts['series_progression']}")
 
 
 def create_basic_email_graph(emails: List[Tuple]) -> Tuple[nx.DiGraph, Dict, Dict]:
@@ -422,9 +447,12 @@ def create_basic_email_graph(emails: List[Tuple]) -> Tuple[nx.DiGraph, Dict, Dic
     print(f"Building basic graph from {len(emails)} emails...")
     
     # Step 1: Add all emails as nodes and collect grouping data
-    for email_id, title, url, html_content in emails:
+    parsed_results = parse_email_batch([email[3] for email in emails])
+    for (email_id, title, url, html_content), (parsed_data, parse_error) in zip(emails, parsed_results):
+        if parse_error is not None:
+            print(f"Error processing email {email_id}: {parse_error}")
+            continue
         try:
-            parsed_data = parse_email_content(html_content)
             email_data[email_id] = parsed_data
             
             # Add email as a node with basic attributes
@@ -436,11 +464,11 @@ def create_basic_email_graph(emails: List[Tuple]) -> Tuple[nx.DiGraph, Dict, Dic
                       is_patch=parsed_data['patch_info'] is not None,
                       patch_version=parsed_data['patch_info']['version'] if parsed_data['patch_info'] else None)
             
-            # Group by patch signature
-            if parsed_data['subject']:
-                patch_sig = extract_patch_signature_improved(parsed_data['subject'])
-                if patch_sig:
-                    patch_groups[patch_sig].append(email_id)
+            # Group by patch signature, kept on the email for later passes
+            patch_sig = extract_patch_signature_improved(parsed_data['subject'])
+            parsed_data['patch_signature'] = patch_sig
+            if patch_sig:
+                patch_groups[patch_sig].append(email_id)
             
             # Group by thread relationships
             for thread_msg in parsed_data['thread_messages']:
@@ -510,6 +538,7 @@ def create_evolution_graph(emails: List[Tuple]) -> Tuple[nx.DiGraph, Dict, Dict]
     
     # Step 1: Process all emails and create nodes with comprehensive attributes
     email_data, patch_groups, thread_groups = _process_emails_and_create_nodes(emails, G)
+    _annotate_reply_flags(G)
     
     # Step 2: Create sophisticated edges with proper temporal and version ordering
     patch_edges_added = _create_patch_evolution_edges(G, patch_groups)
@@ -532,6 +561,7 @@ def create_evolution_graph2(emails: List[Tuple]) -> Tuple[nx.DiGraph, Dict, Dict
     
     # Step 1: Process all emails and create nodes with comprehensive attributes
     email_data, patch_groups, thread_groups = _process_emails_and_create_nodes(emails, G)
+    _annotate_reply_flags(G)
 
     patch_edges_added = _create_patch_evolution_edges(G, patch_groups)
     thread_edges_added = _create_thread_reply_edges2(G, thread_groups, email_data)
@@ -642,19 +672,21 @@ def create_in_reply_to_graph(emails):
     return G, email_data
 
 
+@lru_cache(maxsize=131072)
 def extract_patch_sig_and_version(subject):
     """
     Extracts the patch signature and Linux version from the patch email subject.
     Also gets version, and series information for the patch thread.
+    Results are cached per subject since replies repeat the same subject line.
     """
     if subject is None:
         subject = ''
     patch_sig = extract_patch_signature_improved(subject)
-    version_match = re.search(r'v(\d+)', subject)
+    version_match = _VERSION_RE.search(subject)
     version_num = int(version_match.group(1)) if version_match else 1
-    linux_match = re.search(r'\[PATCH\s+([0-9.]+)\]', subject)
+    linux_match = _LINUX_VERSION_RE.search(subject)
     linux_version = linux_match.group(1) if linux_match else None
-    series_match = re.search(r'(\d+)/(\d+)', subject)
+    series_match = _SERIES_RE.search(subject)
     series_pos = int(series_match.group(1)) if series_match else None
     series_total = int(series_match.group(2)) if series_match else None
     return patch_sig, version_num, linux_version, series_pos, series_total
@@ -705,9 +737,9 @@ def _add_patch_nodes_and_metadata(G, emails):
         email_data[email_id] = parsed
         subject = parsed.get('subject', '')
         patch_sig = extract_patch_signature_improved(subject)
-        version_match = re.search(r'v(\d+)', subject)
+        version_match = _VERSION_RE.search(subject)
         version_num = int(version_match.group(1)) if version_match else 1
-        series_match = re.search(r'(\d+)/(\d+)', subject)
+        series_match = _SERIES_RE.search(subject)
         series_pos = int(series_match.group(1)) if series_match else None
         series_total = int(series_match.group(2)) if series_match else None
         is_patch = '[PATCH' in subject.upper()
@@ -719,23 +751,44 @@ def _add_patch_nodes_and_metadata(G, emails):
     return email_data, patch_nodes
 
 def _add_patch_evolution_and_series_edges_linux(G, patch_nodes):
-    for (patch_sig, linux_version), email_ids in patch_nodes.items():
-        # Sort by version, then series position
-        sorted_ids = sorted(email_ids, key=lambda eid: (
-            G.nodes[eid]['version_num'],
-            G.nodes[eid]['series_pos'] if G.nodes[eid]['series_pos'] is not None else 0
-        ))
-        for i in range(len(sorted_ids) - 1):
-            curr_id = sorted_ids[i]
-            next_id = sorted_ids[i + 1]
-            curr_ver = G.nodes[curr_id]['version_num']
-            next_ver = G.nodes[next_id]['version_num']
-            curr_series = G.nodes[curr_id]['series_pos']
-            next_series = G.nodes[next_id]['series_pos']
-            if next_ver > curr_ver:
-                G.add_edge(curr_id, next_id, relationship='version_evolution', weight=2.0)
-            elif next_series and curr_series and next_series > curr_series and curr_ver == next_ver:
-                G.add_edge(curr_id, next_id, relationship='series_progression', weight=1.5)
+    """
+    Link consecutive versions and series parts within each (patch_sig, linux_version) group.
+
+    The groups are flattened into parallel arrays and sorted once with np.lexsort
+    by (group, version, series position), so adjacent pairs can be compared with
+    vectorized masks instead of per-node attribute lookups.
+    """
+    group, version, series, node_ids = [], [], [], []
+    for group_id, email_ids in enumerate(patch_nodes.values()):
+        for eid in email_ids:
+            node = G.nodes[eid]
+            group.append(group_id)
+            version.append(node['version_num'])
+            series.append(node['series_pos'] if node['series_pos'] is not None else 0)
+            node_ids.append(eid)
+
+    if len(node_ids) < 2:
+        return
+
+    group = np.asarray(group, dtype=np.int64)
+    version = np.asarray(version, dtype=np.int64)
+    series = np.asarray(series, dtype=np.int64)
+
+    # lexsort is stable, so ties keep their original insertion order
+    order = np.lexsort((series, version, group))
+    group, version, series = group[order], version[order], series[order]
+    ids = np.asarray(node_ids, dtype=object)[order]
+
+    same_group = group[1:] == group[:-1]
+    version_step = same_group & (version[1:] > version[:-1])
+    series_step = (same_group & (version[1:] == version[:-1]) &
+                   (series[:-1] > 0) & (series[1:] > series[:-1]))
+
+    src, dst = ids[:-1], ids[1:]
+    G.add_edges_from(zip(src[version_step].tolist(), dst[version_step].tolist()),
+                     relationship='version_evolution', weight=2.0)
+    G.add_edges_from(zip(src[series_step].tolist(), dst[series_step].tolist()),
+                     relationship='series_progression', weight=1.5)
 
 def _add_reply_edges(G, email_data):
     # Connect replies only to their direct parent
@@ -750,6 +803,7 @@ def _add_reply_edges(G, email_data):
 def create_patch_evolution_graph_linux(emails):
     G = nx.DiGraph()
     email_data, patch_nodes = _add_patch_nodes_linux(G, emails)
+    _annotate_reply_flags(G)
     _add_patch_evolution_and_series_edges_linux(G, patch_nodes)
     _add_reply_edges(G, email_data)
     print(f"Created patch evolution graph (with Linux version) with {len(G.nodes())} nodes and {len(G.edges())} edges")
@@ -758,21 +812,22 @@ def create_patch_evolution_graph_linux(emails):
 
 
 def _add_version_evolution_edges(G, patch_nodes):
-    for (patch_sig, linux_version, version_num), email_id in patch_nodes.items():
-        # Find all patch nodes with the same signature and linux_version
-        patch_versions = []
-        for node_id in G.nodes:
-            node = G.nodes[node_id]
-            if (node.get('patch_signature') == patch_sig and
-                node.get('linux_version') == linux_version and
-                node_id != email_id and
-                not node['subject'].lower().startswith('re:')):
-                patch_versions.append((node.get('version_num', 1), node_id))
-        patch_versions.append((G.nodes[email_id].get('version_num', 1), email_id))
+    """
+    Chain the root patch emails of each (patch_signature, linux_version) pair by version.
+
+    Candidates are bucketed in a single pass over the graph instead of rescanning
+    every node for every patch key.
+    """
+    wanted = {(patch_sig, linux_version) for patch_sig, linux_version, _ in patch_nodes}
+    versions_by_key = defaultdict(list)
+    for node_id, node in G.nodes(data=True):
+        key = (node.get('patch_signature'), node.get('linux_version'))
+        if key in wanted and not node['is_reply']:
+            versions_by_key[key].append((node.get('version_num', 1), node_id))
+
+    for patch_versions in versions_by_key.values():
         patch_versions.sort()
-        for i in range(len(patch_versions) - 1):
-            v1_id = patch_versions[i][1]
-            v2_id = patch_versions[i+1][1]
+        for (_, v1_id), (_, v2_id) in zip(patch_versions, patch_versions[1:]):
             if not G.has_edge(v1_id, v2_id):
                 G.add_edge(v1_id, v2_id, relationship='version_evolution', weight=2.0)
 
@@ -792,6 +847,7 @@ def _add_patch_edges(G, email_data, patch_nodes):
 def create_patch_name_version_graph(emails):
     G = nx.DiGraph()
     email_data, patch_nodes = _add_patch_nodes(G, emails)
+    _annotate_reply_flags(G)
     _add_patch_edges(G, email_data, patch_nodes)
     _add_version_evolution_edges(G, patch_nodes)
     print(f"Created patch name/version graph with {len(G.nodes())} nodes and {len(G.edges())} edges")
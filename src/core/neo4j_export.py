@@ -9,6 +9,8 @@ from typing import Dict, Tuple
 import networkx as nx
 from neo4j import GraphDatabase
 
+MAX_MESSAGE_BODY_CHARS = 5000
+
 
 def query_patch_evolution(uri: str = "bolt://localhost:7687", user: str = "neo4j", password: str = "password") -> None:
     """
@@ -47,6 +49,56 @@ def query_patch_evolution(uri: str = "bolt://localhost:7687", user: str = "neo4j
     driver.close()
 
 
+def _truncate_message_body(message_body, limit: int = MAX_MESSAGE_BODY_CHARS) -> str:
+    """
+    Cap the message body sent over Bolt. Bytes bodies are sliced before decoding
+    so only the kept prefix is ever decoded.
+    """
+    if not message_body:
+        return ''
+    if isinstance(message_body, (bytes, bytearray, memoryview)):
+        raw = memoryview(message_body)
+        if len(raw) > limit:
+            return bytes(raw[:limit]).decode('utf-8', 'replace') + "... [TRUNCATED]"
+        return bytes(raw).decode('utf-8', 'replace')
+    if len(message_body) > limit:
+        return message_body[:limit] + "... [TRUNCATED]"
+    return message_body
+
+
+def _create_relationships(session, rows) -> None:
+    """
+    Create all relationships in one parameterized UNWIND statement.
+
+    apoc.create.relationship takes the relationship type as a parameter, so every
+    edge type shares one cached query plan. Falls back to one UNWIND per type when
+    APOC is not installed on the server.
+    """
+    if not rows:
+        return
+    try:
+        session.run("""
+            UNWIND $rows AS row
+            MATCH (source:Email {id: row.source}), (target:Email {id: row.target})
+            CALL apoc.create.relationship(source, row.rel_type,
+                {weight: row.weight, evolution_type: row.evolution_type}, target) YIELD rel
+            RETURN count(rel)
+        """, {'rows': rows}).consume()
+        return
+    except Exception as e:
+        print(f"APOC relationship creation unavailable, grouping by type: {e}")
+
+    rows_by_type = {}
+    for row in rows:
+        rows_by_type.setdefault(row['rel_type'], []).append(row)
+    for rel_type, typed_rows in rows_by_type.items():
+        session.run(f"""
+            UNWIND $rows AS row
+            MATCH (source:Email {{id: row.source}}), (target:Email {{id: row.target}})
+            CREATE (source)-[r:{rel_type} {{weight: row.weight, evolution_type: row.evolution_type}}]->(target)
+        """, {'rows': typed_rows})
+
+
 def export_connected_subgraph_to_neo4j(
         G: nx.DiGraph, 
         email_data: Dict, 
@@ -107,14 +159,11 @@ def export_connected_subgraph_to_neo4j(
     
     print(f"Final selection: {len(nodes_to_include)} nodes from {components_included} components")
     
-    # Create subgraph (same as visualization)
-    subgraph = G.subgraph(nodes_to_include).copy()
-    
-    # Remove self-loops (same as visualization)
-    self_loops = list(nx.selfloop_edges(subgraph))
-    subgraph.remove_edges_from(self_loops)
+    # Read-only subgraph view; self-loops are skipped while exporting edges
+    subgraph = G.subgraph(nodes_to_include)
+    edge_count = sum(1 for source, target in subgraph.edges() if source != target)
     
-    print(f"Final subgraph: {subgraph.number_of_nodes()} nodes, {subgraph.number_of_edges()} edges")
+    print(f"Final subgraph: {subgraph.number_of_nodes()} nodes, {edge_count} edges")
     
     # Show the actual components we're including
     subgraph_components = list(nx.weakly_connected_components(subgraph))
@@ -135,6 +184,15 @@ def export_connected_subgraph_to_neo4j(
         
         # Drop existing indexes to avoid conflicts
         print("Dropping existing indexes...")
+        # Bulk-load pattern: drop the id index, load the nodes, then rebuild it once
+        # before the relationship MATCHes need it. The uniqueness constraint is only
+        # dropped (and recreated) on a clearing export; an append keeps it in force.
+        if clear_existing:
+            try:
+                session.run("DROP CONSTRAINT email_id IF EXISTS")
+            except:
+                pass  # Older servers use a different syntax
+        
         try:
             session.run("DROP INDEX ON :Email(id)")
         except:
@@ -147,19 +205,15 @@ def export_connected_subgraph_to_neo4j(
         
         print("Creating nodes...")
         # Create nodes from the connected subgraph
+        node_rows = []
         for node_id in subgraph.nodes():
             node_data = G.nodes[node_id]
             email = email_data.get(node_id, {})
             
-            # Get message body (the actual email content)
-            message_body = email.get('message_body', '')
+            # Get message body (the actual email content), truncating very long messages
+            message_body = _truncate_message_body(email.get('message_body', ''))
             
-            # Truncate very long messages
-            if len(message_body) > 5000:
-                message_body = message_body[:5000] + "... [TRUNCATED]"
-            
-            # Create Cypher parameters
-            params = {
+            node_rows.append({
                 'id': node_id,
                 'subject': node_data.get('subject', ''),
                 'author': node_data.get('author', ''),
@@ -172,54 +226,55 @@ def export_connected_subgraph_to_neo4j(
                 'series_position': node_data.get('series_position', 0),
                 'series_total': node_data.get('series_total', 0),
                 'message_body': message_body
-            }
-            
-            # Create Email node
-            session.run("""
-                CREATE (e:Email {
-                    id: $id,
-                    subject: $subject,
-                    author: $author,
-                    date: $date,
-                    url: $url,
-                    is_patch: $is_patch,
-                    patch_version: $patch_version,
-                    version_num: $version_num,
-                    series_info: $series_info,
-                    series_position: $series_position,
-                    series_total: $series_total,
-                    message_body: $message_body
-                })
-            """, params)
+            })
         
-        print("Creating relationships...")
-        # Create ALL relationships from the subgraph (this preserves connectivity)
-        for source, target, edge_data in subgraph.edges(data=True):
-            relationship = edge_data.get('relationship', 'RELATED')
-            evolution_type = edge_data.get('evolution_type', '')
-            weight = edge_data.get('weight', 1.0)
-            
-            # Format relationship type for Neo4j
-            rel_type = relationship.upper().replace(' ', '_')
-            
-            session.run(f"""
-                MATCH (source:Email {{id: $source}}), (target:Email {{id: $target}})
-                CREATE (source)-[r:{rel_type} {{weight: $weight, evolution_type: $evolution_type}}]->(target)
-            """, {
-                'source': source,
-                'target': target,
-                'weight': weight,
-                'evolution_type': evolution_type
+        # Create all Email nodes in one statement
+        session.run("""
+            UNWIND $rows AS row
+            CREATE (e:Email {
+                id: row.id,
+                subject: row.subject,
+                author: row.author,
+                date: row.date,
+                url: row.url,
+                is_patch: row.is_patch,
+                patch_version: row.patch_version,
+                version_num: row.version_num,
+                series_info: row.series_info,
+                series_position: row.series_position,
+                series_total: row.series_total,
+                message_body: row.message_body
             })
+        """, {'rows': node_rows})
         
-        # Add index for performance (with error handling)
+        # Rebuild the id index now that the nodes are loaded (with error handling)
         print("Creating index...")
         try:
-            session.run("CREATE INDEX FOR (e:Email) ON (e.id)")
+            if clear_existing:
+                session.run("CREATE CONSTRAINT email_id IF NOT EXISTS FOR (e:Email) REQUIRE e.id IS UNIQUE")
+            else:
+                session.run("CREATE INDEX FOR (e:Email) ON (e.id)")
             print("Index created successfully")
         except Exception as e:
             print(f"Index creation failed (might already exist): {e}")
         
+        print("Creating relationships...")
+        # Create ALL relationships from the subgraph (this preserves connectivity)
+        relationship_rows = []
+        for source, target, edge_data in subgraph.edges(data=True):
+            if source == target:
+                continue
+            relationship = edge_data.get('relationship', 'RELATED')
+            relationship_rows.append({
+                'source': source,
+                'target': target,
+                # Format relationship type for Neo4j
+                'rel_type': relationship.upper().replace(' ', '_'),
+                'weight': edge_data.get('weight', 1.0),
+                'evolution_type': edge_data.get('evolution_type', '')
+            })
+        _create_relationships(session, relationship_rows)
+        
         # Verify the export
         result = session.run("MATCH (n:Email) RETURN count(n) as nodes")
         node_count = result.single()["nodes"]
@@ -3,26 +3,73 @@ import re
 import os
 import csv
 
+try:
+    from lxml import etree, html as lxml_html
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+
+def _collapse_blank_lines(text: str) -> str:
+    """
+    Collapse runs of newlines into one, like re.sub(r'\n+', '\n', text). str.replace
+    and the '\n\n' scan run in C without regex overhead, and a body with no blank
+    lines is returned after a single scan.
+    """
+    while '\n\n' in text:
+        text = text.replace('\n\n', '\n')
+    return text
+
+
+def _lxml_plaintext(html_content: str) -> str:
+    """
+    lxml version of the BeautifulSoup extraction below: <br> becomes a line
+    break, <p> starts a new line, script/style text is dropped and text nodes
+    are joined with newlines.
+    """
+    tree = lxml_html.fromstring(html_content)
+    etree.strip_elements(tree, 'script', 'style', with_tail=False)
+    for br in tree.iter('br'):
+        br.tail = '\n' + (br.tail or '')
+    for p in tree.iter('p'):
+        previous = p.getprevious()
+        if previous is not None:
+            previous.tail = (previous.tail or '') + '\n'
+        elif p.getparent() is not None:
+            p.getparent().text = (p.getparent().text or '') + '\n'
+    return '\n'.join(tree.itertext())
+
+
 def get_plaintext_body(html_content: str) -> str:
+    # no tags or entities means BeautifulSoup would hand the text back unchanged
+    if '<' not in html_content and '&' not in html_content:
+        return _collapse_blank_lines(html_content).strip()
+    if LXML_AVAILABLE:
+        try:
+            return _collapse_blank_lines(_lxml_plaintext(html_content)).strip()
+        except (etree.ParserError, ValueError):
+            pass  # e.g. an encoding declaration or nothing parseable; use BeautifulSoup
     soup = BeautifulSoup(html_content, "html.parser")
     for br in soup.find_all("br"):
         br.replace_with("\n")
     for p in soup.find_all("p"):
         p.insert_before("\n")
     text = soup.get_text("\n")
-    text = re.sub(r'\n+', '\n', text)
+    text = _collapse_blank_lines(text)
     return text.strip()
 
-def get_best_email_body(html_content: str, parse_email_content_func=None) -> str:
+def get_best_email_body(html_content: str, parse_email_content_func=None, parsed: dict = None) -> str:
+    # pass parsed when parse_email_content has already run on html_content, so it is not parsed again
     if not html_content:
         return ""
-    body = ""
-    if parse_email_content_func:
+    if parsed is None and parse_email_content_func:
         parsed = parse_email_content_func(html_content)
+    if parsed is not None:
         body = parsed.get('message_body', '') or ''
-    if not body or body.count('\n') < 5 or len(body.splitlines()) <= 1:
-        body = get_plaintext_body(html_content)
-    return body
+        # a multi-line parsed body is good enough, skip the HTML fallback
+        if body.count('\n') >= 5:
+            return body
+    return get_plaintext_body(html_content)
 
 
 def clean_csv_final_report(input_path: str, output_path: str = None, remove_not_found: bool = True):
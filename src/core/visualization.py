@@ -7,6 +7,180 @@ using Pyvis for interactive web-based visualizations.
 
 import networkx as nx
 from pyvis.network import Network
+from pyvis.node import Node
+from pyvis.edge import Edge
+
+try:
+    import pydot  # used by nx.nx_pydot for graphviz 'dot' layouts
+    PYDOT_AVAILABLE = True
+except ImportError:
+    PYDOT_AVAILABLE = False
+
+try:
+    from scipy.sparse.csgraph import connected_components
+    SCIPY_AVAILABLE = True
+except ImportError:
+    SCIPY_AVAILABLE = False
+
+# horizontal gap between laid-out components
+COMPONENT_MARGIN = 200
+
+
+def _sorted_weak_components(G):
+    """
+    Weakly connected components of G, largest first.
+
+    Uses scipy's C implementation over the adjacency matrix when available.
+    The result is cached on G.graph keyed by node/edge counts so repeated
+    visualization calls on the same graph reuse it.
+    """
+    cache_key = (G.number_of_nodes(), G.number_of_edges())
+    cached = G.graph.get('_cc_cache')
+    if cached is not None and cached[0] == cache_key:
+        return cached[1]
+    
+    if SCIPY_AVAILABLE and G.number_of_nodes() > 0:
+        node_list = list(G.nodes())
+        adjacency = nx.to_scipy_sparse_array(G, nodelist=node_list, weight=None, format='csr')
+        n_components, labels = connected_components(adjacency, directed=True, connection='weak')
+        components = [set() for _ in range(n_components)]
+        for node, label in zip(node_list, labels):
+            components[label].add(node)
+    else:
+        components = list(nx.weakly_connected_components(G))
+    components.sort(key=len, reverse=True)
+    
+    G.graph['_cc_cache'] = (cache_key, components)
+    return components
+
+
+def _layout_component(subgraph):
+    """
+    Lay out a single connected component, left to right when graphviz is available.
+    """
+    if PYDOT_AVAILABLE:
+        try:
+            pos = nx.nx_pydot.graphviz_layout(subgraph, prog='dot')
+            # rotate dot's top-to-bottom ranks into left-to-right
+            return {node: (-y, x) for node, (x, y) in pos.items()}
+        except Exception:
+            pass  # graphviz binaries not installed, fall back to spring layout
+    return nx.spring_layout(subgraph, seed=42, iterations=50, scale=100 * len(subgraph) ** 0.5)
+
+
+def _tile_component_layouts(G, components):
+    """
+    Lay out each component on its own and place the bounding boxes side by side.
+
+    Laying out components individually is far cheaper than one layout (or a
+    browser-side hierarchical layout) over every node at once.
+    
+    Args:
+        G: NetworkX graph
+        components: Node sets to lay out, in display order
+        
+    Returns:
+        Dictionary mapping node -> (x, y)
+    """
+    positions = {}
+    cursor_x = 0.0
+    for component in components:
+        pos = _layout_component(G.subgraph(component))
+        xs = [x for x, _ in pos.values()]
+        ys = [y for _, y in pos.values()]
+        min_x, max_x, min_y = min(xs), max(xs), min(ys)
+        for node, (x, y) in pos.items():
+            positions[node] = (float(x - min_x + cursor_x), float(y - min_y))
+        cursor_x += (max_x - min_x) + COMPONENT_MARGIN
+    return positions
+
+
+# physics/fit controls added to the evolution graph page
+EVOLUTION_TOOLBAR_HTML = '''
+        <div style="position: fixed; top: 10px; right: 10px; background: rgba(0,0,0,0.8); padding: 10px; border-radius: 5px;">
+            <button onclick="togglePhysics()" style="background: #4CAF50; color: white; border: none; padding: 8px 16px; border-radius: 4px; cursor: pointer;">
+                Toggle Physics
+            </button>
+            <button onclick="fitNetwork()" style="background: #2196F3; color: white; border: none; padding: 8px 16px; border-radius: 4px; cursor: pointer; margin-left: 5px;">
+                Fit View
+            </button>
+        </div>
+        <script>
+            function togglePhysics() {
+                var enabled = network.physics.physicsEnabled;
+                network.setOptions({physics: {enabled: !enabled}});
+                console.log("Physics " + (enabled ? "disabled" : "enabled"));
+            }
+            function fitNetwork() {
+                network.fit();
+            }
+        </script>
+'''
+
+
+class _ToolbarNetwork(Network):
+    """
+    Pyvis network that injects extra HTML before </body> as the page is generated.
+
+    Assigning net.html before save_graph has no effect, since save_graph
+    regenerates the page from the template.
+    """
+    def __init__(self, *args, toolbar_html='', **kwargs):
+        super().__init__(*args, **kwargs)
+        self.toolbar_html = toolbar_html
+
+    def generate_html(self, *args, **kwargs):
+        html = super().generate_html(*args, **kwargs)
+        if self.toolbar_html:
+            head, sep, tail = html.rpartition('</body>')
+            if sep:
+                html = head + self.toolbar_html + sep + tail
+        self.html = html
+        return html
+
+
+def _add_elements_in_bulk(net, nodes, edges):
+    """
+    Fill a Pyvis network from prepared node and edge lists.
+
+    net.add_node/net.add_edge check every id against plain lists, which is
+    quadratic for large graphs. The NetworkX graph already guarantees unique
+    node ids, so the vis.js dicts are built directly with the same Node/Edge
+    classes Pyvis uses.
+    
+    Args:
+        net: Pyvis Network
+        nodes: List of (node_id, options) pairs
+        edges: List of (source, target, options) triples
+    """
+    if not hasattr(net, 'node_map'):
+        # older pyvis without the internal node map, use the public API
+        for node_id, options in nodes:
+            net.add_node(node_id, **options)
+        for source, target, options in edges:
+            net.add_edge(source, target, **options)
+        return
+
+    for node_id, options in nodes:
+        options = dict(options)
+        shape = options.pop('shape', 'dot')
+        label = options.pop('label', None) or node_id
+        if 'group' not in options:
+            options.setdefault('color', '#97c2fc')
+        node = Node(node_id, shape, label=label, font_color=net.font_color, **options)
+        net.nodes.append(node.options)
+        net.node_ids.append(node_id)
+        net.node_map[node_id] = node.options
+
+    # undirected networks keep only the first edge between a pair of nodes
+    seen_pairs = set()
+    for source, target, options in edges:
+        if not net.directed:
+            pair = frozenset((source, target))
+            if pair in seen_pairs:
+                continue
+            seen_pairs.add(pair)
+        net.edges.append(Edge(source, target, net.directed, **options).options)
 
 
 def visualize_basic_graph(G, email_data, component_limit=5):
@@ -18,14 +192,13 @@ def visualize_basic_graph(G, email_data, component_limit=5):
         email_data: Dictionary of email data
         component_limit: Maximum number of components to include
     """
-    components = list(nx.weakly_connected_components(G))
-    components.sort(key=len, reverse=True)
+    components = _sorted_weak_components(G)
     
     # Create a new graph with only the largest components
+    included_components = [c for c in components[:component_limit] if len(c) > 1]
     nodes_to_include = set()
-    for component in components[:component_limit]:
-        if len(component) > 1:
-            nodes_to_include.update(component)
+    for component in included_components:
+        nodes_to_include.update(component)
     
     # Create subgraph
     subgraph = G.subgraph(nodes_to_include)
@@ -33,7 +206,12 @@ def visualize_basic_graph(G, email_data, component_limit=5):
     # Create Pyvis network
     net = Network(height="600px", width="100%", bgcolor="#222222", font_color="white")
     
+    # Precompute the layout once in Python so the browser does not run a
+    # force simulation on load
+    pos = _tile_component_layouts(G, included_components)
+    
     # Add nodes
+    nodes = []
     for node in subgraph.nodes():
         email = email_data.get(node, {})
         subject = email.get('subject', f'Email {node}')
@@ -44,30 +222,37 @@ def visualize_basic_graph(G, email_data, component_limit=5):
         color = "#4CAF50" if is_patch else "#FF9800"
         size = 25 if is_patch else 15
         
-        net.add_node(node, 
-                    label=str(node),
-                    title=f"Subject: {subject}\nAuthor: {author}",
-                    color=color,
-                    size=size)
+        nodes.append((node, {
+            'label': str(node),
+            'title': f"Subject: {subject}\nAuthor: {author}",
+            'color': color,
+            'size': size,
+            'x': float(pos[node][0]),
+            'y': float(pos[node][1]),
+            'physics': False
+        }))
     
     # Add edges
+    edges = []
     for edge in subgraph.edges():
         relationship = G.edges[edge].get('relationship', 'related')
         weight = G.edges[edge].get('weight', 1.0)
         
         color = "#00FF00" if relationship == 'same_patch_topic' else "#0080FF"
         
-        net.add_edge(edge[0], edge[1], 
-                    title=relationship,
-                    color=color,
-                    width=weight*3)
+        edges.append((edge[0], edge[1], {
+            'title': relationship,
+            'color': color,
+            'width': weight*3
+        }))
+    
+    _add_elements_in_bulk(net, nodes, edges)
     
-    # Configure physics
+    # Positions are precomputed, so physics stays off
     net.set_options("""
     {
         "physics": {
-            "enabled": true,
-            "stabilization": {"iterations": 100}
+            "enabled": false
         }
     }
     """)
@@ -87,8 +272,7 @@ def visualize_evolution_graph(G, email_data, component_limit=10, max_nodes=200,
         component_limit: Maximum number of components to include
         max_nodes: Maximum number of nodes to include
     """
-    components = list(nx.weakly_connected_components(G))
-    components.sort(key=len, reverse=True)
+    components = _sorted_weak_components(G)
     
     # Filter to components with multiple nodes
     multi_node_components = [c for c in components if len(c) > 1]
@@ -100,60 +284,62 @@ def visualize_evolution_graph(G, email_data, component_limit=10, max_nodes=200,
     print(f"Found {len(multi_node_components)} components with evolution potential")
     
     # Select components and prioritize those with version evolution
-    selected_components = []
-    for component in multi_node_components[:component_limit]:
-        # Check if this component has version evolution
-        component_nodes = list(component)
-        has_evolution = any(
-            G.nodes[node].get('version_num', 0) > 1 
-            for node in component_nodes
-        )
-        
-        if has_evolution:
-            selected_components.insert(0, component)
-        else:
-            selected_components.append(component)
+    candidate_components = multi_node_components[:component_limit]
+    has_evolution = {
+        id(component): any(G.nodes[node].get('version_num', 0) > 1 for node in component)
+        for component in candidate_components
+    }
+    selected_components = sorted(
+        candidate_components,
+        key=lambda component: (not has_evolution[id(component)], -len(component))
+    )
     
     nodes_to_include = set()
-    for component in selected_components:
+    included_components = []
+    node_to_component = {}
+    for i, component in enumerate(selected_components):
         if len(nodes_to_include) + len(component) <= max_nodes:
             nodes_to_include.update(component)
+            included_components.append(component)
+            for node in component:
+                node_to_component[node] = i
         else:
             break
     
     print(f"Including {len(nodes_to_include)} nodes from {len(selected_components)} components")
     
-    subgraph = G.subgraph(nodes_to_include).copy()
-    self_loops = list(nx.selfloop_edges(subgraph))
-    subgraph.remove_edges_from(self_loops)
+    # read-only view; self-loops are skipped when edges are emitted below
+    subgraph = G.subgraph(nodes_to_include)
+    edge_count = sum(1 for u, v in subgraph.edges() if u != v)
     
-    print(f"Visualizing {subgraph.number_of_nodes()} nodes and {subgraph.number_of_edges()} edges")
+    print(f"Visualizing {subgraph.number_of_nodes()} nodes and {edge_count} edges")
     
-    net = Network(
+    net = _ToolbarNetwork(
         height="900px", 
         width="100%", 
         bgcolor="#1a1a1a", 
         font_color="white",
-        directed=True
+        directed=True,
+        toolbar_html=EVOLUTION_TOOLBAR_HTML
     )
     
     component_colors = ["#4CAF50", "#2196F3", "#FF9800", "#9C27B0", "#F44336", 
                        "#00BCD4", "#FFEB3B", "#795548", "#607D8B", "#E91E63"]
-    node_to_component = {}
-    for i, component in enumerate(selected_components):
-        for node in component:
-            if node in nodes_to_include:
-                node_to_component[node] = i
     
-    for node in subgraph.nodes():
-        email = email_data.get(node, {})
+    nodes = []
+    pos = _tile_component_layouts(G, included_components)
+    # pull node attributes and email data out once, then walk them in parallel
+    node_ids = list(subgraph.nodes())
+    node_attrs = [G.nodes[node] for node in node_ids]
+    emails = [email_data.get(node, {}) for node in node_ids]
+    for node, attrs, email in zip(node_ids, node_attrs, emails):
         subject = email.get('subject', f'Email {node}')[:40] + "..."
         author = email.get('from_author', 'Unknown')[:15]
         
-        is_patch = G.nodes[node].get('is_patch', False)
-        patch_version = G.nodes[node].get('patch_version', '')
-        version_num = G.nodes[node].get('version_num', 0)
-        series_info = G.nodes[node].get('series_info', '')
+        is_patch = attrs.get('is_patch', False)
+        patch_version = attrs.get('patch_version', '')
+        version_num = attrs.get('version_num', 0)
+        series_info = attrs.get('series_info', '')
         component_idx = node_to_component.get(node, 0)
         base_color = component_colors[component_idx % len(component_colors)]
         
@@ -191,17 +377,20 @@ def visualize_evolution_graph(G, email_data, component_limit=10, max_nodes=200,
                 f"Series: {series_info}" if series_info else "Series: Standalone"
             ])
         
-        net.add_node(
-            node, 
-            label=label,
-            title="\n".join(title_parts),
-            color=color,
-            size=size,
-            shape=shape,
-            font={"size": 10, "color": "white"}
-        )
+        nodes.append((node, {
+            'label': label,
+            'title': "\n".join(title_parts),
+            'color': color,
+            'size': size,
+            'shape': shape,
+            'font': {"size": 10, "color": "white"},
+            'x': pos[node][0],
+            'y': pos[node][1],
+            'physics': False
+        }))
     
     # Add edges with evolution-aware styling
+    edges = []
     for edge in subgraph.edges():
         if edge[0] != edge[1]:
             relationship = G.edges[edge].get('relationship', 'related')
@@ -230,33 +419,21 @@ def visualize_evolution_graph(G, email_data, component_limit=10, max_nodes=200,
                 arrows = {"to": {"enabled": True, "scaleFactor": 1}}
                 edge_title = f"Discussion: {relationship}"
             
-            net.add_edge(
-                edge[0], edge[1], 
-                title=edge_title,
-                color=color,
-                width=width,
-                arrows=arrows
-            )
+            edges.append((edge[0], edge[1], {
+                'title': edge_title,
+                'color': color,
+                'width': width,
+                'arrows': arrows
+            }))
     
-    # Fixed layout configuration
+    _add_elements_in_bulk(net, nodes, edges)
+    
+    # Fixed layout configuration, positions come from _tile_component_layouts
     net.set_options("""
     {
         "physics": {
             "enabled": false
         },
-        "layout": {
-            "hierarchical": {
-                "enabled": true,
-                "direction": "LR",
-                "sortMethod": "directed",
-                "levelSeparation": 400,
-                "nodeSpacing": 250,
-                "treeSpacing": 350,
-                "blockShifting": true,
-                "edgeMinimization": true,
-                "parentCentralization": true
-            }
-        },
         "interaction": {
             "dragNodes": true,
             "dragView": true,
@@ -273,29 +450,5 @@ def visualize_evolution_graph(G, email_data, component_limit=10, max_nodes=200,
     }
     """)
     
-    net.html = net.html.replace(
-        '</body>',
-        '''
-        <div style="position: fixed; top: 10px; right: 10px; background: rgba(0,0,0,0.8); padding: 10px; border-radius: 5px;">
-            <button onclick="togglePhysics()" style="background: #4CAF50; color: white; border: none; padding: 8px 16px; border-radius: 4px; cursor: pointer;">
-                Toggle Physics
-            </button>
-            <button onclick="fitNetwork()" style="background: #2196F3; color: white; border: none; padding: 8px 16px; border-radius: 4px; cursor: pointer; margin-left: 5px;">
-                Fit View
-            </button>
-        </div>
-        <script>
-            function togglePhysics() {
-                var enabled = network.physics.physicsEnabled;
-                network.setOptions({physics: {enabled: !enabled}});
-                console.log("Physics " + (enabled ? "disabled" : "enabled"));
-            }
-            function fitNetwork() {
-                network.fit();
-            }
-        </script>
-        </body>'''
-    )
-    
     net.save_graph(output_file)
     print(f"Patch evolution graph saved as '{output_file}'")
\ No newline at end of file
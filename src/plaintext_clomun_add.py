@@ -1,5 +1,6 @@
-from analysis.git_pull_case_study import get_best_email_body
+from core.utils import get_best_email_body
 import sqlite3
+from concurrent.futures import ProcessPoolExecutor
 from tqdm import tqdm
 
 
@@ -26,32 +27,78 @@ def add_text_column_to_db(db_path):
 def batch_update_plaintext_body(db_path):
     conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
+    # WAL with synchronous=NORMAL makes the per-batch commit cheap (no fsync per commit)
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA cache_size=-200000")
+    # partial index over the rows still missing a body, so the batch SELECT does not scan the table
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_plaintext_null ON mails(id) WHERE plaintext_body IS NULL OR plaintext_body = ''"
+    )
+
+    # plaintexts are staged in a narrow shadow table keyed by id, so the parse pass
+    # only writes small rows and an interrupted run resumes where it stopped;
+    # the copy into the wide mails rows happens afterwards, in id ranges
+    cursor.execute("CREATE TABLE IF NOT EXISTS mails_plaintext (id INTEGER PRIMARY KEY, body TEXT)")
+    conn.commit()
+
+    pending_sql = """
+        FROM mails m
+        LEFT JOIN mails_plaintext p ON p.id = m.id
+        WHERE (m.plaintext_body IS NULL OR m.plaintext_body = '') AND p.id IS NULL
+    """
 
     # Count how many need updating
-    cursor.execute("SELECT COUNT(*) FROM mails WHERE plaintext_body IS NULL OR plaintext_body = ''")
+    cursor.execute("SELECT COUNT(*) " + pending_sql)
     total = cursor.fetchone()[0]
     print(f"Total emails to process: {total}")
 
-    offset = 0
-    with tqdm(total=total) as pbar:
+    # one pass over the pending rows on a separate read connection (under WAL its
+    # snapshot is unaffected by the batch commits); HTML parsing is CPU-bound, so each
+    # batch is converted across all cores while the writes stay in this process
+    read_conn = sqlite3.connect(db_path)
+    read_cursor = read_conn.cursor()
+    read_cursor.arraysize = BATCH_SIZE
+    read_cursor.execute("SELECT m.id, m.html_content " + pending_sql)
+
+    with tqdm(total=total) as pbar, ProcessPoolExecutor() as pool:
         while True:
-            cursor.execute(
-                "SELECT id, html_content FROM mails WHERE plaintext_body IS NULL OR plaintext_body = '' LIMIT ?", (BATCH_SIZE,)
-            )
-            rows = cursor.fetchall()
+            rows = read_cursor.fetchmany()
             if not rows:
                 break
 
-            for email_id, html_content in rows:
-                plaintext = get_best_email_body(html_content)
-                cursor.execute(
-                    "UPDATE mails SET plaintext_body=? WHERE id=?",
-                    (plaintext, email_id)
-                )
-                pbar.update(1)
+            plaintexts = pool.map(get_best_email_body, [html_content for _, html_content in rows], chunksize=64)
+            cursor.executemany(
+                "INSERT OR REPLACE INTO mails_plaintext (id, body) VALUES (?, ?)",
+                zip((email_id for email_id, _ in rows), plaintexts)
+            )
+            pbar.update(len(rows))
 
             conn.commit()  # Commit after each batch
 
+    read_conn.close()
+
+    print("Copying plaintext bodies into mails...")
+    # BATCH_SIZE ids per transaction; copied rows leave the shadow table in the
+    # same commit, so an interrupted copy picks up at the next range
+    while True:
+        cursor.execute(
+            "SELECT MAX(id) FROM (SELECT id FROM mails_plaintext ORDER BY id LIMIT ?)", (BATCH_SIZE,)
+        )
+        last_id = cursor.fetchone()[0]
+        if last_id is None:
+            break
+        cursor.execute("""
+            UPDATE mails
+            SET plaintext_body = (SELECT body FROM mails_plaintext WHERE mails_plaintext.id = mails.id)
+            WHERE id IN (SELECT id FROM mails_plaintext WHERE id <= ?)
+        """, (last_id,))
+        cursor.execute("DELETE FROM mails_plaintext WHERE id <= ?", (last_id,))
+        conn.commit()
+    cursor.execute("DROP TABLE mails_plaintext")
+    conn.commit()
+
     conn.close()
     print("Done.")
 
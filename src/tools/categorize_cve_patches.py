@@ -1,7 +1,13 @@
 import sqlite3
 import argparse
-from openai import OpenAI
-from ..core.data_access import get_all_cve_ids, get_patch_emails_by_ids, get_cve_ids_by_category
+import asyncio
+import hashlib
+import json
+import re
+import threading
+from collections import OrderedDict
+from openai import AsyncOpenAI
+from ..core.data_access import get_all_cve_ids, get_patch_emails_by_ids, get_cve_ids_by_category, get_uncategorized_cve_ids
 from ..core.email_parser import parse_email_content
 
 
@@ -31,72 +37,18 @@ The categories that the llm prompt can choose from are currently:
 SUSPECTED_CVE_DB = "suspected_cve_patches.db"
 LKML_DATA_DB = "lkml-data-2024.db"
 MAX_PROMPT_CHARS = 7000 #need to limit the char size for the llm context window of 4096 tokens
-
-client = OpenAI(base_url="http://localhost:1234/v1", api_key="not-needed")
-
-def add_category_column():
-    """
-    Add a 'category' column to the suspected_cve_patches table if it doesn't exist.
-    """
-    try:
-        conn = sqlite3.connect(SUSPECTED_CVE_DB)
-        cursor = conn.cursor()
-        cursor.execute("ALTER TABLE suspected_cve_patches ADD COLUMN category TEXT")
-        print("Added 'category' column to suspected_cve_patches table.")
-    except sqlite3.OperationalError as e:
-        if "duplicate column name: category" in str(e):
-            print("Column 'category' already exists.")
-        else:
-            print(f"Error adding column: {e}")
-    finally:
-        if conn:
-            conn.commit()
-            conn.close()
-
-def get_patch_details_for_cve(cve_id):
-    """
-    Get patch emails for a specific CVE ID from the suspected_cve_patches table.
-    """
-    try:
-        conn = sqlite3.connect(SUSPECTED_CVE_DB)
-        cursor = conn.cursor()
-        cursor.execute("SELECT email_id FROM suspected_cve_patches WHERE match_cve_id = ?", (cve_id,))
-        email_ids = [row[0] for row in cursor.fetchall()]
-        full_emails = get_patch_emails_by_ids(email_ids)
-        return full_emails
-    except Exception as e:
-        print(f"Error retrieving patch details for CVE {cve_id}: {e}")
-    finally:
-        if conn:
-            conn.close()
-
-
-def categorize_patch_thread(cve_id, patch_emails):
-    """
-    uses an llm to categorize a patch thread based on the emails in it.
-    """
-    thread_content = []
-    for _, subject, _, html_content in patch_emails:
-        parsed_content = parse_email_content(html_content)
-        body = parsed_content.get("message_body", "")
-        content = f"--- Email Subject: {subject} ---\n{body}\n"
-        thread_content.append(content)
-    full_thread_text = "\n".join(thread_content)
-
-
-    if len(full_thread_text) > MAX_PROMPT_CHARS:
-        print(f"Warning: Full thread content for CVE {cve_id} exceeds {MAX_PROMPT_CHARS} characters. Truncating.")
-        full_thread_text = full_thread_text[:MAX_PROMPT_CHARS]
-
-    prompt = f"""
-    Analyze the following Linux kernel patch thread for vulnerability {cve_id}.
-    The thread consists of one or more emails, including subjects and their text bodies.
-    Based on the full context, what is the most likely category of the vulnerability being fixed?
-
-    Full Patch Thread Content:
-    {full_thread_text}
-
-    Choose the most specific category possible from the list below. If a specific bug type fits, choose it. If not, choose the general high-level category.
+LLM_CONCURRENCY = 16 # concurrent requests in flight; the local server batches them
+LLM_MODEL = "gemma-3-4b"
+BATCH_INPUT_FILE = "cve_category_batch.jsonl"
+BATCH_POLL_SECONDS = 30
+CATEGORY_WRITE_BATCH = 100 # categories collected before each bulk database write
+BODY_CACHE_SIZE = 8192 # parsed message bodies kept in memory, by email id
+LLM_MAX_RETRIES = 5 # retries of a request on 429/5xx and connection errors, with exponential backoff
+
+# the client retries transient failures itself (jittered exponential backoff, honoring Retry-After)
+client = AsyncOpenAI(base_url="http://localhost:1234/v1", api_key="not-needed", max_retries=LLM_MAX_RETRIES)
+
+CATEGORY_CHOICES = """    Choose the most specific category possible from the list below. If a specific bug type fits, choose it. If not, choose the general high-level category.
     1. Memory Management Bugs
         - Buffer Overflow
         - Use-After-Free
@@ -151,85 +103,546 @@ def categorize_patch_thread(cve_id, patch_emails):
         - Error Propagation Failures
         - Swallowed Error Codes
     13. Other (please specify)
+"""
+
+# all of the static instructions live in the system message, which is byte-identical
+# across requests, so the server's prefix cache reuses its prompt processing and only
+# the thread text in the user message is new per request
+SYSTEM_PROMPT = f"""You are an expert Linux kernel security analyst that categorizes vulnerabilities based on patch content.
+You are given Linux kernel patch threads, each consisting of one or more emails with their subjects and text bodies.
+Based on the full context of a thread, determine the most likely category of the vulnerability being fixed.
 
+{CATEGORY_CHOICES}
     Provide only the category name as your answer. Or if you have another category for it provide that instead.
+"""
+
+_category_cache_conn = None
+_body_cache = OrderedDict()
+# per-thread database connections for the patch lookups, which run in worker threads
+_thread_db = threading.local()
+
+# one "CVE-ID<TAB>Category" line of a batched answer; tolerant of other separators and markdown
+_BATCH_LINE_RE = re.compile(r'(CVE-\d{4}-\d{4,})[\s:|*\-]*(.+)', re.IGNORECASE)
+
+def setup_schema():
+    """
+    Add a 'category' column to the suspected_cve_patches table if it doesn't exist,
+    and index the columns the categorization and report queries filter on.
+    """
+    conn = None
+    try:
+        conn = sqlite3.connect(SUSPECTED_CVE_DB)
+        cursor = conn.cursor()
+        try:
+            cursor.execute("ALTER TABLE suspected_cve_patches ADD COLUMN category TEXT")
+            print("Added 'category' column to suspected_cve_patches table.")
+        except sqlite3.OperationalError as e:
+            if "duplicate column name: category" in str(e):
+                print("Column 'category' already exists.")
+            else:
+                print(f"Error adding column: {e}")
+
+        # every per-CVE lookup filters on match_cve_id, and --redo-other on category
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_scp_match_cve_id ON suspected_cve_patches(match_cve_id)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_scp_category ON suspected_cve_patches(category)")
+        print("Indexed suspected_cve_patches on match_cve_id and category.")
+    except sqlite3.OperationalError as e:
+        print(f"Error setting up schema: {e}")
+    finally:
+        if conn:
+            conn.commit()
+            conn.close()
+
+def _get_thread_connections():
     """
+    Return this thread's long-lived connections to the suspected CVE and LKML databases,
+    opening them on first use so their page caches stay warm across CVEs.
+    """
+    if getattr(_thread_db, "suspected", None) is None:
+        _thread_db.suspected = sqlite3.connect(SUSPECTED_CVE_DB)
+        _thread_db.suspected.execute("PRAGMA journal_mode=WAL")
+        _thread_db.suspected.execute("PRAGMA synchronous=NORMAL")
+        _thread_db.lkml = sqlite3.connect(LKML_DATA_DB)
+    return _thread_db.suspected, _thread_db.lkml
 
+def get_patch_details_for_cve(cve_id):
+    """
+    Get patch emails for a specific CVE ID from the suspected_cve_patches table.
+    """
     try:
-        completion = client.chat.completions.create(
-            model="gemma-3-4b",
-            messages=[
-                {"role": "system", "content": "You are an expert Linux kernel security analyst that categorizes vulnerabilities based on patch content."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.1,
-        )
-        category = completion.choices[0].message.content.strip()
-        return category
+        suspected_conn, lkml_conn = _get_thread_connections()
+        cursor = suspected_conn.execute("SELECT email_id FROM suspected_cve_patches WHERE match_cve_id = ?", (cve_id,))
+        email_ids = [row[0] for row in cursor.fetchall()]
+        full_emails = get_patch_emails_by_ids(email_ids, conn=lkml_conn)
+        return full_emails
+    except Exception as e:
+        print(f"Error retrieving patch details for CVE {cve_id}: {e}")
+
+
+def _get_category_cache():
+    """
+    Lazily open the persistent LLM category cache in the suspected CVE database,
+    along with the failed_cves table of CVEs whose LLM requests kept failing.
+    """
+    global _category_cache_conn
+    if _category_cache_conn is None:
+        _category_cache_conn = sqlite3.connect(SUSPECTED_CVE_DB, check_same_thread=False)
+        _category_cache_conn.execute("""
+            CREATE TABLE IF NOT EXISTS llm_category_cache (
+                prompt_hash TEXT PRIMARY KEY,
+                category TEXT,
+                model TEXT
+            )
+        """)
+        _category_cache_conn.execute("""
+            CREATE TABLE IF NOT EXISTS failed_cves (
+                cve_id TEXT PRIMARY KEY,
+                error TEXT,
+                failed_at TEXT DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        _category_cache_conn.commit()
+    return _category_cache_conn
+
+
+def thread_cache_key(cve_id, patch_emails):
+    """
+    SHA-256 key for a patch thread's categorization.
+
+    Covers the model, the system prompt and the raw subjects and bodies the
+    thread text is built from, so switching models or editing the prompt does
+    not return stale categories.
+    """
+    digest = hashlib.sha256()
+    for part in (LLM_MODEL, SYSTEM_PROMPT, cve_id):
+        digest.update(part.encode())
+        digest.update(b"\0")
+    for _, subject, _, html_content in patch_emails:
+        digest.update((subject or "").encode())
+        digest.update(b"\0")
+        digest.update((html_content or "").encode())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def get_cached_category(key):
+    """
+    Return the cached category for a thread cache key, or None.
+    """
+    row = _get_category_cache().execute(
+        "SELECT category FROM llm_category_cache WHERE prompt_hash = ?", (key,)
+    ).fetchone()
+    return row[0] if row else None
+
+
+def cache_category(key, category):
+    """
+    Remember a thread's category. 'Other' is not cached, since --redo-other is
+    meant to retry those threads.
+    """
+    if not category or category.lower() == "other":
+        return
+    conn = _get_category_cache()
+    conn.execute(
+        "INSERT OR REPLACE INTO llm_category_cache (prompt_hash, category, model) VALUES (?, ?, ?)",
+        (key, category, LLM_MODEL)
+    )
+    conn.commit()
+
+
+def record_failed_cve(cve_id, error):
+    """
+    Log a CVE whose LLM request still failed after the client's retries, so it can be
+    retried with --retry-failed instead of being stored as 'Other'.
+    """
+    conn = _get_category_cache()
+    conn.execute(
+        "INSERT OR REPLACE INTO failed_cves (cve_id, error) VALUES (?, ?)",
+        (cve_id, str(error))
+    )
+    conn.commit()
+
+
+def get_failed_cve_ids():
+    """
+    Get the CVE IDs logged in failed_cves, in order.
+    """
+    return [row[0] for row in _get_category_cache().execute("SELECT cve_id FROM failed_cves ORDER BY cve_id")]
+
+
+def _split_cached(cve_threads):
+    """
+    Split (cve_id, patch_emails) threads into cached categories and threads that
+    still need the LLM.
+
+    Returns:
+        Tuple of (cached categories dict, uncached thread list, cache keys by CVE ID)
+    """
+    cached_categories = {}
+    cache_keys = {}
+    uncached = []
+    for cve_id, patch_emails in cve_threads:
+        cache_keys[cve_id] = thread_cache_key(cve_id, patch_emails)
+        cached = get_cached_category(cache_keys[cve_id])
+        if cached:
+            cached_categories[cve_id] = cached
+        else:
+            uncached.append((cve_id, patch_emails))
+    if cached_categories:
+        print(f"Reused cached categories for {len(cached_categories)} CVE(s).")
+    return cached_categories, uncached, cache_keys
+
+
+def _message_body(email_id, html_content):
+    """
+    Message body of an email, memoized by email ID so a thread that is built again
+    (batched-answer and Batch API fallbacks) is not parsed twice. Only the bodies are
+    kept, not the HTML, which an lru_cache keyed on the content would hold on to.
+    """
+    if email_id in _body_cache:
+        _body_cache.move_to_end(email_id)
+        return _body_cache[email_id]
+    body = parse_email_content(html_content).get("message_body", "")
+    _body_cache[email_id] = body
+    if len(_body_cache) > BODY_CACHE_SIZE:
+        _body_cache.popitem(last=False)
+    return body
+
+
+def build_thread_text(cve_id, patch_emails, max_chars=MAX_PROMPT_CHARS):
+    """
+    Join the subjects and bodies of a patch thread, truncated to max_chars.
+    Emails past the budget are not parsed at all, since they would be cut off anyway.
+    """
+    thread_content = []
+    length = 0  # length of "\n".join(thread_content)
+    truncated = False
+    for email_id, subject, _, html_content in patch_emails:
+        if length >= max_chars:
+            truncated = True
+            break
+        body = _message_body(email_id, html_content)
+        content = f"--- Email Subject: {subject} ---\n{body}\n"
+        length += len(content) + (1 if thread_content else 0)
+        thread_content.append(content)
+    full_thread_text = "\n".join(thread_content)
+
+    if truncated or len(full_thread_text) > max_chars:
+        print(f"Warning: Full thread content for CVE {cve_id} exceeds {max_chars} characters. Truncating.")
+        full_thread_text = full_thread_text[:max_chars]
+    return full_thread_text
+
+
+def _chat_request(prompt):
+    """
+    Chat completion request body for one categorization prompt.
+    """
+    return {
+        "model": LLM_MODEL,
+        "messages": [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ],
+        "temperature": 0.1,
+    }
+
+
+async def _complete(prompt):
+    """
+    Send one prompt to the LLM and return the stripped answer text.
+    """
+    completion = await client.chat.completions.create(**_chat_request(prompt))
+    return completion.choices[0].message.content.strip()
+
+
+def build_category_prompt(cve_id, patch_emails):
+    """
+    Build the categorization prompt for a single patch thread.
+    """
+    full_thread_text = build_thread_text(cve_id, patch_emails)
+
+    return f"""Patch thread for vulnerability {cve_id}:
+
+{full_thread_text}
+"""
+
+
+async def categorize_patch_thread(cve_id, patch_emails):
+    """
+    uses an llm to categorize a patch thread based on the emails in it.
+    Returns None, and logs the CVE in failed_cves, if the request fails.
+    """
+    prompt = build_category_prompt(cve_id, patch_emails)
+
+    try:
+        return await _complete(prompt)
     except Exception as e:
         print(f"Error categorizing patch thread for CVE {cve_id}: {e}")
-        return "Other"
+        record_failed_cve(cve_id, e)
+        return None
+
 
+async def batch_categorize(cve_threads):
+    """
+    Categorize several patch threads with a single LLM request.
 
+    Args:
+        cve_threads: List of (cve_id, patch_emails) tuples
 
-def update_cve_category(cve_id, category):
+    Returns:
+        Dictionary mapping CVE ID to category. Threads the answer does not cover
+        are categorized individually; if the request fails, all of them are logged
+        in failed_cves and left out.
     """
-    Update the category of a specific CVE ID in the suspected_cve_patches table.
+    max_chars = MAX_PROMPT_CHARS // len(cve_threads)
+    sections = "\n".join(
+        f"### {cve_id}\n{build_thread_text(cve_id, patch_emails, max_chars)}"
+        for cve_id, patch_emails in cve_threads
+    )
+
+    prompt = f"""Patch threads, each headed by the vulnerability it fixes:
+
+{sections}
+
+Categorize every thread. Instead of a single category name, output CVE-ID<TAB>Category for each CVE, one per line, and nothing else.
+"""
+
+    cve_ids = {cve_id.upper(): cve_id for cve_id, _ in cve_threads}
+    categories = {}
+    try:
+        answer = await _complete(prompt)
+    except Exception as e:
+        print(f"Error categorizing patch threads for CVEs {', '.join(cve_ids.values())}: {e}")
+        for cve_id in cve_ids.values():
+            record_failed_cve(cve_id, e)
+        return {}
+
+    for line in answer.splitlines():
+        match = _BATCH_LINE_RE.search(line)
+        if not match:
+            continue
+        cve_id = cve_ids.get(match.group(1).upper())
+        category = match.group(2).strip(" \t*")
+        if cve_id and category and cve_id not in categories:
+            categories[cve_id] = category
+
+    missing = [(cve_id, patch_emails) for cve_id, patch_emails in cve_threads if cve_id not in categories]
+    if missing:
+        print(f"Batched answer did not cover {len(missing)} CVE(s); categorizing them individually.")
+        results = await asyncio.gather(*(categorize_patch_thread(cve_id, patch_emails) for cve_id, patch_emails in missing))
+        categories.update(zip((cve_id for cve_id, _ in missing), results))
+    return categories
+
+
+
+def update_cve_categories(categories):
+    """
+    Update the categories of many CVE IDs in a single transaction.
+
+    Args:
+        categories: Dictionary mapping CVE ID to category
     """
+    if not categories:
+        return
+    conn = sqlite3.connect(SUSPECTED_CVE_DB)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA cache_size=-64000")
     try:
-        conn = sqlite3.connect(SUSPECTED_CVE_DB)
-        cursor = conn.cursor()
-        cursor.execute("UPDATE suspected_cve_patches SET category = ? WHERE match_cve_id = ?", (category, cve_id))
-        print(f"Updated category for CVE {cve_id} to '{category}'.")
+        conn.executemany(
+            "UPDATE suspected_cve_patches SET category = ? WHERE match_cve_id = ?",
+            ((category, cve_id) for cve_id, category in categories.items())
+        )
+        conn.commit()
+        print(f"Updated categories for {len(categories)} CVEs.")
+        # CVEs that failed on an earlier run are done now
+        cache_conn = _get_category_cache()
+        cache_conn.executemany("DELETE FROM failed_cves WHERE cve_id = ?", ((cve_id,) for cve_id in categories))
+        cache_conn.commit()
     except Exception as e:
-        print(f"Error updating CVE category for {cve_id}: {e}")
+        print(f"Error updating CVE categories: {e}")
     finally:
-        if conn:
-            conn.commit()
-            conn.close()
+        conn.close()
+
+
+async def _categorize_batch(cve_ids, semaphore, results):
+    """
+    Categorize a group of CVEs with one LLM request while holding a slot of the shared semaphore.
+    Categories are collected in `results` and written to the database in chunks.
+    """
+    async with semaphore:
+        cve_threads = []
+        for cve_id in cve_ids:
+            print(f"\nProcessing CVE {cve_id}...")
+            # the sqlite lookups are blocking, so they run off the event loop
+            patch_emails = await asyncio.to_thread(get_patch_details_for_cve, cve_id)
+            if not patch_emails:
+                print(f"No patch emails found for {cve_id}. Skipping.")
+                continue
+            cve_threads.append((cve_id, patch_emails))
+
+        if not cve_threads:
+            return
+
+        categories, uncached, cache_keys = _split_cached(cve_threads)
+        if len(uncached) == 1:
+            cve_id, patch_emails = uncached[0]
+            categories[cve_id] = await categorize_patch_thread(cve_id, patch_emails)
+        elif uncached:
+            categories.update(await batch_categorize(uncached))
+        for cve_id, _ in uncached:
+            cache_category(cache_keys[cve_id], categories.get(cve_id))
+
+    for cve_id, _ in cve_threads:
+        category = categories.get(cve_id)
+        if category:
+            results[cve_id] = category
+            print(f"Categorized CVE {cve_id} as '{category}'.")
+        else:
+            print(f"Failed to categorize CVE {cve_id}.")
+
+    if len(results) >= CATEGORY_WRITE_BATCH:
+        update_cve_categories(results)
+        results.clear()
+
+
+async def categorize_cves(cve_ids, concurrency=LLM_CONCURRENCY, batch_size=1):
+    """
+    Categorize CVEs concurrently, with at most `concurrency` LLM requests in flight
+    and `batch_size` patch threads packed into each request.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    batches = [cve_ids[i:i + batch_size] for i in range(0, len(cve_ids), batch_size)]
+    categories = {}
+    outcomes = await asyncio.gather(
+        *(_categorize_batch(batch, semaphore, categories) for batch in batches),
+        return_exceptions=True
+    )
+    update_cve_categories(categories)
+    for batch, outcome in zip(batches, outcomes):
+        if isinstance(outcome, Exception):
+            print(f"Error processing CVEs {', '.join(batch)}: {outcome}")
+
+
+async def categorize_with_batch_api(cve_ids, concurrency=LLM_CONCURRENCY):
+    """
+    Categorize CVEs offline through the OpenAI Batch API.
+
+    One request per CVE is written to a JSONL file, uploaded and submitted as a
+    batch job, which is polled until it finishes. CVEs without a result, or all of
+    them when the server does not implement the Batch API, are categorized with
+    live requests instead.
+    """
+    cve_threads = []
+    for cve_id in cve_ids:
+        patch_emails = get_patch_details_for_cve(cve_id)
+        if not patch_emails:
+            print(f"No patch emails found for {cve_id}. Skipping.")
+            continue
+        cve_threads.append((cve_id, patch_emails))
+    if not cve_threads:
+        return
+
+    cached_categories, cve_threads, cache_keys = _split_cached(cve_threads)
+    update_cve_categories(cached_categories)
+    if not cve_threads:
+        return
+
+    with open(BATCH_INPUT_FILE, "w", encoding="utf-8") as f:
+        for cve_id, patch_emails in cve_threads:
+            request = {
+                "custom_id": cve_id,
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": _chat_request(build_category_prompt(cve_id, patch_emails)),
+            }
+            f.write(json.dumps(request) + "\n")
+    print(f"Wrote {len(cve_threads)} requests to {BATCH_INPUT_FILE}.")
+
+    try:
+        with open(BATCH_INPUT_FILE, "rb") as f:
+            batch_file = await client.files.create(file=f, purpose="batch")
+        batch = await client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+    except Exception as e:
+        print(f"Batch API not available ({e}). Falling back to live requests.")
+        await categorize_cves([cve_id for cve_id, _ in cve_threads], concurrency)
+        return
+
+    print(f"Submitted batch {batch.id}. Polling every {BATCH_POLL_SECONDS} seconds...")
+    while batch.status not in ("completed", "failed", "expired", "cancelled"):
+        await asyncio.sleep(BATCH_POLL_SECONDS)
+        batch = await client.batches.retrieve(batch.id)
+        print(f"Batch {batch.id} status: {batch.status}")
+
+    categories = {}
+    if batch.status == "completed" and batch.output_file_id:
+        output = await client.files.content(batch.output_file_id)
+        for line in output.text.splitlines():
+            if not line.strip():
+                continue
+            result = json.loads(line)
+            response = result.get("response") or {}
+            if response.get("status_code") != 200:
+                continue
+            category = response["body"]["choices"][0]["message"]["content"].strip()
+            if category and result["custom_id"] in cache_keys:
+                categories[result["custom_id"]] = category
+                cache_category(cache_keys[result["custom_id"]], category)
+    else:
+        print(f"Batch {batch.id} ended with status '{batch.status}'.")
+
+    update_cve_categories(categories)
+
+    missing = [cve_id for cve_id, _ in cve_threads if cve_id not in categories]
+    if missing:
+        print(f"{len(missing)} CVEs have no batch result. Categorizing them with live requests.")
+        await categorize_cves(missing, concurrency)
 
 
 def main():
     parser = argparse.ArgumentParser(description="Categorize CVE patch threads using an LLM.")
     parser.add_argument("--limit", type=int, help="Limit the number of CVEs to process.")
-    parser.add_argument("--setup", action="store_true", help="Add the 'category' column to the database and exit.")
+    parser.add_argument("--setup", action="store_true", help="Add the 'category' column and indexes to the database and exit.")
     parser.add_argument("--redo-other", action="store_true", help="Redo processing for CVEs with 'Other' category.")
-    parser.add_argument("--start-after", type=str, help="The last successfully processed CVE ID to start processing after.")
+    parser.add_argument("--retry-failed", action="store_true", help="Retry only the CVEs whose LLM requests failed on earlier runs.")
+    parser.add_argument("--start-after", type=str, help="The last successfully processed CVE ID to start processing after. CVEs that already have a category are skipped.")
+    parser.add_argument("--concurrency", type=int, default=LLM_CONCURRENCY, help=f"Maximum concurrent LLM requests (default: {LLM_CONCURRENCY}).")
+    parser.add_argument("--batch-api", action="store_true", help="Submit the categorization requests as an offline Batch API job instead of live requests.")
+    parser.add_argument("--batch-size", type=int, default=1, help="Number of CVE threads to categorize per LLM request (default: 1). Each thread gets an equal share of the prompt budget.")
     args = parser.parse_args()
 
     if args.setup:
-        add_category_column()
+        setup_schema()
         return
 
-    if args.redo_other:
-        cve_ids = get_cve_ids_by_category("Other")
+    if args.retry_failed or args.redo_other:
+        cve_ids = get_failed_cve_ids() if args.retry_failed else get_cve_ids_by_category("Other")
+        if args.start_after:
+            cve_ids = [cve_id for cve_id in cve_ids if cve_id > args.start_after]
+    elif args.start_after:
+        # resuming: only the CVEs after the given one that are still uncategorized
+        cve_ids = get_uncategorized_cve_ids(after=args.start_after)
     else:
         cve_ids = get_all_cve_ids() 
 
     if args.start_after:
-        try:
-            # Find the index of the CVE to start after
-            start_index = cve_ids.index(args.start_after) + 1
-            cve_ids = cve_ids[start_index:]
-            print(f"Resuming process. Starting with CVE {cve_ids[0] if cve_ids else 'end of list'}.")
-        except ValueError:
-            print(f"Warning: CVE ID '{args.start_after}' not found. Starting from the beginning of the list.")
+        print(f"Resuming process. Starting with CVE {cve_ids[0] if cve_ids else 'end of list'}.")
 
     if args.limit:
         cve_ids = cve_ids[:args.limit]
-    print(f"Processing {len(cve_ids)} CVEs...")
-    for cve_id in cve_ids:
-        print(f"\nProcessing CVE {cve_id}...")
-        patch_emails = get_patch_details_for_cve(cve_id)
-        if not patch_emails:
-            print(f"No patch emails found for {cve_id}. Skipping.")
-            continue
+    if args.batch_api:
+        print(f"Processing {len(cve_ids)} CVEs through the Batch API...")
+        asyncio.run(categorize_with_batch_api(cve_ids, args.concurrency))
+        return
 
-        category = categorize_patch_thread(cve_id, patch_emails)
-        if category:
-            update_cve_category(cve_id, category)
-        else:
-            print(f"Failed to categorize CVE {cve_id}.")
+    batch_size = max(1, args.batch_size)
+    print(f"Processing {len(cve_ids)} CVEs with up to {args.concurrency} concurrent LLM requests of {batch_size} CVE(s) each...")
+    asyncio.run(categorize_cves(cve_ids, args.concurrency, batch_size))
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
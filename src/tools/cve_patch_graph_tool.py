@@ -1,6 +1,6 @@
 import argparse
 import sqlite3
-from ..core.data_access import get_patch_emails_by_ids, get_all_cve_ids
+from ..core.data_access import get_patch_emails_by_ids, get_all_cve_ids, title_contains_clause
 from ..core.email_parser import parse_email_content
 from ..core.graph_builder import create_patch_evolution_graph_linux, create_in_reply_to_graph, create_patch_name_version_graph
 from ..core.visualization import visualize_evolution_graph
@@ -14,13 +14,14 @@ def export_email_bodies_by_subject(keyword, output_file="matched_email_bodies.tx
     Each email is separated and includes its ID, subject, and URL.
     """
     conn = sqlite3.connect(db_path)
+    condition, params = title_contains_clause(conn, keyword)
     cursor = conn.cursor()
-    cursor.execute("""
+    cursor.execute(f"""
         SELECT id, title, url, html_content
         FROM mails
-        WHERE LOWER(title) LIKE ?
+        WHERE {condition}
         ORDER BY id
-    """, (f"%{keyword.lower()}%",))
+    """, params)
     results = cursor.fetchall()
     conn.close()
 
@@ -41,12 +42,13 @@ def test_search_patch_subjects(keyword, db_path="lkml-patch-analysis/lkml-data-2
     Prints all matching email IDs, subjects, and URLs.
     """
     conn = sqlite3.connect(db_path)
+    condition, params = title_contains_clause(conn, keyword)
     cursor = conn.cursor()
-    cursor.execute("""
+    cursor.execute(f"""
         SELECT id, title, url
         FROM mails
-        WHERE LOWER(title) LIKE ?
-    """, (f"%{keyword.lower()}%",))
+        WHERE {condition}
+    """, params)
     results = cursor.fetchall()
     conn.close()
     print(f"Found {len(results)} emails with subject containing '{keyword}':")
@@ -1,6 +1,7 @@
 import sqlite3
 import argparse
 from .import_cve_jsons import main as import_cve_jsons_main, create_linux_kernel_table
+from ..core.data_access import ensure_mails_fts, fts5_phrase, title_contains_clause
 
 
 """
@@ -27,6 +28,19 @@ CVE_DB_PATH = "suspected_cve_patches.db"  # this is the database where we store
 SUSPECTED_CVE_DB = "suspected_cve_patches.db" # now stored in the same place as all cve data
 
 
+def _connect(db_path):
+    """
+    Open a database for bulk writes: WAL with synchronous=NORMAL so a batch
+    of inserts costs one sync at commit instead of one per statement.
+    """
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA cache_size=-65536")  # 64 MB page cache
+    conn.execute("PRAGMA temp_store=MEMORY")  # temp tables and sorts stay off disk
+    return conn
+
+
 def import_cves_and_create_kernel_table():
     """
     Imports cve jsons into the suspected_cve_patches.db and creates the linux_kernel_cves table
@@ -43,10 +57,10 @@ def populate_git_pull_table_in_suspected_db(src_db=DB_PATH, dst_db=SUSPECTED_CVE
     by extracting git pull emails from the mails table in the main database.
     Optionally limit the number of emails processed.
     """
-    src_conn = sqlite3.connect(src_db)
-    src_cursor = src_conn.cursor()
-    dst_conn = sqlite3.connect(dst_db)
+    dst_conn = _connect(dst_db)
     dst_cursor = dst_conn.cursor()
+    # attach the email database so rows are copied inside SQLite, never through Python
+    dst_cursor.execute("ATTACH DATABASE ? AS src", (src_db,))
 
     dst_cursor.execute("""
         CREATE TABLE IF NOT EXISTS git_pull_emails (
@@ -59,29 +73,24 @@ def populate_git_pull_table_in_suspected_db(src_db=DB_PATH, dst_db=SUSPECTED_CVE
         )
     """)
 
-    patterns = [
-        ("LIKE '%[GIT PULL]%'", "GIT_PULL"),
-        ("LIKE '%Re: [GIT PULL]%'", "GIT_PULL_REPLY")
-    ]
-    total_inserted = 0
-    for pattern, pull_type in patterns:
-        query = f"""
-            SELECT id, title, url, html_content FROM mails
-            WHERE title {pattern}
-              AND id NOT IN (SELECT id FROM git_pull_emails)
-        """
-        if limit:
-            query += f" LIMIT {limit}"
-        src_cursor.execute(query)
-        rows = src_cursor.fetchall()
-        if rows:
-            dst_cursor.executemany("""
-                INSERT OR IGNORE INTO git_pull_emails (id, title, url, html_content, pull_type)
-                VALUES (?, ?, ?, ?, ?)
-            """, [(row[0], row[1], row[2], row[3], pull_type) for row in rows])
-            total_inserted += len(rows)
+    query = """
+        INSERT OR IGNORE INTO main.git_pull_emails (id, title, url, html_content, pull_type)
+        SELECT s.id, s.title, s.url, s.html_content, 'GIT_PULL'
+        FROM src.mails s
+        LEFT JOIN main.git_pull_emails g ON g.id = s.id
+        WHERE g.id IS NULL
+          AND s.title LIKE '%[GIT PULL]%'
+    """
+    params = ()
+    if limit:
+        query += " LIMIT ?"
+        params = (limit,)
+
+    # all inserts go into one transaction
+    dst_cursor.execute("BEGIN")
+    dst_cursor.execute(query, params)
+    total_inserted = dst_cursor.rowcount
     dst_conn.commit()
-    src_conn.close()
     dst_conn.close()
     print(f"Inserted {total_inserted} git pull emails into git_pull_emails table in {dst_db}")
 
@@ -93,13 +102,12 @@ def export_suspected_cve_patches(src_db = DB_PATH, dst_db = SUSPECTED_CVE_DB):
     """
 
 
-    src_conn = sqlite3.connect(src_db)
-    src_cursor = src_conn.cursor()
-    dst_conn = sqlite3.connect(dst_db)
+    dst_conn = _connect(dst_db)
     dst_cursor = dst_conn.cursor()
+    dst_cursor.execute("ATTACH DATABASE ? AS src", (src_db,))
 
     dst_cursor.execute("""
-        CREATE TABLE IF NOT EXISTS suspected_cve_patches (
+        CREATE TABLE IF NOT EXISTS main.suspected_cve_patches (
             email_id INTEGER PRIMARY KEY,
             subject TEXT,
             url TEXT,
@@ -109,27 +117,37 @@ def export_suspected_cve_patches(src_db = DB_PATH, dst_db = SUSPECTED_CVE_DB):
         )
     """)
 
-    src_cursor.execute("SELECT email_id, subject, url, match_cve_id, match_type, match_keyword FROM suspected_cve_patches")
-    rows = src_cursor.fetchall()
-    dst_cursor.executemany("""
-        INSERT OR REPLACE INTO suspected_cve_patches
+    dst_cursor.execute("BEGIN")
+    dst_cursor.execute("""
+        INSERT OR REPLACE INTO main.suspected_cve_patches
         (email_id, subject, url, match_cve_id, match_type, match_keyword)
-        VALUES (?, ?, ?, ?, ?, ?)
-    """, rows)
+        SELECT email_id, subject, url, match_cve_id, match_type, match_keyword
+        FROM src.suspected_cve_patches
+    """)
+    exported = dst_cursor.rowcount
 
     dst_conn.commit()
-    src_conn.close()
     dst_conn.close()
-    print(f"Exported {len(rows)} suspected_cve_patches to {dst_db}")
+    print(f"Exported {exported} suspected_cve_patches to {dst_db}")
+
+def iter_linux_kernel_cves(db_path=SUSPECTED_CVE_DB):
+    """Yields (cve_id, title) rows of Linux kernel CVEs without loading them all into memory."""
+    conn = sqlite3.connect(db_path)
+    try:
+        cursor = conn.cursor()
+        cursor.arraysize = 1000
+        cursor.execute("SELECT cve_id, title FROM linux_kernel_cves")
+        while True:
+            rows = cursor.fetchmany()
+            if not rows:
+                break
+            yield from rows
+    finally:
+        conn.close()
 
 def get_linux_kernel_cves(db_path=SUSPECTED_CVE_DB):
     """Fetches Linux kernel CVEs from the database."""
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    cursor.execute("SELECT cve_id, title FROM linux_kernel_cves")
-    cves = cursor.fetchall()
-    conn.close()
-    return cves
+    return list(iter_linux_kernel_cves(db_path))
 
 def get_existing_cve_patch_ids(db_path=SUSPECTED_CVE_DB):
     """Fetches existing CVE patch email IDs from the database."""
@@ -166,27 +184,48 @@ def find_and_store_suspected_patches():
     and inserts suspected patches into the suspected_cve_patches table.
     It uses a substring match on the email subject to find potential CVE patches.
     """
-    cves = get_linux_kernel_cves()
+    cves = iter_linux_kernel_cves()
     #existing_ids = get_existing_cve_patch_ids()
-    conn = sqlite3.connect(DB_PATH)
+    conn = _connect(DB_PATH)
+    # the FTS index and the mails rows it points at are read for every CVE title
+    conn.execute("PRAGMA cache_size=-131072")  # 128 MB
+    ensure_mails_fts(conn)
     cursor = conn.cursor()
-    insert_cursor = conn.cursor()
-
-    for cve_id, cve_title in cves:
-        if not cve_title or len(cve_title) < 8:
-            continue
-        # Use LIKE for substring match to find which patch emails will be discussing the cves
-        cursor.execute("""
-            SELECT id, title, url FROM mails
-            WHERE LOWER(title) LIKE ?
-              AND id NOT IN (SELECT email_id FROM cve_patches)
-        """, (f"%{cve_title.lower()}%",))
-        for email_id, subject, url in cursor.fetchall():
-            insert_cursor.execute("""
-                INSERT OR IGNORE INTO suspected_cve_patches
-                (email_id, subject, url, match_cve_id, match_type, match_keyword)
-                VALUES (?, ?, ?, ?, ?, ?)
-            """, (email_id, subject, url, cve_id, "title_substring", cve_title))
+
+    # index the anti-join column; gather planner statistics the first time it is created
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'idx_cve_patches_email_id'")
+    if cursor.fetchone() is None:
+        cursor.execute("CREATE INDEX idx_cve_patches_email_id ON cve_patches(email_id)")
+        cursor.execute("ANALYZE cve_patches")
+        conn.commit()
+
+    # everything below runs in a single transaction, committed once at the end
+    cursor.execute("BEGIN")
+
+    # load the CVE titles as quoted FTS phrases so one INSERT ... SELECT can
+    # match all of them through the trigram title index
+    cursor.execute("DROP TABLE IF EXISTS temp.cve_needles")
+    cursor.execute("CREATE TEMP TABLE cve_needles (cve_id TEXT, needle TEXT, phrase TEXT)")
+    cursor.executemany(
+        "INSERT INTO cve_needles (cve_id, needle, phrase) VALUES (?, ?, ?)",
+        (
+            (cve_id, cve_title, fts5_phrase(cve_title))
+            for cve_id, cve_title in cves
+            if cve_title and len(cve_title) >= 8
+        )
+    )
+
+    # rows are inserted in CVE order so the first matching CVE is the one kept for an email
+    cursor.execute("""
+        INSERT OR IGNORE INTO suspected_cve_patches
+        (email_id, subject, url, match_cve_id, match_type, match_keyword)
+        SELECT m.id, m.title, m.url, c.cve_id, 'title_substring', c.needle
+        FROM cve_needles c
+        JOIN mails_fts f ON f.mails_fts MATCH c.phrase
+        JOIN mails m ON m.id = f.rowid
+        WHERE m.id NOT IN (SELECT email_id FROM cve_patches)
+        ORDER BY c.rowid, m.id
+    """)
     conn.commit()
     conn.close()
     print("Title-based suspected CVE patches stored.")
@@ -197,15 +236,15 @@ def search_patch_emails_by_title(keyword, db_path="lkml-patch-analysis/lkml-data
     Search the mails table for emails whose title contains the given keyword (case-insensitive).
     Prints all matching email IDs, subjects, and URLs.
     """
-    import sqlite3
     conn = sqlite3.connect(db_path)
+    condition, params = title_contains_clause(conn, keyword)
     cursor = conn.cursor()
-    cursor.execute("""
+    cursor.execute(f"""
         SELECT id, title, url
         FROM mails
-        WHERE LOWER(title) LIKE ?
+        WHERE {condition}
         ORDER BY id
-    """, (f"%{keyword.lower()}%",))
+    """, params)
     results = cursor.fetchall()
     conn.close()
     print(f"Found {len(results)} emails with title containing '{keyword}':")
@@ -2,6 +2,8 @@ import sqlite3
 import csv
 import argparse
 from datetime import datetime
+from functools import lru_cache
+from itertools import groupby
 from ..core.email_parser import extract_patch_info, extract_series_position
 
 """
@@ -13,32 +15,42 @@ a CVE related patch, its category, and the CVE id.
 
 SUSPECTED_CVE_DB = "suspected_cve_patches.db" # change as needed
 
-def find_base_patch_email(cursor, cve_id):
+@lru_cache(maxsize=65536)
+def _base_patch_rank(subject):
     """
-    Find the base patch email for a given CVE ID.
+    (series_position, version_num) of a patch subject, or None for replies and
+    non-patches. Cached because the same subjects come up across CVEs and runs
+    of the report, so each one is parsed only once.
+    """
+    patch_info = extract_patch_info(subject)
+    if not patch_info or patch_info.get('is_reply'):
+        return None
+
+    version_str = patch_info.get('version', 'v1')
+    digits_from_version = ''.join(filter(str.isdigit, version_str))
+    if digits_from_version:
+        version_num = int(digits_from_version)
+    else:
+        version_num = 0
+
+    series_position, _ = extract_series_position(subject)
+    return (series_position, version_num)
+
+
+def pick_base_url(emails):
+    """
+    Pick the base patch email url from a CVE's (email_id, subject, url) rows.
     """
-    cursor.execute("SELECT email_id, subject, url FROM suspected_cve_patches WHERE match_cve_id = ?", (cve_id,))
-    emails = cursor.fetchall()
-    base_email_option = None
     base_email_url = None
 
     lowest_score = (float('inf'), float('inf'), float('inf'))  # (series_position, patch_position, email_id)
     for email_id, subject, url in emails:
-        patch_info = extract_patch_info(subject)
-        if not patch_info or patch_info.get('is_reply'):
+        rank = _base_patch_rank(subject)
+        if rank is None:
             continue
 
-        version_str = patch_info.get('version', 'v1')
-        digits_from_version = ''.join(filter(str.isdigit, version_str))
-        if digits_from_version:
-            version_num = int(digits_from_version)
-        else:
-            version_num = 0
-
-        series_position, _ = extract_series_position(subject)
-
         # we want the lowest series position, then lowest patch position, then if all else is equal, the lowest email_id
-        current_score = (series_position, version_num, email_id)
+        current_score = (*rank, email_id)
         if current_score < lowest_score:
             lowest_score = current_score
             base_email_url = url
@@ -57,19 +69,31 @@ def fetch_categorized_cves():
     try:
         conn = sqlite3.connect(SUSPECTED_CVE_DB)
         cursor = conn.cursor()
+        # every patch row of each categorized CVE in one query, grouped in Python,
+        # instead of a base email lookup per CVE
         query = """
-            SELECT DISTINCT match_cve_id, category
+            SELECT match_cve_id, category, email_id, subject, url
             FROM suspected_cve_patches
-            WHERE category IS NOT NULL AND category != '' AND category != 'Other'
-            ORDER BY match_cve_id;
+            WHERE match_cve_id IN (
+                SELECT match_cve_id
+                FROM suspected_cve_patches
+                WHERE category IS NOT NULL AND category != '' AND category != 'Other'
+            )
+            ORDER BY match_cve_id, email_id;
         """
         cursor.execute(query)
-        cve_list = cursor.fetchall()
 
         categorized_cves = []
-        for cve_id, category in cve_list:
-            base_email_url = find_base_patch_email(cursor, cve_id)
-            if base_email_url:
+        for cve_id, rows in groupby(cursor, key=lambda row: row[0]):
+            rows = list(rows)
+            base_email_url = pick_base_url([(email_id, subject, url) for _, _, email_id, subject, url in rows])
+            if not base_email_url:
+                continue
+            categories = dict.fromkeys(
+                category for _, category, _, _, _ in rows
+                if category and category != 'Other'
+            )
+            for category in categories:
                 categorized_cves.append((cve_id, category, base_email_url))
         return categorized_cves
     except sqlite3.Error as e:
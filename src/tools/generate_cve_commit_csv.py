@@ -2,50 +2,46 @@ import sqlite3
 import argparse
 import csv
 from datetime import datetime
-from ..core.data_access import get_patches_for_cve
+from itertools import groupby
 from ..core.utils import clean_csv_final_report
-from .link_cve_to_commit import normalize_subject
+from .link_cve_to_commit import normalize_subject, COMMIT_URL_PREFIX
 
 SUSPECTED_CVE_DB = "suspected_cve_patches.db"
 COMMIT_DB_PATH = "commits.db"
+REPORT_FLUSH_EVERY = 100 # rows written between flushes, so a crash leaves a usable partial report
 
-def get_cve_category_and_base_url(cve_id: str) -> tuple[str, str]:
-    """
-    Retrieves the category and the URL of the base patch for a given CVE ID.
-    """
-    conn = sqlite3.connect(SUSPECTED_CVE_DB)
-    cursor = conn.cursor()
-    
-    cursor.execute("SELECT category FROM suspected_cve_patches WHERE match_cve_id = ? LIMIT 1", (cve_id,))
-    result = cursor.fetchone()
-    category = result[0] if result else "N/A"
-
-    # try to find the base patch URL
-    patches = get_patches_for_cve(cve_id)
-    base_url = min(patches, key=lambda p: p[0])[2] if patches else "N/A"
-    
-    conn.close()
-    return category, base_url
+def _normalize_subject_sql(subject):
+    return normalize_subject(subject) if subject is not None else None
 
-def find_matching_commit(cve_id: str, commit_cursor) -> tuple[str, str]:
+def iter_cve_report_rows(conn: sqlite3.Connection, limit: int = 0):
     """
-    Finds the matching commit hash for a CVE by searching patch subjects.
-    Returns the commit hash and the commit URL.
+    Yield (cve_id, category, base_url, commit_hash) for each categorized CVE, ordered by CVE ID.
+
+    conn is a connection to the suspected CVE database with commits.db attached as cdb and
+    normalize_subject registered, so SQLite matches every patch subject against the commit
+    index itself. The category and the base URL come from the CVE's patch with the lowest
+    email ID. The commit is that of the first patch, in email ID order, whose normalized
+    subject matches a commit subject; when several commits share that subject, the
+    earliest inserted one wins.
+    commit_hash is None when no patch matched.
     """
-    cve_patches = get_patches_for_cve(cve_id)
-    if not cve_patches:
-        return None, None
-
-    for _, subject, _ in cve_patches:
-        normalized_subject = normalize_subject(subject)
-        commit_cursor.execute("SELECT hash FROM commits WHERE subject = ?", (normalized_subject,))
-        result = commit_cursor.fetchone()
-        if result:
-            commit_hash = result[0]
-            commit_url = f"https://git.kernel.org/pub/scm/linux/kernel/git/stable/linux.git/commit/?id={commit_hash}"
-            return commit_hash, commit_url
-            
-    return None, None
+    cursor = conn.execute("""
+        SELECT s.match_cve_id, s.category, s.url,
+               (SELECT c.hash FROM cdb.commits c
+                WHERE c.subject = normalize_subject(s.subject)
+                ORDER BY c.rowid LIMIT 1)
+        FROM suspected_cve_patches s
+        WHERE s.match_cve_id IN (
+            SELECT match_cve_id FROM suspected_cve_patches WHERE category IS NOT NULL
+        )
+        ORDER BY s.match_cve_id, s.email_id
+    """)
+    for count, (cve_id, rows) in enumerate(groupby(cursor, key=lambda row: row[0])):
+        if limit > 0 and count >= limit:
+            break
+        rows = list(rows)
+        commit_hash = next((row[3] for row in rows if row[3]), None)
+        yield cve_id, rows[0][1], rows[0][2], commit_hash
 
 def main():
     """
@@ -55,38 +51,39 @@ def main():
     parser.add_argument('--limit', type=int, default=0, help="Limit the number of CVEs to process (0 for all).")
     args = parser.parse_args()
 
-    conn_cve = sqlite3.connect(SUSPECTED_CVE_DB)
-    cve_ids = [row[0] for row in conn_cve.execute("SELECT DISTINCT match_cve_id FROM suspected_cve_patches WHERE category IS NOT NULL").fetchall()]
-    conn_cve.close()
-
+    # commits.db is attached so the CVE-to-commit join runs as a single query
+    conn = sqlite3.connect(SUSPECTED_CVE_DB)
+    conn.create_function("normalize_subject", 1, _normalize_subject_sql, deterministic=True)
+    conn.execute("ATTACH DATABASE ? AS cdb", (COMMIT_DB_PATH,))
+    # one subject lookup per patch, so make sure commits.db has the subject index
+    conn.execute("CREATE INDEX IF NOT EXISTS cdb.idx_commits_subject ON commits(subject)")
+
+    cve_count = conn.execute(
+        "SELECT COUNT(DISTINCT match_cve_id) FROM suspected_cve_patches WHERE category IS NOT NULL"
+    ).fetchone()[0]
     if args.limit > 0:
-        cve_ids = cve_ids[:args.limit]
+        cve_count = min(cve_count, args.limit)
 
-    print(f"Found {len(cve_ids)} categorized CVEs to process for the final report.")
-
-    conn_commit = sqlite3.connect(COMMIT_DB_PATH)
-    commit_cursor = conn_commit.cursor()
-
-    report_data = []
-    for cve_id in cve_ids:
-        category, base_url = get_cve_category_and_base_url(cve_id)
-        commit_hash, commit_url = find_matching_commit(cve_id, commit_cursor)
-
-        if not commit_hash:
-            # If no commit was found, still include it in the report to show it was processed.
-            commit_hash = "Not Found"
-            commit_url = "N/A"
-
-        report_data.append((cve_id, category, base_url, commit_hash, commit_url))
-        print(f"Processed {cve_id} -> Category: {category}, Commit Found: {'Yes' if commit_url != 'N/A' else 'No'}")
-
-    conn_commit.close()
+    print(f"Found {cve_count} categorized CVEs to process for the final report.")
 
     output_file = f"final_cve_analysis_report_{datetime.now().strftime('%Y%m%d')}.csv"
     with open(output_file, 'w', newline='', encoding='utf-8') as f:
         writer = csv.writer(f)
         writer.writerow(['CVE_ID', 'Vulnerability_Category', 'Base_Patch_URL', 'Merged_Commit_Hash', 'Merged_Commit_URL'])
-        writer.writerows(report_data)
+        for row_count, (cve_id, category, base_url, commit_hash) in enumerate(iter_cve_report_rows(conn, args.limit), 1):
+            if commit_hash:
+                commit_url = COMMIT_URL_PREFIX + commit_hash
+            else:
+                # If no commit was found, still include it in the report to show it was processed.
+                commit_hash = "Not Found"
+                commit_url = "N/A"
+
+            writer.writerow((cve_id, category, base_url, commit_hash, commit_url))
+            print(f"Processed {cve_id} -> Category: {category}, Commit Found: {'Yes' if commit_url != 'N/A' else 'No'}")
+            if row_count % REPORT_FLUSH_EVERY == 0:
+                f.flush()
+
+    conn.close()
     clean_csv_final_report(input_path=output_file, remove_not_found=True)
 
     print(f"\nFinal report generated successfully: {output_file}")
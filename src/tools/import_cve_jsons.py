@@ -1,6 +1,13 @@
 import os
 import json
 import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import orjson  # C-backed JSON parser, a few times faster than json for the CVE files
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
 
 """
 This script imports CVE JSON files from a specified directory into an SQLite database.
@@ -16,6 +23,13 @@ CVE_ROOT_DIR = r"cvelistV5\cves\2024" # Adjust this path as needed to fit local
 # Database path for storing CVE records, adjust as needed
 # we decided to consolidate the cve related data into one db so this wil be the one
 DB_PATH = "suspected_cve_patches.db" # again, change this as needed, i.e remove the lkml-patch-analysis/ if you have it in a different folder
+IMPORT_BATCH_SIZE = 1000 # records written per executemany/commit during the bulk import
+
+INSERT_CVE_JSON_SQL = """
+    INSERT OR REPLACE INTO cve_json_records
+    (cve_id, title, description, cwe_id, vendor, product, reference_urls)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
 
 def create_cve_json_table(db_path):
     """Create the cve_json_records table in the SQLite database if it does not exist."""
@@ -35,14 +49,8 @@ def create_cve_json_table(db_path):
     conn.commit()
     conn.close()
 
-def insert_cve_json_records(db_path, record):
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    cursor.execute("""
-        INSERT OR REPLACE INTO cve_json_records
-        (cve_id, title, description, cwe_id, vendor, product, reference_urls)
-        VALUES (?, ?, ?, ?, ?, ?, ?)
-    """, (
+def _record_row(record):
+    return (
         record['cve_id'],
         record['title'],
         record['description'],
@@ -50,7 +58,12 @@ def insert_cve_json_records(db_path, record):
         record['vendor'],
         record['product'],
         record['reference_urls']
-    ))
+    )
+
+def insert_cve_json_records(db_path, record):
+    """Insert a single CVE record. The bulk import in main() batches its inserts instead."""
+    conn = sqlite3.connect(db_path)
+    conn.execute(INSERT_CVE_JSON_SQL, _record_row(record))
     conn.commit()
     conn.close()
 
@@ -92,22 +105,63 @@ def extract_info_from_json(json_data):
     }
 
 
+def _parse_cve_file(file_path):
+    """
+    Load one CVE JSON file and extract its record. Runs in a worker process.
+    Returns (file_path, record, error), with the error message set instead of raising.
+    """
+    try:
+        if ORJSON_AVAILABLE:
+            with open(file_path, 'rb') as f:
+                data = orjson.loads(f.read())
+        else:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        return file_path, extract_info_from_json(data), None
+    except Exception as e:
+        return file_path, None, str(e)
+
+
 def main():
     create_cve_json_table(DB_PATH)
+    # one connection for the whole import. The database also holds the suspected
+    # patches, LLM categories and git pull tables, which this import cannot rebuild,
+    # so WAL with synchronous=NORMAL keeps it crash-safe while batching the syncs
+    conn = sqlite3.connect(DB_PATH)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    cursor = conn.cursor()
+
+    file_paths = [
+        os.path.join(root, fname)
+        for root, dirs, files in os.walk(CVE_ROOT_DIR)
+        for fname in files
+        if fname.endswith(".json")
+    ]
+
+    # parsing is CPU-bound, so it is spread across all cores; the database
+    # writes stay in this process
+    batch = []
     count = 0
-    for root, dirs, files in os.walk(CVE_ROOT_DIR):
-        for fname in files:
-            if fname.endswith(".json"):
-                file_path = os.path.join(root, fname)
-                try:
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        data = json.load(f)
-                    record = extract_info_from_json(data)
-                    if record['cve_id']:
-                        insert_cve_json_records(DB_PATH, record)
-                        count += 1
-                except Exception as e:
-                    print(f"Error processing file {file_path}: {e}")
+    with ProcessPoolExecutor() as pool:
+        for file_path, record, error in pool.map(_parse_cve_file, file_paths, chunksize=100):
+            if error is not None:
+                print(f"Error processing file {file_path}: {error}")
+                continue
+            if record['cve_id']:
+                batch.append(_record_row(record))
+                count += 1
+
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                cursor.executemany(INSERT_CVE_JSON_SQL, batch)
+                conn.commit()
+                batch.clear()
+
+    if batch:
+        cursor.executemany(INSERT_CVE_JSON_SQL, batch)
+        conn.commit()
+    conn.close()
     print(f"Inserted {count} CVE records into the database.")
 
 
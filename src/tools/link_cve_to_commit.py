@@ -2,18 +2,225 @@ import sqlite3
 import argparse
 import re
 import csv
+import logging
 import os
-from ..core.data_access import get_all_cve_ids, get_patches_for_cve
+import zlib
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import islice
+from ..core.data_access import get_all_cve_ids, get_patches_for_cve, fts5_phrase
+
+try:
+    from rapidfuzz import fuzz, process
+    RAPIDFUZZ_AVAILABLE = True
+except ImportError:
+    RAPIDFUZZ_AVAILABLE = False
 
 COMMIT_DB_PATH = "commits.db"
 SUSPECTED_CVE_DB = "suspected_cve_patches.db"
 GIT_LOG_PATH = "gitlog_2024.txt"
+COMMIT_URL_PREFIX = "https://git.kernel.org/pub/scm/linux/kernel/git/stable/linux.git/commit/?id=" # + commit hash
+COMMIT_SEPARATOR = '<commit_begin>\n' # written before every commit in the git log
+COMMIT_PARSE_BATCH = 10000 # commit blocks read, parsed across processes and inserted at a time
+SUBSTRING_MIN_WORDS = 3 # shortest patch subject, in words, tried as a commit subject substring
+FUZZY_SUBJECT_CUTOFF = 85 # minimum rapidfuzz ratio (0-100) for a fuzzy subject match
+LINK_PROGRESS_EVERY = 500 # CVEs between progress lines while linking
+DIFF_COMPRESSION_LEVEL = 6 # zlib level for the diffs stored in commits.db
+
+# per-CVE link results are logged at INFO, shown with --verbose
+logger = logging.getLogger(__name__)
 
+_SUBJECT_PREFIX_RE = re.compile(r'^(re:\s*|\[patch[^\]]*\]\s*)')
+# the commit date line ("... 2024 +0100") right before the subject in the git log
+_COMMIT_DATE_LINE_RE = re.compile(r'\s\d{4}\s[+-]\d{4}$')
+
+@lru_cache(maxsize=65536)
 def normalize_subject(subject: str) -> str:
     """Normalize the email subject by converting to lowercase, removing prefixes like "Re:" and "[patch]", and stripping whitespace."""
-    subject = subject.lower()
-    subject = re.sub(r'^(re:\s*|\[patch[^\]]*\]\s*)', '', subject).strip()
-    return subject
+    return _SUBJECT_PREFIX_RE.sub('', subject.lower()).strip()
+
+def compress_diff(diff: str) -> bytes:
+    """
+    Compress a commit diff for storage. Diffs are most of commits.db, and source
+    text shrinks several times under zlib, so the table stays small enough to cache.
+    The text is zlib.decompress(stored).decode('utf-8').
+    """
+    return zlib.compress(diff.encode('utf-8'), DIFF_COMPRESSION_LEVEL)
+
+def ensure_commits_fts(conn) -> None:
+    """
+    Make sure the commits_fts full-text index over commit subjects exists, so substring
+    lookups are index matches instead of LIKE '%...%' scans of the commits table.
+
+    The trigram tokenizer matches any substring of three or more characters,
+    case-insensitively. The index is an external-content table over commits, filled
+    once: commits.db is only written when it is built from the git log.
+    """
+    cursor = conn.cursor()
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'commits_fts'")
+    if cursor.fetchone() is None:
+        print("Building commits_fts subject index (one-time migration)...")
+        cursor.execute("""
+            CREATE VIRTUAL TABLE commits_fts USING fts5(
+                subject, content='commits', content_rowid='rowid', tokenize='trigram'
+            )
+        """)
+        cursor.execute("INSERT INTO commits_fts(commits_fts) VALUES ('rebuild')")
+    conn.commit()
+
+def find_commit_hash_by_subject_substring(cursor, normalized_subject: str):
+    """
+    Hash of the commit whose subject contains the normalized subject, through the
+    commits_fts trigram index, or None.
+
+    A short or generic subject ("fix", "cleanup") is contained in many unrelated
+    commit subjects, so subjects under SUBSTRING_MIN_WORDS words are not looked up,
+    and a match only counts when a single distinct commit subject contains the
+    needle. Commits sharing that subject resolve to the earliest inserted one.
+    """
+    if len(normalized_subject.split()) < SUBSTRING_MIN_WORDS:
+        return None
+    # one row per distinct matching subject, carrying its earliest commit's hash
+    cursor.execute("""
+        SELECT MIN(c.rowid), c.hash
+        FROM commits_fts f
+        JOIN commits c ON c.rowid = f.rowid
+        WHERE commits_fts MATCH ?
+        GROUP BY c.subject
+        LIMIT 2
+    """, (fts5_phrase(normalized_subject),))
+    rows = cursor.fetchall()
+    return rows[0][1] if len(rows) == 1 else None
+
+def _is_commit_date_line(line: str) -> bool:
+    """
+    Whether a git log line is the commit date line. Only lines ending in a "+hhmm"/"-hhmm"
+    offset can match, so the regex runs on those alone, not on every hash, author and
+    message line before the date.
+    """
+    return len(line) >= 11 and line[-5] in '+-' and _COMMIT_DATE_LINE_RE.search(line) is not None
+
+def build_fuzzy_subject_index(commit_hashes: dict) -> tuple:
+    """
+    Commit subjects sorted by length for find_commit_hash_by_fuzzy_subject, as
+    (subjects, their lengths, their positions in commit_hashes' insertion order).
+    """
+    all_subjects = list(commit_hashes)
+    ranks = sorted(range(len(all_subjects)), key=lambda i: len(all_subjects[i]))
+    subjects = [all_subjects[i] for i in ranks]
+    return subjects, [len(subject) for subject in subjects], ranks
+
+def find_commit_hash_by_fuzzy_subject(normalized_subject: str, commit_hashes: dict, fuzzy_index: tuple):
+    """
+    Hash of the commit whose subject is most similar to the normalized subject, by
+    fuzz.ratio (normalized insert/delete edit distance, computed with rapidfuzz's
+    bit-parallel kernel, which stops early below the cutoff) of at least
+    FUZZY_SUBJECT_CUTOFF, or None. Catches subjects reworded slightly between the
+    posted patch and the merged commit. Ties go to the earliest inserted commit.
+
+    Only subjects of a compatible length are scored: the ratio is at most
+    1 - |len(a) - len(b)| / (len(a) + len(b)), so anything outside that length band
+    cannot reach the cutoff, and a bisect over the length-sorted subjects skips it.
+
+    Args:
+        normalized_subject: Normalized patch subject
+        commit_hashes: Normalized commit subject to hash, in insertion order
+        fuzzy_index: build_fuzzy_subject_index(commit_hashes), built once per run
+    """
+    if not RAPIDFUZZ_AVAILABLE or not normalized_subject:
+        return None
+    subjects, lengths, ranks = fuzzy_index
+    slack = 1 - FUZZY_SUBJECT_CUTOFF / 100
+    length = len(normalized_subject)
+    # widened by one character so float rounding never drops a candidate
+    low = bisect_left(lengths, length * (1 - slack) / (1 + slack) - 1)
+    high = bisect_right(lengths, length * (1 + slack) / (1 - slack) + 1)
+    matches = process.extract(
+        normalized_subject, subjects[low:high], scorer=fuzz.ratio, score_cutoff=FUZZY_SUBJECT_CUTOFF, limit=None
+    )
+    if not matches:
+        return None
+    # the band is ordered by length, so ties are broken on insertion order explicitly
+    best_subject, _, _ = max(matches, key=lambda match: (match[1], -ranks[low + match[2]]))
+    return commit_hashes[best_subject]
+
+def iter_commit_blocks(lines):
+    """
+    Yield the text of each commit in the git log as the file is read, so the
+    whole log is never held in memory. Blocks are exactly the pieces
+    content.split(COMMIT_SEPARATOR) would give.
+    """
+    buffer = []
+    for line in lines:
+        if line.endswith(COMMIT_SEPARATOR):
+            buffer.append(line[:-len(COMMIT_SEPARATOR)])
+            yield ''.join(buffer)
+            buffer = []
+        else:
+            buffer.append(line)
+    yield ''.join(buffer)
+
+def parse_commit(commit_data: str):
+    """
+    Parse one commit block of the git log into a (hash, normalized subject, message,
+    compressed diff) row, or None if it has no subject line. Runs in the worker
+    processes, so the compression is spread across them too.
+    """
+    if not commit_data.strip():
+        return None
+    
+    lines = commit_data.strip().split('\n')
+    commit_hash = lines[0]
+    
+    subject_line_ind = -1
+    for i, line in enumerate(lines):
+        if _is_commit_date_line(line):
+            subject_line_ind = i + 1
+            break
+    
+    if subject_line_ind == -1 or subject_line_ind >= len(lines):
+        return None
+        
+    subject = lines[subject_line_ind]
+    
+    diff_start_index = -1
+    for i, line in enumerate(lines):
+        if line.startswith('diff --git'):
+            diff_start_index = i
+            break
+    
+    if diff_start_index != -1:
+        message = "\n".join(lines[subject_line_ind+1:diff_start_index]).strip()
+        diff = "\n".join(lines[diff_start_index:]).strip()
+    else:
+        message = "\n".join(lines[subject_line_ind+1:]).strip()
+        diff = ""
+
+    return (commit_hash, normalize_subject(subject), message, compress_diff(diff))
+
+def iter_commit_rows(lines, executor=None):
+    """
+    Yield a (hash, normalized subject, message, compressed diff) row for every commit in the git log lines,
+    in log order.
+
+    With an executor, blocks are parsed across its worker processes, COMMIT_PARSE_BATCH at a
+    time so that only one batch of the log is in memory (executor.map would otherwise read
+    the whole file up front).
+    """
+    blocks = iter_commit_blocks(lines)
+    if executor is None:
+        for row in map(parse_commit, blocks):
+            if row:
+                yield row
+        return
+    while True:
+        batch = list(islice(blocks, COMMIT_PARSE_BATCH))
+        if not batch:
+            return
+        for row in executor.map(parse_commit, batch, chunksize=256):
+            if row:
+                yield row
 
 def create_and_populate_commit_db():
     """
@@ -36,56 +243,33 @@ def create_and_populate_commit_db():
         
     print("Creating commit database with diffs...")
     conn = sqlite3.connect(db_file)
+    # bulk load settings; commits.db can always be rebuilt from the git log
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
     cursor = conn.cursor()
     cursor.execute("""
         CREATE TABLE commits (
             hash TEXT PRIMARY KEY,
             subject TEXT,
             message TEXT,
-            diff TEXT
+            diff BLOB
         )
     """)
-    with open("gitlog_2024.txt", 'r', encoding='utf-8', errors='ignore') as f:
-        content = f.read()
-    
-    commits = content.split('<commit_begin>\n')
-    for commit_data in commits:
-        if not commit_data.strip():
-            continue
-        
-        lines = commit_data.strip().split('\n')
-        commit_hash = lines[0]
-        
-        subject_line_ind = -1
-        for i, line in enumerate(lines):
-            if re.search(r'\s\d{4}\s[+-]\d{4}$', line):
-                subject_line_ind = i + 1
-                break
-        
-        if subject_line_ind == -1 or subject_line_ind >= len(lines):
-            continue
-            
-        subject = lines[subject_line_ind]
-        
-        diff_start_index = -1
-        for i, line in enumerate(lines):
-            if line.startswith('diff --git'):
-                diff_start_index = i
-                break
-        
-        if diff_start_index != -1:
-            message = "\n".join(lines[subject_line_ind+1:diff_start_index]).strip()
-            diff = "\n".join(lines[diff_start_index:]).strip()
-        else:
-            message = "\n".join(lines[subject_line_ind+1:]).strip()
-            diff = ""
-
-        cursor.execute(
+    # one executemany over all parsed commits, in a single transaction, fed
+    # batch by batch as the log is read and parsed in worker processes
+    with open("gitlog_2024.txt", 'r', encoding='utf-8', errors='ignore') as f, ProcessPoolExecutor() as executor:
+        cursor.executemany(
             "INSERT OR IGNORE INTO commits (hash, subject, message, diff) VALUES (?, ?, ?, ?)",
-            (commit_hash, normalize_subject(subject), message, diff)
+            iter_commit_rows(f, executor)
         )
 
+    # CVE patches are linked to commits by exact subject lookups
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_commits_subject ON commits(subject)")
+    # statistics let the planner pick the subject index for the IN lookups
+    cursor.execute("ANALYZE")
     conn.commit()
+    ensure_commits_fts(conn)
     conn.close()
     print("Commit database created successfully with commit messages and diffs.")
 
@@ -113,31 +297,63 @@ def connect_cve_patch_subjects_to_commits(limit: int = 100):
     report_data = []
     conn = sqlite3.connect(COMMIT_DB_PATH)
     cursor = conn.cursor()
+    # commit databases built before the index was added get it here
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_commits_subject ON commits(subject)")
+    ensure_commits_fts(conn)
+
+    # commits.db does not change during a run, so every subject is loaded once and each
+    # patch subject is a dict probe; the earliest inserted commit wins on a shared subject
+    commit_hashes = {}
+    for commit_subject, commit_hash in cursor.execute("SELECT subject, hash FROM commits ORDER BY rowid"):
+        commit_hashes.setdefault(commit_subject, commit_hash)
+    fuzzy_index = build_fuzzy_subject_index(commit_hashes)
+    if not RAPIDFUZZ_AVAILABLE:
+        print("rapidfuzz is not installed; CVEs without an exact or substring subject match will not be fuzzy matched.")
+
+    # tried in order, each over all of a CVE's patches, until one links the CVE. The
+    # fallbacks are memoized for the run, since v2/v3 postings repeat subjects across CVEs
+    matchers = [
+        ("with subject", commit_hashes.get),
+        # no exact subject match: a commit subject containing the patch subject
+        ("by subject substring", lru_cache(maxsize=None)(
+            lambda normalized: find_commit_hash_by_subject_substring(cursor, normalized)
+        )),
+        # still nothing: the most similar commit subject, for slightly reworded patches
+        ("by fuzzy subject match", lru_cache(maxsize=None)(
+            lambda normalized: find_commit_hash_by_fuzzy_subject(normalized, commit_hashes, fuzzy_index)
+        )),
+    ]
 
     print(f"Attempting to link {len(cve_ids)} CVE IDs to commits...")
 
-    for cve_id in cve_ids:
+    for cve_number, cve_id in enumerate(cve_ids, 1):
+        if cve_number % LINK_PROGRESS_EVERY == 0:
+            print(f"Processed {cve_number}/{len(cve_ids)} CVEs, {len(report_data)} linked so far...")
         cve_patches = get_patches_for_cve(cve_id)
         if not cve_patches:
-            print(f"No patches found for CVE {cve_id}. Skipping.")
+            logger.info("No patches found for CVE %s. Skipping.", cve_id)
             continue
 
         match_found_for_cve = False
-        for _, subject, _ in cve_patches:
-            normalized_subject = normalize_subject(subject)
-            cursor.execute(
-                "SELECT hash FROM commits WHERE subject = ?",
-                (normalized_subject,)
-            )
-            commit_hash = cursor.fetchone()
-            if commit_hash:
-                commit_url = f"https://git.kernel.org/pub/scm/linux/kernel/git/stable/linux.git/commit/?id={commit_hash[0]}"
-                report_data.append((cve_id, commit_hash[0], subject, commit_url))
-                print(f"Linked CVE {cve_id} to commit {commit_hash[0]} with subject: {subject}")
-                match_found_for_cve = True
+        normalized_subjects = [normalize_subject(subject) for _, subject, _ in cve_patches]
+        for how, find_commit_hash in matchers:
+            # the first patch (in table order) whose subject has a commit wins
+            for (_, subject, _), normalized_subject in zip(cve_patches, normalized_subjects):
+                # a subject that is nothing but a prefix like "[PATCH]" identifies no commit
+                if not normalized_subject:
+                    continue
+                commit_hash = find_commit_hash(normalized_subject)
+                if commit_hash:
+                    commit_url = COMMIT_URL_PREFIX + commit_hash
+                    report_data.append((cve_id, commit_hash, subject, commit_url))
+                    logger.info("Linked CVE %s to commit %s %s: %s", cve_id, commit_hash, how, subject)
+                    match_found_for_cve = True
+                    break
+            if match_found_for_cve:
                 break
         if not match_found_for_cve:
-            print(f"No matching commit found for CVE {cve_id} with subject: {subject}")
+            logger.info("No matching commit found for CVE %s with subject: %s", cve_id, subject)
+    print(f"Linked {len(report_data)} of {len(cve_ids)} CVEs to commits.")
     return report_data
 
 
@@ -146,9 +362,12 @@ def main():
     parser.add_argument('--create-db', action='store_true', help="Create and populate the commit database.")
     parser.add_argument('--connect-cve', action='store_true', help="Connect CVE patches to commits.")
     parser.add_argument('--limit', type=int, default=100, help="Limit the number of CVEs to process (default: 100).")
+    parser.add_argument('--verbose', action='store_true', help="Print the link result of every CVE.")
 
 
     args = parser.parse_args()
+    if args.verbose:
+        logging.basicConfig(level=logging.INFO, format="%(message)s")
     if args.create_db:
         create_and_populate_commit_db()
     if args.connect_cve:
@@ -2,6 +2,15 @@ import requests
 import sqlite3
 import re
 
+# "M: Name <email>" / "R: Name <email>" in one anchored match
+_LINE_RE = re.compile(r'([MR]):\s*([^<]+)<([^>]+)>')
+# fallbacks for the rare lines _LINE_RE does not cover, e.g. "M: Name <> <email>"
+_EMAIL_RE = re.compile(r'<([^>]+)>')
+_NAME_RES = {'M:': re.compile(r'M:\s*([^<]+)'), 'R:': re.compile(r'R:\s*([^<]+)')}
+_ROLES = {'M:': 'Maintainer', 'R:': 'Reviewer'}
+# field tags that can never start a subsystem header line
+_HEADER_PREFIXES = frozenset({'M:', 'R:', 'L:', 'F:', 'T:', 'S:'})
+
 
 def create_maintainer_DB():
     conn = sqlite3.connect('./maintainers.db')
@@ -28,11 +37,11 @@ def scrape_maintainers_from_kernel_org():
     url = "https://git.kernel.org/pub/scm/linux/kernel/git/torvalds/linux.git/plain/MAINTAINERS"
 
     try:
-        res = requests.get(url)
+        res = requests.get(url, stream=True)
         res.raise_for_status()
-        content = res.text
+        res.encoding = res.encoding or 'utf-8'
 
-        maintainers = parse_maintainers(content)
+        maintainers = parse_maintainers(res.iter_lines(decode_unicode=True))
 
     except requests.RequestException as e:
         print(f"Error fetching data from {url}: {e}")
@@ -56,12 +65,13 @@ def scrape_maintainers_from_github():
     }
     
     try:
-        response = requests.get(url, headers=headers, timeout=30)
+        # stream the file and parse it line by line as it arrives
+        response = requests.get(url, headers=headers, timeout=30, stream=True)
         response.raise_for_status()
-        content = response.text
+        response.encoding = response.encoding or 'utf-8'
         
         # Parse MAINTAINERS file
-        maintainers = parse_maintainers(content)
+        maintainers = parse_maintainers(response.iter_lines(decode_unicode=True))
         
     except Exception as e:
         print(f"Error fetching MAINTAINERS file from GitHub: {e}")
@@ -72,50 +82,47 @@ def scrape_maintainers_from_github():
 '''
 Function to find maintainers in the content of the MAINTAINERS file.
 It parses the content line by line, identifying maintainers and their roles.
+content is either the whole file as a string or an iterable of its lines
+(e.g. a streamed HTTP response), so the file never has to be held twice.
 '''
 def parse_maintainers(content):
     maintainers = []
     current_subsystem = None
-    lines = content.split('\n')
-    i = 0
+    lines = content.split('\n') if isinstance(content, str) else content
 
-    while i < len(lines):
-        line =lines[i].strip()
+    for line in lines:
+        line = line.strip()
 
         if not line or line.startswith('#'):
-            i += 1
             continue
 
+        tag = line[:2]
+
         # each subsystem starts with an uppercase letter and is not a maintainer or reviewer line
-        if line.isupper() and not line.startswith(('M:', 'R:', 'L:', 'F:', 'T:', 'S:')):
+        if tag not in _HEADER_PREFIXES and line.isupper():
             current_subsystem = line
-            i += 1
             continue
 
-        if line.startswith('M:'): # maintainer line
-            email_match = re.search(r'<([^>]+)>', line)
-            name_match = re.search(r'M:\s*([^<]+)', line)
-
-            if email_match and name_match:
-                maintainers.append({
-                    'name': name_match.group(1).strip(),
-                    'email': email_match.group(1).strip(),
-                    'subsystem': current_subsystem,
-                    'role': 'Maintainer'
-                })
-
-        elif line.startswith('R:'):  # reviewer line
-            email_match = re.search(r'<([^>]+)>', line)
-            name_match = re.search(r'R:\s*([^<]+)', line)
-            if email_match and name_match:
-                maintainers.append({
-                    'name': name_match.group(1).strip(),
-                    'email': email_match.group(1).strip(),
-                    'subsystem': current_subsystem,
-                    'role': 'Reviewer'
-                })
-        
-        i += 1
+        role = _ROLES.get(tag) # maintainer or reviewer line
+        if role is None:
+            continue
+
+        line_match = _LINE_RE.match(line)
+        if line_match:
+            name, email = line_match.group(2), line_match.group(3)
+        else:
+            email_match = _EMAIL_RE.search(line)
+            name_match = _NAME_RES[tag].search(line)
+            if not (email_match and name_match):
+                continue
+            name, email = name_match.group(1), email_match.group(1)
+
+        maintainers.append({
+            'name': name.strip(),
+            'email': email.strip(),
+            'subsystem': current_subsystem,
+            'role': role
+        })
     return maintainers
 
 def store_maintainers_in_db():
@@ -128,21 +135,29 @@ def store_maintainers_in_db():
 
     print(f"Found {len(maintainers)} maintainers. Storing in database...")
 
-    for maintainer in maintainers:
-        try:
-            cursor.execute('''
-                INSERT INTO maintainers (name, email, subsystem, role)
-                VALUES (?, ?, ?, ?)
-            ''', (
-                maintainer['name'], 
-                maintainer['email'], 
-                maintainer['subsystem'], 
-                maintainer['role']
-                ))
-        except sqlite3.IntegrityError:
-            print(f"Maintainer {maintainer['email']} already exists in the database.")
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
 
+    # people listed under several subsystems appear once per entry; keep the first
+    # occurrence of each email, which is the row INSERT OR IGNORE would keep anyway
+    seen_emails = set()
+    rows = []
+    for m in maintainers:
+        if m['email'] in seen_emails:
+            continue
+        seen_emails.add(m['email'])
+        rows.append((m['name'], m['email'], m['subsystem'], m['role']))
+
+    # one statement for every row; emails already stored are skipped by the UNIQUE constraint
+    changes_before = conn.total_changes
+    cursor.execute("BEGIN")
+    cursor.executemany('''
+        INSERT OR IGNORE INTO maintainers (name, email, subsystem, role)
+        VALUES (?, ?, ?, ?)
+    ''', rows)
     conn.commit()
+    inserted = conn.total_changes - changes_before
+    print(f"{len(rows)} unique maintainer emails: inserted {inserted}, skipped {len(rows) - inserted} already in the database.")
     print("Database updated successfully.")
 
     #printing some statistics